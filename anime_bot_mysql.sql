@@ -6,7 +6,8 @@ CREATE TABLE IF NOT EXISTS anime_datas (
   file_id TEXT NOT NULL,
   qism TEXT NOT NULL,
   sana TEXT,
-  PRIMARY KEY (data_id)
+  PRIMARY KEY (data_id),
+  UNIQUE KEY anime_datas_anime_qism_uq (id(32), qism(16))
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 CREATE TABLE IF NOT EXISTS animelar (
@@ -38,7 +39,9 @@ CREATE TABLE IF NOT EXISTS joinRequests (
   id INT NOT NULL AUTO_INCREMENT,
   channelId VARCHAR(32) NOT NULL,
   userId VARCHAR(255) NOT NULL,
-  PRIMARY KEY (id)
+  PRIMARY KEY (id),
+  KEY joinrequests_user_channel_idx (userId, channelId),
+  UNIQUE KEY joinrequests_channel_user_uq (channelId, userId)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
 CREATE TABLE IF NOT EXISTS kabinet (
@@ -8,6 +8,8 @@ CREATE TABLE IF NOT EXISTS anime_datas (
   sana TEXT
 );
 
+CREATE UNIQUE INDEX IF NOT EXISTS anime_datas_anime_qism_uq ON anime_datas (id, qism);
+
 CREATE TABLE IF NOT EXISTS animelar (
   id SERIAL PRIMARY KEY,
   nom TEXT NOT NULL,
@@ -23,6 +25,8 @@ CREATE TABLE IF NOT EXISTS animelar (
   "like" INTEGER DEFAULT 0,
   deslike INTEGER DEFAULT 0
 );
+CREATE INDEX IF NOT EXISTS animelar_nom_id_idx ON animelar (nom, id);
+CREATE INDEX IF NOT EXISTS animelar_qidiruv_id_idx ON animelar (qidiruv, id);
 
 CREATE TABLE IF NOT EXISTS channels (
   id SERIAL PRIMARY KEY,
@@ -37,6 +41,9 @@ CREATE TABLE IF NOT EXISTS joinRequests (
   userId VARCHAR(255) NOT NULL
 );
 
+CREATE INDEX IF NOT EXISTS joinrequests_user_channel_idx ON joinRequests (userId, channelId);
+CREATE UNIQUE INDEX IF NOT EXISTS joinrequests_channel_user_uq ON joinRequests (channelId, userId);
+
 CREATE TABLE IF NOT EXISTS kabinet (
   id SERIAL PRIMARY KEY,
   user_id VARCHAR(250) NOT NULL,
@@ -75,3 +82,155 @@ CREATE TABLE IF NOT EXISTS user_id (
   refid VARCHAR(11),
   sana VARCHAR(250) NOT NULL
 );
+-- foydalanuvchiga bitta qator (ensure_user: ON CONFLICT (user_id) DO NOTHING)
+CREATE UNIQUE INDEX IF NOT EXISTS user_id_user_uq ON user_id (user_id);
+CREATE UNIQUE INDEX IF NOT EXISTS kabinet_user_uq ON kabinet (user_id);
+-- referallar auditi (kim kimni taklif qilgan)
+CREATE INDEX IF NOT EXISTS user_id_refid_idx ON user_id (refid) WHERE refid IS NOT NULL;
+CREATE INDEX IF NOT EXISTS status_user_idx ON status (user_id);
+
+CREATE TABLE IF NOT EXISTS events (
+  id BIGSERIAL PRIMARY KEY,
+  ts TIMESTAMPTZ NOT NULL DEFAULT now(),
+  kind SMALLINT NOT NULL,
+  user_id BIGINT NOT NULL,
+  anime_id INTEGER,
+  xid XID8 NOT NULL DEFAULT pg_current_xact_id()  -- rollup: commit bo'lganlari (stats.py)
+);
+CREATE INDEX IF NOT EXISTS events_xid_id_idx ON events (xid, id);
+
+CREATE TABLE IF NOT EXISTS daily_stats (
+  day DATE NOT NULL,
+  kind SMALLINT NOT NULL,
+  events BIGINT NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, kind)
+);
+
+CREATE TABLE IF NOT EXISTS daily_users (
+  day DATE PRIMARY KEY,
+  hll BYTEA NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rollup_state (
+  name TEXT PRIMARY KEY,
+  last_id BIGINT NOT NULL DEFAULT 0,
+  last_xid XID8 NOT NULL DEFAULT pg_current_xact_id()
+);
+
+CREATE TABLE IF NOT EXISTS settings (
+  key TEXT PRIMARY KEY,
+  value JSONB NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE TABLE IF NOT EXISTS roles (
+  user_id BIGINT PRIMARY KEY,
+  role TEXT NOT NULL CHECK (role IN ('owner', 'admin', 'moderator')),
+  added_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- suv belgili post rasmlari: (manba, shablon, kod) -> Telegram file_id (render.py)
+CREATE TABLE IF NOT EXISTS rendered_posts (
+  source_file_id TEXT NOT NULL,
+  template TEXT NOT NULL,
+  code TEXT NOT NULL,
+  file_id TEXT NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (source_file_id, template, code)
+);
+
+-- janrlar: animelar.janri dan ajratilgan (database.sync_genres), facets.py indeksi uchun
+CREATE TABLE IF NOT EXISTS genres (
+  id SERIAL PRIMARY KEY,
+  name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS anime_genres (
+  anime_id INTEGER NOT NULL,
+  genre_id INTEGER NOT NULL,
+  PRIMARY KEY (anime_id, genre_id)
+);
+CREATE INDEX IF NOT EXISTS anime_genres_genre_idx ON anime_genres (genre_id);
+
+-- ovozlar: (foydalanuvchi, anime) uchun bitta; animelar."like"/deslike paketlab yangilanadi (votes.py)
+CREATE TABLE IF NOT EXISTS votes (
+  user_id BIGINT NOT NULL,
+  anime_id INTEGER NOT NULL,
+  value SMALLINT NOT NULL CHECK (value IN (-1, 1)),
+  voted_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (user_id, anime_id)
+);
+
+-- o'xshash animelar: har anime uchun top-k (recommend.py, har hisobda to'liq almashtiriladi)
+CREATE TABLE IF NOT EXISTS recommendations (
+  anime_id INTEGER NOT NULL,
+  rank SMALLINT NOT NULL,
+  similar_id INTEGER NOT NULL,
+  score REAL NOT NULL,
+  computed_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (anime_id, rank)
+);
+
+-- trenddagilar: forward decay ballari (trending.py), landmark - epoch soniya
+CREATE TABLE IF NOT EXISTS trending (
+  anime_id INTEGER PRIMARY KEY,
+  score DOUBLE PRECISION NOT NULL,
+  landmark DOUBLE PRECISION NOT NULL
+);
+
+-- yangi qism xabarlari uchun obunalar (notify.py): PK bo'yicha keyset fan-out
+CREATE TABLE IF NOT EXISTS subscriptions (
+  anime_id INTEGER NOT NULL,
+  user_id BIGINT NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (anime_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS subscriptions_user_idx ON subscriptions (user_id);
+
+-- "Davom ettirish": foydalanuvchining oxirgi ochgan qismi (progress.py)
+CREATE TABLE IF NOT EXISTS watch_progress (
+  user_id BIGINT PRIMARY KEY,
+  anime_id INTEGER NOT NULL,
+  episode INTEGER NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- bot_status hisoblagichlari (statement-level triggerlar bilan)
+CREATE TABLE IF NOT EXISTS counters (
+  name TEXT PRIMARY KEY,
+  value BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION counters_bump() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    UPDATE counters SET value = value + (SELECT COUNT(*) FROM new_rows) WHERE name = TG_TABLE_NAME;
+  ELSE
+    UPDATE counters SET value = value - (SELECT COUNT(*) FROM old_rows) WHERE name = TG_TABLE_NAME;
+  END IF;
+  RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+INSERT INTO counters (name, value) SELECT 'user_id', COUNT(*) FROM user_id ON CONFLICT (name) DO NOTHING;
+INSERT INTO counters (name, value) SELECT 'animelar', COUNT(*) FROM animelar ON CONFLICT (name) DO NOTHING;
+INSERT INTO counters (name, value) SELECT 'anime_datas', COUNT(*) FROM anime_datas ON CONFLICT (name) DO NOTHING;
+
+CREATE OR REPLACE TRIGGER user_id_count_ins AFTER INSERT ON user_id
+  REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION counters_bump();
+CREATE OR REPLACE TRIGGER user_id_count_del AFTER DELETE ON user_id
+  REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION counters_bump();
+CREATE OR REPLACE TRIGGER animelar_count_ins AFTER INSERT ON animelar
+  REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION counters_bump();
+CREATE OR REPLACE TRIGGER animelar_count_del AFTER DELETE ON animelar
+  REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION counters_bump();
+CREATE OR REPLACE TRIGGER anime_datas_count_ins AFTER INSERT ON anime_datas
+  REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION counters_bump();
+CREATE OR REPLACE TRIGGER anime_datas_count_del AFTER DELETE ON anime_datas
+  REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION counters_bump();
+
+-- referal reytingi: davriy REFRESH MATERIALIZED VIEW CONCURRENTLY (unique indeks shart)
+CREATE MATERIALIZED VIEW IF NOT EXISTS referral_leaderboard AS
+SELECT refid AS user_id, COUNT(*) AS referrals FROM user_id
+WHERE refid IS NOT NULL GROUP BY refid ORDER BY COUNT(*) DESC, refid LIMIT 100;
+CREATE UNIQUE INDEX IF NOT EXISTS referral_leaderboard_user_uq ON referral_leaderboard (user_id);
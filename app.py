@@ -0,0 +1,1904 @@
+# main_part1.py
+import os
+import asyncio
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from typing import Optional
+import logging
+
+from aiogram import Bot, Dispatcher, types
+from aiogram.dispatcher import FSMContext
+from aiogram.dispatcher.filters.state import State, StatesGroup
+from aiogram.utils.exceptions import MessageNotModified
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardRemove
+
+# local modules
+import database  # our database.py
+from coalesce import CallbackCoalescer
+from subscription import SubscriptionGate
+from join_requests import JoinRequestBuffer, ApprovalWorker
+import catalog_io
+import stats
+from settings import SettingsService
+from roles import RoleService, CHANNEL as ROLES_CHANNEL
+from render import PostRenderer, RenderError
+from inline import InlineSearch
+import facets
+from votes import VoteBuffer
+from recommend import Recommender
+from trending import Trending
+from notify import EpisodeNotifier
+from progress import WatchProgress
+import tenancy
+import warmup
+
+load_dotenv()
+
+# --- Logging ---
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# --- Configs ---
+BOT_TOKEN = os.getenv("BOT_TOKEN", "")
+ADMIN_ID = os.getenv("ADMIN_ID", "")  # optional
+JOIN_AUTO_APPROVE = os.getenv("JOIN_AUTO_APPROVE", "false").lower() == "true"  # optional
+# optional: lokal Bot API server yoki yuklama testi uchun bench/fake_telegram.py (http://127.0.0.1:8081)
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
+
+# Ensure directories (step fayllari uchun; sozlamalar endi bazada - settings.py)
+os.makedirs('step', exist_ok=True)
+
+def read_file(path: str) -> str:
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read().strip()
+    return ""
+def write_file(path: str, content: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(str(content))
+
+# --- Botlar (tenancy.py): BOT_TENANTS_FILE bo'lsa bir jarayonda bir nechta, aks holda BOT_TOKEN ---
+tenants = tenancy.load_tenants(BOT_TOKEN, ADMIN_ID, TELEGRAM_API_URL)
+if not tenants:
+    logger.error("BOT_TOKEN is not set in .env")
+    raise SystemExit("Please set BOT_TOKEN in .env")
+
+def step_dir() -> str:
+    # step fayllari har bot uchun alohida (birinchi bot - avvalgidek step/)
+    return tenancy.current().step_dir
+
+def is_admin(user_id: int) -> bool:
+    return role_service.is_admin(user_id)
+
+def setup_tenant(t: tenancy.Tenant):
+    """Har botning o'z holati: sozlamalar, rollar, keshlar va buferlar."""
+    # Sozlamalar: xotiradagi nusxa, startupda bazadan yuklanadi (settings jadvali)
+    t.settings = SettingsService()
+    # Yagona manba: roles jadvali (ADMIN_ID - owner). Tekshiruv xotiradagi frozenset da.
+    t.role_service = RoleService(t.admin_id)
+    t.settings.subscribe(ROLES_CHANNEL, t.role_service.load)
+    # Majburiy obuna (channels jadvali)
+    t.subscription_gate = SubscriptionGate(is_admin)
+    # Faollik jurnali (statistika uchun)
+    t.event_log = stats.EventLog()
+    # Yopiq kanallarga qo'shilish so'rovlari
+    t.join_buffer = JoinRequestBuffer()
+    # inline qidiruv natijalari keshi (katalog o'zgarsa tozalanadi)
+    t.inline_search = InlineSearch()
+    # 👍/👎: ovozlar xotirada yig'iladi, votes va hisoblagichlarga fonda paketlab yoziladi
+    t.vote_buffer = VoteBuffer()
+    # "🎯 O‘xshash animelar": fonda hisoblanadi (recommend.py), tugma - xotiradan lookup
+    t.recommender = Recommender()
+    # "🔥 Trenddagilar": view/download hodisalaridan so'nuvchi ballar, top ro'yxat xotirada
+    t.trending = Trending()
+    t.event_log.subscribe(t.trending.record)
+    # "▶️ Davom ettirish": oxirgi ochilgan qism LRU da, bazaga fonda paketlab yoziladi
+    t.watch_progress = WatchProgress()
+    # janr / yil / davlat bitmaplari (birinchi so'rovda yoki katalog o'zgargach quriladi)
+    t.facet_index = facets.FacetIndex()
+    t.approval_worker = ApprovalWorker(t.bot) if JOIN_AUTO_APPROVE else None
+    # yangi qism xabarlari: faqat obunachilarga, qo'shilgan qismlar bitta digestga yig'iladi
+    t.episode_notifier = EpisodeNotifier(t.bot)
+
+for tenant in tenants:
+    setup_tenant(tenant)
+
+# handlerlar shu nomlarni ishlatadi: har murojaatda joriy update botining nusxasi
+bot = tenancy.Local('bot')
+settings = tenancy.Local('settings')
+role_service = tenancy.Local('role_service')
+subscription_gate = tenancy.Local('subscription_gate')
+event_log = tenancy.Local('event_log')
+join_buffer = tenancy.Local('join_buffer')
+inline_search = tenancy.Local('inline_search')
+vote_buffer = tenancy.Local('vote_buffer')
+recommender = tenancy.Local('recommender')
+trending = tenancy.Local('trending')
+watch_progress = tenancy.Local('watch_progress')
+facet_index = tenancy.Local('facet_index')
+approval_worker = tenancy.Local('approval_worker')
+episode_notifier = tenancy.Local('episode_notifier')
+
+# --- Aiogram init ---
+# handlerlar bir marta; dp.bot, dp.storage (FSM) va dp['pool'] joriy botniki
+dp = tenancy.TenantDispatcher()
+dp.middleware.setup(tenancy.Middleware('subscription_gate'))
+start_time = datetime.now()  # bot_status uptime uchun
+
+# Epizod tugmalarini ketma-ket bosishlarni birlashtirish (faqat oxirgisi bajariladi)
+episode_coalescer = CallbackCoalescer(delay=0.35)
+# post rasmlariga suv belgisi: Pillow alohida jarayonlarda (hamma bot uchun bitta), natija file_id keshda
+post_renderer = PostRenderer()
+
+# Global pool will be attached to dispatcher on startup
+# dp['pool'] = await database.create_pool()
+
+@dp.chat_join_request_handler()
+async def on_chat_join_request(request: types.ChatJoinRequest):
+    # bazaga yozish fon rejimida (join_buffer), bu yerda faqat xotira
+    join_buffer.add(request.chat.id, request.from_user.id)
+    subscription_gate.forget(request.from_user.id)
+    if approval_worker:
+        approval_worker.enqueue(request.chat.id, request.from_user.id)
+
+# --- Keyboards ---
+def main_menu_kb(user_id: int) -> InlineKeyboardMarkup:
+    keys = settings.keys
+    keyboard = [
+        [InlineKeyboardButton(keys[0], callback_data='search')],
+        [InlineKeyboardButton("▶️ Davom ettirish", callback_data='continue')],
+        [InlineKeyboardButton(keys[1], callback_data='vip'), InlineKeyboardButton(keys[2], callback_data='balance')],
+        [InlineKeyboardButton(keys[3], callback_data='add_money'), InlineKeyboardButton(keys[4], callback_data='help')],
+        [InlineKeyboardButton(keys[5], callback_data='sponsor')]
+    ]
+    if is_admin(user_id):
+        keyboard.append([InlineKeyboardButton("🗄 Boshqarish", callback_data='panel')])
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+# --- Start handler ---
+@dp.message_handler(commands=['start'])
+async def cmd_start(message: types.Message):
+    user_id = message.from_user.id
+    pool = dp.get('pool')
+    args = message.get_args()
+    # referal havola: t.me/<bot>?start=ref_<taklif qiluvchi id> - faqat yangi foydalanuvchiga hisoblanadi
+    ref_id = int(args[4:]) if args.startswith("ref_") and args[4:].isdigit() else None
+    # ensure user exists in DB
+    if await database.ensure_user(pool, user_id, ref_id, settings.referal_bonus):
+        event_log.record('join', user_id)
+    start_text = settings.start_text or "Assalomu alaykum!"
+    await message.answer(start_text, reply_markup=main_menu_kb(user_id))
+    # deep-link: t.me/<bot>?start=<anime kodi> (post rasmlaridagi havola)
+    if args.isdigit():
+        await send_anime(user_id, int(args))
+    elif args.startswith("ep_"):
+        # yangi qism xabaridagi havola: ep_<anime kodi>_<qism>
+        parts = args.split("_")
+        if len(parts) == 3 and parts[1].isdigit() and parts[2].isdigit():
+            await send_episode(user_id, int(parts[1]), int(parts[2]))
+
+# --- Callback dispatcher (core routes) ---
+# umumiy handler: fayl oxirida ro'yxatdan o'tadi, aniq prefiksli handlerlar avval ishlasin
+async def cb_all(query: types.CallbackQuery):
+    data = query.data or ""
+    uid = query.from_user.id
+
+    # ADMIN PANEL
+    if data == 'panel':
+        if not is_admin(uid):
+            await query.answer("❌ Sizda ruxsat yo'q!", show_alert=True)
+            return
+        kb = InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton("📊 Statistika", callback_data='stats')],
+            [InlineKeyboardButton("✉ Xabar jiberiw", callback_data='send_message')],
+            [InlineKeyboardButton("📬 Post dayındaw", callback_data='create_post')],
+            [InlineKeyboardButton("🎥 Animelerdi baptaw", callback_data='anime_settings')],
+            [InlineKeyboardButton("◀️ Artqa", callback_data='back')]
+        ])
+        await query.message.edit_text("Admin panelga xush kelibsiz!", reply_markup=kb)
+        await query.answer()
+        return
+
+    # SEARCH MENU
+    if data == 'search':
+        kb = InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton("🏷 Anime atı boyınsha", callback_data='searchByName')],
+            [InlineKeyboardButton("📚 Barcha animelar", callback_data='allAnimes')],
+            [InlineKeyboardButton("🔥 Trenddagilar", callback_data='trending')],
+            [InlineKeyboardButton("🎭 Janr bo'yicha", callback_data='fc=-:-:-')],
+            [InlineKeyboardButton("◀️ Artqa", callback_data='back')]
+        ])
+        await query.message.edit_text("🔍 Izlash turini tanlang:", reply_markup=kb)
+        await query.answer()
+        return
+
+    # BACK to main
+    if data == 'back':
+        await query.message.edit_text(settings.start_text or "Bosh menyu", reply_markup=main_menu_kb(uid))
+        await query.answer()
+        return
+
+    # VIP block (simple)
+    if data == 'vip':
+        pool = dp.get('pool')
+        status = await database.get_user_status(pool, uid)
+        if status == 'Oddiy':
+            narx = settings.vip_narx
+            val = settings.valyuta
+            kb = InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(f"30 kún - {narx} {val}", callback_data='shop=30')],
+                [InlineKeyboardButton(f"60 kún - {narx*2} {val}", callback_data='shop=60')],
+                [InlineKeyboardButton(f"90 kún - {narx*3} {val}", callback_data='shop=90')]
+            ])
+            await query.message.edit_text("💎 VIP bo'limi", reply_markup=kb)
+        else:
+            active = await database.get_vip_days(pool, uid)
+            if active:
+                expire = (datetime.now() + timedelta(days=active)).strftime("%d.%m.%Y")
+                kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton("🗓️ Uzartıw", callback_data='uzaytirish')]])
+                await query.message.edit_text(f"Siz VIP statusdasiz. Amal qilish muddati: {expire}", reply_markup=kb)
+        await query.answer()
+        return
+
+    # BALANCE
+    if data == 'balance':
+        val, invited = await database.get_cabinet(dp.get('pool'), uid)
+        me = await bot.me
+        kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton("🏆 Reyting", callback_data='ref_top')]])
+        await query.message.edit_text(f"#ID: <code>{uid}</code>\nBalans: {val} {settings.valyuta}\n"
+                                      f"👥 Taklif qilganlaringiz: {invited}\n"
+                                      f"🔗 Havolangiz: https://t.me/{me.username}?start=ref_{uid}",
+                                      parse_mode='HTML', reply_markup=kb)
+        await query.answer()
+        return
+
+    # referal reytingi: materialized view dan (davriy yangilanadi), so'rovda COUNT yo'q
+    if data == 'ref_top':
+        rows = await database.get_referral_leaderboard(dp.get('pool'), 10)
+        lines = ["🏆 Eng ko'p taklif qilganlar:"]
+        for i, row in enumerate(rows, 1):
+            ref = str(row['user_id'])
+            lines.append(f"{i}. <code>{ref[:3]}***{ref[-2:]}</code> — {row['referrals']} ta")
+        if not rows:
+            lines.append("Hozircha hech kim yo'q.")
+        kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton("◀️ Orqaga", callback_data='balance')]])
+        await query.message.edit_text("\n".join(lines), parse_mode='HTML', reply_markup=kb)
+        await query.answer()
+        return
+
+    # searchByName
+    if data == 'searchByName':
+        await query.message.edit_text("🔎 Anime nomini yuboring:")
+        write_file(f"{step_dir()}/{uid}.step", "search_name")
+        await query.answer()
+        return
+
+    # allAnimes: katalogning birinchi sahifasi (alifbo bo'yicha)
+    if data == 'allAnimes':
+        await show_catalog(query, 'a')
+        return
+
+    if data == 'continue':
+        position = await watch_progress.get(dp.get('pool'), uid)
+        if not position:
+            await query.answer("Siz hali hech qanday bo‘lim ko‘rmagansiz", show_alert=True); return
+        await query.answer()
+        await send_episode(uid, *position)
+        return
+
+    if data == 'trending':
+        # ro'yxat xotirada tayyor turadi (trending.top): bazaga so'rov yo'q
+        items = trending.items()
+        kb = InlineKeyboardMarkup()
+        for n, (aid, nom) in enumerate(items, 1):
+            kb.add(InlineKeyboardButton(f"{n}. {nom}", callback_data=f"anime={aid}"))
+        kb.add(InlineKeyboardButton("◀️ Artqa", callback_data='search'))
+        text = "🔥 Trenddagilar:" if items else "🔥 Hozircha trenddagi animelar yo'q."
+        try:
+            await query.message.edit_text(text, reply_markup=kb)
+        except MessageNotModified:
+            pass
+        await query.answer()
+        return
+
+    # show anime by callback anime=ID
+    if data.startswith("anime="):
+        try:
+            aid = int(data.split("=")[1])
+        except Exception:
+            await query.answer("ID xato"); return
+        # reuse show function (defined below)
+        await show_anime_callback(query, aid)
+        return
+
+    # vote=<anime_id>=<1|-1>: bazaga yozish fon rejimida (vote_buffer)
+    if data.startswith("vote="):
+        try:
+            _, aid, value = data.split("=")
+            aid, value = int(aid), int(value)
+            if value not in (-1, 1):
+                raise ValueError(value)
+        except Exception:
+            await query.answer("ID xato"); return
+        vote_buffer.add(uid, aid, value)
+        await query.answer("👍 Ovozingiz qabul qilindi" if value > 0 else "👎 Ovozingiz qabul qilindi")
+        return
+
+    # sim=<anime_id>: oldindan hisoblangan o'xshashlar
+    if data.startswith("sim="):
+        try:
+            aid = int(data.split("=")[1])
+        except Exception:
+            await query.answer("ID xato"); return
+        similar = recommender.get(aid)
+        if not similar:
+            await query.answer("Hozircha o‘xshash animelar yo‘q", show_alert=True); return
+        kb = InlineKeyboardMarkup()
+        for sid, nom in similar:
+            kb.add(InlineKeyboardButton(nom, callback_data=f"anime={sid}"))
+        await bot.send_message(uid, "🎯 O‘xshash animelar:", reply_markup=kb)
+        await query.answer()
+        return
+
+    # notify=<anime_id>: yangi qism xabarlariga obuna (qayta bossa - bekor)
+    if data.startswith("notify="):
+        try:
+            aid = int(data.split("=")[1])
+        except Exception:
+            await query.answer("ID xato"); return
+        if await database.toggle_subscription(dp.get('pool'), uid, aid):
+            await query.answer("🔔 Yangi bo‘limlar haqida xabar beramiz", show_alert=True)
+        else:
+            await query.answer("🔕 Obuna bekor qilindi", show_alert=True)
+        return
+
+    await query.answer()  # default acknowledgement
+
+# --- Message handling (steps + fallback search) ---
+# umumiy handler: fayl oxirida ro'yxatdan o'tadi, buyruqlar va step handlerlar avval ishlasin
+async def msg_all(message: types.Message):
+    uid = message.from_user.id
+    text = message.text or ""
+    step_file = f"{step_dir()}/{uid}.step"
+    pool = dp.get('pool')
+
+    # Step: search_name
+    if os.path.exists(step_file):
+        step = read_file(step_file)
+        if step == "search_name":
+            # perform search
+            event_log.record('search', uid)
+            rows = await database.search_animes_by_name(pool, text, limit=10)
+            if not rows:
+                await message.reply("❌ Hech nima topilmadi.")
+                try: os.remove(step_file)
+                except: pass
+                return
+            kb = InlineKeyboardMarkup()
+            for r in rows:
+                kb.add(InlineKeyboardButton(r['nom'], callback_data=f"anime={r['id']}"))
+            await message.reply("🔍 Natijalar:", reply_markup=kb)
+            try: os.remove(step_file)
+            except: pass
+            return
+
+    # Quick buttons mapping by exact text
+    if text == settings.keys[0]:
+        await message.answer("🔍 Izlash turini tanlang:", reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton("🏷 Anime nomi bo'yicha", callback_data='searchByName')],
+            [InlineKeyboardButton("📚 Barcha animelar", callback_data='allAnimes')],
+            [InlineKeyboardButton("🔥 Trenddagilar", callback_data='trending')],
+            [InlineKeyboardButton("🎭 Janr bo'yicha", callback_data='fc=-:-:-')]
+        ]))
+        return
+
+    if text == settings.keys[1]:
+        await message.answer("💎 VIP bo'limi (tugmani bosing)", reply_markup=InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton("30 kún - VIP", callback_data='shop=30')]
+        ]))
+        return
+
+    # fallback: search by name directly
+    event_log.record('search', uid)
+    rows = await database.search_animes_by_name(pool, text, limit=10)
+    if not rows:
+        await message.reply("❌ Hech qanday anime topilmadi.")
+        return
+    kb = InlineKeyboardMarkup()
+    for r in rows:
+        kb.add(InlineKeyboardButton(r['nom'], callback_data=f"anime={r['id']}"))
+    await message.reply("🔍 Topildi:", reply_markup=kb)
+
+# --- show anime helper ---
+async def show_anime_callback(query: types.CallbackQuery, anime_id: int):
+    if not await send_anime(query.from_user.id, anime_id):
+        await query.answer("Anime topilmadi!", show_alert=True); return
+    await query.answer()
+
+async def send_anime(uid: int, anime_id: int) -> bool:
+    pool = dp.get('pool')
+    anime = await database.get_anime_by_id(pool, anime_id, user_id=uid)
+    if not anime:
+        return False
+    # increment qidiruv
+    async with pool.acquire() as conn:
+        await conn.execute("UPDATE animelar SET qidiruv = qidiruv + 1 WHERE id = $1", anime_id)
+    event_log.record('view', uid, anime_id)
+
+    # build caption
+    caption = (f"<b>🎬 Atı: {anime['nom']}</b>\n\n"
+               f"🎥 Bólimi: {anime['qismi']}\n"
+               f"🌍 Mámleketi: {anime['davlat']}\n"
+               f"🇺🇿 Tili: {anime['tili']}\n"
+               f"📆 Yılı: {anime['yili']}\n"
+               f"🎞 Janrı: {anime['janri']}\n\n"
+               f"🔍 Izlewler: {anime['qidiruv']}\n")
+    kb = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton("📥 Júklap alıw", callback_data=f"yuklanolish={anime_id}=1")],
+        [InlineKeyboardButton(f"👍 {anime['like'] or 0}", callback_data=f"vote={anime_id}=1"),
+         InlineKeyboardButton(f"👎 {anime['deslike'] or 0}", callback_data=f"vote={anime_id}=-1")],
+        [InlineKeyboardButton("🎯 O‘xshash animelar", callback_data=f"sim={anime_id}")],
+        [InlineKeyboardButton("🔔 Obuna bo‘lish", callback_data=f"notify={anime_id}")]])
+    rams = anime['rams'] or ""
+    try:
+        if rams.startswith('B'):
+            await bot.send_video(chat_id=uid, video=rams[1:], caption=caption, parse_mode='HTML', reply_markup=kb,
+                                 protect_content=settings.protect_content)
+        elif rams.startswith('P'):
+            await bot.send_photo(chat_id=uid, photo=rams[1:], caption=caption, parse_mode='HTML', reply_markup=kb,
+                                 protect_content=settings.protect_content)
+        else:
+            await bot.send_message(uid, caption, reply_markup=kb, parse_mode='HTML')
+    except Exception as e:
+        logger.exception("Error sending media: %s", e)
+        await bot.send_message(uid, caption, reply_markup=kb, parse_mode='HTML')
+    return True
+
+# --- Katalog (allAnimes): keyset sahifalar, callback_data: cat=<tartib>[=<n|p>=<kursor>] ---
+CATALOG_PAGE_SIZE = 20  # bitta ustun + navigatsiya qatori; Telegram chegarasi 100 tugma
+
+@dp.callback_query_handler(lambda c: c.data and c.data.startswith("cat="))
+async def cb_catalog(query: types.CallbackQuery):
+    parts = query.data.split("=")
+    order = parts[1] if parts[1] in ('a', 'p') else 'a'
+    if len(parts) == 4 and parts[2] in ('n', 'p'):
+        try:
+            database.parse_catalog_cursor(order, parts[3])
+        except ValueError:
+            # eskirgan yoki buzilgan kursor: birinchi sahifadan
+            await show_catalog(query, order); return
+        await show_catalog(query, order, parts[2], parts[3])
+    else:
+        await show_catalog(query, order)
+
+async def show_catalog(query: types.CallbackQuery, order: str, direction: str = 'n', cursor: str = None):
+    pool = dp.get('pool')
+    rows, more = await database.get_catalog_page(pool, order, direction, cursor, CATALOG_PAGE_SIZE)
+    if not rows and cursor:
+        # kursor qatori o'chirilgan yoki ro'yxat chetidan o'tilgan: boshiga qaytamiz
+        rows, more = await database.get_catalog_page(pool, order, limit=CATALOG_PAGE_SIZE)
+        direction, cursor = 'n', None
+    if not rows:
+        await query.message.edit_text("Ro'yxat bo'sh.")
+        await query.answer()
+        return
+    has_next = more if direction == 'n' else True
+    has_prev = bool(cursor) if direction == 'n' else more
+    kb = InlineKeyboardMarkup()
+    for r in rows:
+        kb.add(InlineKeyboardButton(str(r['nom']), callback_data=f"anime={r['id']}"))
+    nav = []
+    if has_prev:
+        nav.append(InlineKeyboardButton("⬅️", callback_data=f"cat={order}=p={database.catalog_cursor(order, rows[0])}"))
+    if order == 'a':
+        nav.append(InlineKeyboardButton("🔥 Mashhurlari", callback_data="cat=p"))
+    else:
+        nav.append(InlineKeyboardButton("🔤 Alifbo", callback_data="cat=a"))
+    if has_next:
+        nav.append(InlineKeyboardButton("➡️", callback_data=f"cat={order}=n={database.catalog_cursor(order, rows[-1])}"))
+    kb.row(*nav)
+    kb.add(InlineKeyboardButton("◀️ Artqa", callback_data='search'))
+    title = "📚 Barcha animelar:" if order == 'a' else "🔥 Eng ko'p ko'rilganlar:"
+    try:
+        await query.message.edit_text(title, reply_markup=kb)
+    except MessageNotModified:
+        pass
+    await query.answer()
+
+# --- Janr -> yil -> davlat filtri (facets.py), callback_data: fc=<janr>:<yil>:<davlat>[:<o'rin>] ---
+# '-' - hali tanlanmagan qadam, '*' - shu qadamda hammasi
+FACET_TITLES = {'genre': "🎭 Janrni tanlang:", 'year': "📆 Yilni tanlang:", 'country': "🌍 Davlatni tanlang:"}
+FACET_COLUMNS = {'genre': 2, 'year': 3, 'country': 2}
+FACET_MAX_BUTTONS = 60
+
+@dp.callback_query_handler(lambda c: c.data and c.data.startswith("fc="))
+async def cb_facets(query: types.CallbackQuery):
+    parts = query.data[3:].split(":")
+    chosen = (parts + ['-'] * 3)[:3]
+    index = await facet_index.ready(dp.get('pool'))
+    selection = index.select({f: k for f, k in zip(facets.FACETS, chosen) if k != '-'})
+    total = selection.bit_count()
+    kb = InlineKeyboardMarkup()
+
+    if '-' in chosen:
+        step = chosen.index('-')
+        facet = facets.FACETS[step]
+
+        def state(key):
+            picked = chosen[:step] + [key] + chosen[step + 1:]
+            return "fc=" + ":".join(picked)
+
+        buttons = [InlineKeyboardButton(f"{label} ({n})", callback_data=state(key))
+                   for key, label, n in index.counts(facet, selection)[:FACET_MAX_BUTTONS]]
+        cols = FACET_COLUMNS[facet]
+        for i in range(0, len(buttons), cols):
+            kb.row(*buttons[i:i + cols])
+        kb.row(InlineKeyboardButton(f"Hammasi ({total})", callback_data=state(facets.ANY)),
+               InlineKeyboardButton(f"✅ Natijalar ({total})",
+                                    callback_data="fc=" + ":".join(k if k != '-' else facets.ANY for k in chosen)))
+        text = FACET_TITLES[facet]
+    else:
+        after = int(parts[3]) if len(parts) > 3 and parts[3].isdigit() else -1
+        rows, more = index.page(selection, after, CATALOG_PAGE_SIZE)
+        for _, anime_id, nom in rows:
+            kb.add(InlineKeyboardButton(str(nom), callback_data=f"anime={anime_id}"))
+        nav = []
+        if after >= 0:
+            nav.append(InlineKeyboardButton("🔝 Boshiga", callback_data="fc=" + ":".join(chosen)))
+        if more:
+            nav.append(InlineKeyboardButton("➡️", callback_data="fc=" + ":".join(chosen) + f":{rows[-1][0]}"))
+        if nav:
+            kb.row(*nav)
+        labels = [index.labels[f].get(k, "hammasi") if k != facets.ANY else "hammasi"
+                  for f, k in zip(facets.FACETS, chosen)]
+        text = f"🎭 {labels[0]} · 📆 {labels[1]} · 🌍 {labels[2]}\nTopildi: {total} ta"
+    kb.add(InlineKeyboardButton("🔄 Qaytadan", callback_data="fc=-:-:-"),
+           InlineKeyboardButton("◀️ Artqa", callback_data='search'))
+    try:
+        await query.message.edit_text(text, reply_markup=kb)
+    except MessageNotModified:
+        pass
+    await query.answer()
+
+# --- Inline rejim: @bot <nom> istalgan chatda (inline.py) ---
+@dp.inline_handler()
+async def inline_query(query: types.InlineQuery):
+    me = await bot.me
+    if await inline_search.answer(query, dp.get('pool'), me.username) and not query.offset:
+        event_log.record('search', query.from_user.id)
+
+# --- Add anime initiation (admin) ---
+@dp.callback_query_handler(lambda c: c.data == 'anime_settings')
+async def cb_anime_settings(query: types.CallbackQuery):
+    uid = query.from_user.id
+    if not is_admin(uid):
+        await query.answer("❌ Sizda ruxsat yo'q!", show_alert=True)
+        return
+    # start add flow
+    write_file(f"{step_dir()}/{uid}.step", "anime-name")
+    await query.message.answer("🍿 Anime atın kirgiziń:")
+    await query.answer()
+
+# The rest of the add-anime step machine will be continued in the next block (saving images/videos etc.)
+# For now we implemented the step start and first message. The step-machine handler will pick this up
+# and on next messages will proceed to anime-episodes, anime-country, etc.
+
+# ------------------------------------------------------------------
+# Startup / shutdown handlers - will attach DB pool to dispatcher
+# ------------------------------------------------------------------
+async def on_startup(dispatcher: Dispatcher):
+    # keep-alive birinchi: platforma jarayonni tirik ko'radi, /ready esa isish tugaguncha 503
+    set_ready = None
+    try:
+        # try import keep_alive (if present in project)
+        from keep_alive import keep_alive, set_ready, set_metrics
+        keep_alive()
+        set_metrics(tenancy.stats)
+    except Exception:
+        logger.info("keep_alive not started (keep_alive.py missing or raised error)")
+
+    timings = {}
+    # bitta pool hamma botga; har bot o'z sxemasida (database.TenantPool)
+    pool = await warmup.timed(timings, 'pool', database.create_pool())
+    if not database.is_sqlite(pool):
+        # ixtiyoriy o'qish replikalari (DB_REPLICA_DSNS)
+        await warmup.timed(timings, 'replicas', database.replicas.start(database.DB_REPLICA_DSNS))
+    # har bot alohida vazifada: kontekst va undan ochilgan fon vazifalari o'sha botniki
+    await asyncio.gather(*(start_tenant(dispatcher, t, pool) for t in tenants))
+    if set_ready:
+        set_ready()
+    logger.info("Bot startup complete: %s", warmup.summary(timings))
+
+async def start_tenant(dispatcher: Dispatcher, tenant: tenancy.Tenant, shared):
+    tenancy.Tenant.set_current(tenant)
+    Bot.set_current(tenant.bot)
+    timings = {}
+    pool = shared if tenant.schema is None else await database.tenant_pool(shared, tenant.schema)
+    dispatcher['pool'] = pool
+    # DDL faqat sxema versiyasi eski bo'lsa
+    await warmup.timed(timings, 'schema', database.ensure_schema(pool))
+    # polling shundan keyin boshlanadi: update lar isitish tugagach (yoki muddat o'tgach) qabul qilinadi
+    await warmup.warm_up(timings, required={
+        'settings': settings.load(pool),
+        'roles': role_service.load(pool),
+        'channels': subscription_gate.reload(pool),
+    }, optional={
+        'statements': database.prepare_hot_statements(pool),
+        'popular': database.preload_popular(pool, warmup.WARMUP_TOP_ANIME),
+        'facets': facet_index.ready(pool),
+        'recommendations': recommender.load(pool),
+        'trending': trending.load(pool),
+    })
+    # fon vazifalari
+    dispatcher['tasks'] = [asyncio.ensure_future(join_buffer.run(pool)),
+                           asyncio.ensure_future(vote_buffer.run(pool)),
+                           asyncio.ensure_future(recommender.run(pool)),
+                           asyncio.ensure_future(trending.run(pool)),
+                           asyncio.ensure_future(episode_notifier.run(pool)),
+                           asyncio.ensure_future(watch_progress.run(pool)),
+                           asyncio.ensure_future(database.reconcile_counters_forever(pool)),
+                           asyncio.ensure_future(database.refresh_referral_leaderboard_forever(pool))]
+    if database.is_sqlite(pool):
+        # bitta jarayon: replikalar va LISTEN/NOTIFY kerak emas; stats rollup faqat PostgreSQL da
+        # (statistika ekranlari stats.UNAVAILABLE ni ko'rsatadi)
+        event_log.enabled = False
+    else:
+        dispatcher['tasks'] += [asyncio.ensure_future(event_log.run(pool)),
+                                asyncio.ensure_future(settings.listen(pool))]
+    if approval_worker:
+        dispatcher['tasks'].append(asyncio.ensure_future(approval_worker.run()))
+    logger.info("[%s] startup: %s", tenant.name, warmup.summary(timings))
+
+async def stop_tenant(dispatcher: Dispatcher, tenant: tenancy.Tenant):
+    tenancy.Tenant.set_current(tenant)
+    for task in dispatcher.get('tasks') or []:
+        task.cancel()
+    await asyncio.gather(*(dispatcher.get('tasks') or []), return_exceptions=True)
+    return dispatcher.get('pool')
+
+async def on_shutdown(dispatcher: Dispatcher):
+    pools = await asyncio.gather(*(stop_tenant(dispatcher, t) for t in tenants))
+    await database.replicas.close()
+    post_renderer.close()
+    # TenantPool - umumiy pool ko'rinishi: umumiy pool bir marta yopiladi
+    for pool in {getattr(p, 'shared', p) for p in pools if p}:
+        await pool.close()
+    logger.info("Shutdown complete.")
+
+# We intentionally DO NOT call executor.start_polling here inside this chunk.
+# The next block will attach more handlers and eventually start polling.
+# This way we can append further code in subsequent messages without re-running.
+
+# ------------------- main_part2.py (Append to main_part1.py) -------------------
+# Бұл бөлім main_part1.py файлына жалғасады. Егер бәрі бір файлда болса,
+# жай ғана осы блокты main_part1.py соңына қосыңыз.
+
+# --- Qo'shimcha importlar (егер бұрын жоқ болса) ---
+from aiogram.types import ContentType
+import math
+import tempfile
+
+# --- HELP командаси (foydalanuvchi uchun, o'zbekcha) ---
+@dp.message_handler(commands=['help'])
+async def cmd_help(message: types.Message):
+    help_text = (
+        "📚 *Qo'llanma*\n\n"
+        "🔎 Anime qidirish uchun: menyudan yoki #qidir <nom>\n"
+        "📥 Epizodni yuklab olish: anime sahifasidagi «📥 Yuklab olish» tugmasi orqali\n"
+        "/broadcast — (admin) barcha foydalanuvchilarga xabar yuborish\n"
+        "/add_episode — (admin) animega yangi epizod qo'shish\n"
+        "/panel — admin panelini ochish\n\n"
+        "Agar savolingiz bo'lsa, admin bilan bog'laning."
+    )
+    await message.reply(help_text, parse_mode='Markdown')
+
+# --- Add-anime step-machine: davomiy qabul qilish (main_part1 da boshlangan) ---
+# Biz step faylida saqlangan holatlarga qarab keyingi xabarlarni qabul qilamiz.
+@dp.message_handler(lambda m: os.path.exists(f"{step_dir()}/{m.from_user.id}.step") and read_file(f"{step_dir()}/{m.from_user.id}.step").startswith("anime-"))
+async def add_anime_steps_continue(message: types.Message):
+    uid = message.from_user.id
+    step = read_file(f"{step_dir()}/{uid}.step")
+    text = message.text or ""
+    # anime-name handled in part1; continue from episodes -> country -> language -> year -> genre -> fandub -> picture
+    if step == "anime-episodes":
+        write_file(f"{step_dir()}/anime_episodes.txt", text)
+        await message.reply("🌍 Iltimos, anime qaysi mamlakatda yaratilganini kiriting:")
+        write_file(f"{step_dir()}/{uid}.step", "anime-country")
+        return
+    if step == "anime-country":
+        write_file(f"{step_dir()}/anime_country.txt", text)
+        await message.reply("🗣 Iltimos, anime tilini kiriting (masalan: O'zbek, Yaponiya):")
+        write_file(f"{step_dir()}/{uid}.step", "anime-language")
+        return
+    if step == "anime-language":
+        write_file(f"{step_dir()}/anime_language.txt", text)
+        await message.reply("📆 Iltimos, anime yilini kiriting (masalan: 2020):")
+        write_file(f"{step_dir()}/{uid}.step", "anime-year")
+        return
+    if step == "anime-year":
+        write_file(f"{step_dir()}/anime_year.txt", text)
+        await message.reply("🎞 Iltimos, janrlarni kiriting (vergul bilan):\nMisol: Drama, Fantaziya, Sarguzasht")
+        write_file(f"{step_dir()}/{uid}.step", "anime-genre")
+        return
+    if step == "anime-genre":
+        write_file(f"{step_dir()}/anime_genre.txt", text)
+        await message.reply("🎙 Fandub manbasini kiriting (masalan: @AnimeLiveUz) yoki \"Noma'lum\":")
+        write_file(f"{step_dir()}/{uid}.step", "anime-fandub")
+        return
+    if step == "anime-fandub":
+        write_file(f"{step_dir()}/anime_fandub.txt", text)
+        await message.reply("🏞 Iltimos, surat yoki 60 soniyadan kam video yuboring (media sifatida):")
+        write_file(f"{step_dir()}/{uid}.step", "anime-picture")
+        return
+    if step == "anime-picture":
+        # kutyapmiz: rasm yoki video
+        if message.photo:
+            file_id = message.photo[-1].file_id
+            await finalize_add_anime(uid, file_id, 'photo', message)
+        elif message.video:
+            if message.video.duration <= 60:
+                file_id = message.video.file_id
+                await finalize_add_anime(uid, file_id, 'video', message)
+            else:
+                await message.reply("⚠️ Video uzunligi 60 soniyadan oshmasligi kerak. Iltimos qisqaroq video yuboring.")
+        else:
+            await message.reply("⚠️ Iltimos, surat yoki video yuboring (media).")
+        return
+
+async def finalize_add_anime(uid: int, file_id: str, file_type: str, message_obj: types.Message):
+    """
+    Barcha step fayllardan o'qib, bazaga qo'shadi.
+    """
+    nom = read_file(f"{step_dir()}/anime_name.txt")
+    qismi_txt = read_file(f"{step_dir()}/anime_episodes.txt")
+    qismi = int(qismi_txt) if qismi_txt.isdigit() else 0
+    davlat = read_file(f"{step_dir()}/anime_country.txt")
+    tili = read_file(f"{step_dir()}/anime_language.txt")
+    yili = read_file(f"{step_dir()}/anime_year.txt")
+    janri = read_file(f"{step_dir()}/anime_genre.txt")
+    fandub = read_file(f"{step_dir()}/anime_fandub.txt")
+    sana = datetime.now().strftime("%H:%M %d.%m.%Y")
+    prefix = 'B' if file_type == 'video' else 'P'
+    rams = prefix + file_id
+
+    pool = dp.get('pool')
+    try:
+        new_id = await database.add_anime(pool, nom, rams, qismi, davlat, tili, yili, janri, fandub, sana)
+        database.mark_write(uid)
+    except Exception as e:
+        logger.exception("add_anime error: %s", e)
+        await message_obj.reply("❌ Xatolik yuz berdi. Iltimos keyinroq urinib ko'ring.")
+        return
+
+    # tozalash: barcha step fayllarni o'chirish
+    for fname in ['anime_name','anime_episodes','anime_country','anime_language','anime_year','anime_genre','anime_fandub']:
+        fp = f"{step_dir()}/{fname}.txt"
+        if os.path.exists(fp):
+            os.remove(fp)
+    sf = f"{step_dir()}/{uid}.step"
+    if os.path.exists(sf):
+        os.remove(sf)
+
+    await message_obj.reply(f"✅ Anime muvaffaqqiyatli qoʻshildi!\nAnime kodi: <code>{new_id}</code>", parse_mode='HTML')
+
+# --- Episode qo'shish (admin) to'liq oqim ---
+@dp.message_handler(commands=['add_episode'])
+async def cmd_add_episode(message: types.Message):
+    uid = message.from_user.id
+    if not role_service.is_moderator(uid):
+        await message.reply("❌ Siz admin emassiz.")
+        return
+    await message.reply("🔢 Iltimos, qo'shiladigan anime ID sini kiriting:")
+    write_file(f"{step_dir()}/{uid}.step", "episode-wait-id")
+
+@dp.message_handler(lambda m: os.path.exists(f"{step_dir()}/{m.from_user.id}.step") and read_file(f"{step_dir()}/{m.from_user.id}.step") == "episode-wait-id")
+async def proc_episode_wait_id(message: types.Message):
+    uid = message.from_user.id
+    txt = message.text or ""
+    if not txt.isdigit():
+        await message.reply("⚠️ Iltimos faqat raqam ko'rinishida ID yuboring.")
+        return
+    write_file(f"{step_dir()}/episode_anime_id.txt", txt)
+    write_file(f"{step_dir()}/{uid}.step", "episode-wait-media")
+    await message.reply("🎥 Endi video yuboring (mahfiyati himoya qilinadi):")
+
+# Albom (media group) yoki ketma-ket forward qilingan videolar bitta paket bo'lib qo'shiladi:
+# admin oxirgi videodan keyin EPISODE_BATCH_WAIT soniya jim tursa paket yoziladi.
+EPISODE_BATCH_WAIT = 1.5
+_episode_batches = {}  # uid -> {'messages': [...], 'task': Task}
+
+@dp.message_handler(content_types=ContentType.VIDEO)
+async def proc_episode_video_all(message: types.Message):
+    uid = message.from_user.id
+    stepf = f"{step_dir()}/{uid}.step"
+    if not os.path.exists(stepf) or read_file(stepf) != "episode-wait-media":
+        # bu erda boshqa videolarni kutmaymiz
+        return
+    batch = _episode_batches.setdefault(uid, {'messages': [], 'task': None})
+    batch['messages'].append(message)
+    if batch['task']:
+        batch['task'].cancel()
+    batch['task'] = asyncio.ensure_future(flush_episode_batch(uid))
+
+async def flush_episode_batch(uid: int):
+    await asyncio.sleep(EPISODE_BATCH_WAIT)
+    messages = sorted(_episode_batches.pop(uid)['messages'], key=lambda m: m.message_id)
+    last = messages[-1]
+    stepf = f"{step_dir()}/{uid}.step"
+    anime_id_txt = read_file(f"{step_dir()}/episode_anime_id.txt")
+    if not anime_id_txt or not anime_id_txt.isdigit():
+        await last.reply("⚠️ Anime ID topilmadi. Jarayon bekor qilindi.")
+        try: os.remove(stepf)
+        except: pass
+        return
+    anime_id = int(anime_id_txt)
+    file_ids = [m.video.file_id for m in messages]
+    pool = dp.get('pool')
+
+    try:
+        # qism raqamlari bazada atomar beriladi (MAX(qism) + n)
+        sana = datetime.now().strftime("%H:%M:%S %d.%m.%Y")
+        eps = await database.add_episodes(pool, anime_id, file_ids, sana)
+        database.mark_write(uid)
+        episode_notifier.episodes_added(anime_id, eps)
+    except Exception as e:
+        logger.exception("add_episodes error: %s", e)
+        await last.reply("❌ Xatolik yuz berdi. Iltimos keyinroq urinib ko'ring.")
+        return
+
+    # tozalash step fayll
+    try:
+        os.remove(f"{step_dir()}/episode_anime_id.txt")
+    except:
+        pass
+    try:
+        os.remove(stepf)
+    except:
+        pass
+
+    if len(eps) == 1:
+        await last.reply(f"✅ {anime_id} kodli animega {eps[0]}-bo'lim muvaffaqiyatli qoʻshildi!")
+    else:
+        await last.reply(f"✅ {anime_id} kodli animega {len(eps)} ta bo'lim ({eps[0]}–{eps[-1]}) muvaffaqiyatli qoʻshildi!")
+
+# --- Yuklab olish (yuklanolish) handleri: epizodni yuborish va sahifa tugmalari ---
+# callback javobini episode_coalescer darhol beradi, shuning uchun xatolar xabar sifatida yuboriladi
+@dp.callback_query_handler(lambda c: c.data and c.data.startswith("yuklanolish="))
+@episode_coalescer.wrap
+async def cb_yuklanolish(query: types.CallbackQuery):
+    data = query.data  # yuklanolish=anime_id=ep
+    parts = data.split("=")
+    if len(parts) < 3:
+        await bot.send_message(query.from_user.id, "Noto'g'ri buyruq.")
+        return
+    await send_episode(query.from_user.id, int(parts[1]), int(parts[2]))
+
+async def send_episode(uid: int, anime_id: int, ep: int):
+    """Qism videosi + qismlar sahifasi (yuklanolish tugmasi va ep_ deep link)."""
+    pool = dp.get('pool')
+    episode = await database.get_episode(pool, anime_id, ep, user_id=uid)
+    if not episode:
+        await bot.send_message(uid, "Bo'lim topilmadi!"); return
+    event_log.record('download', uid, anime_id)
+    watch_progress.record(uid, anime_id, ep)
+    anime = await database.get_anime_by_id(pool, anime_id, user_id=uid)
+    all_eps = await database.get_episode_numbers(pool, anime_id)
+    # buttons creation with pagination (25 per page)
+    current_page = (ep - 1) // 25
+    start = current_page * 25
+    end = min(start + 25, len(all_eps))
+    buttons = []
+    for i in range(start, end):
+        epn = all_eps[i]
+        if epn == ep:
+            buttons.append(InlineKeyboardButton(f"[{epn}]", callback_data="null"))
+        else:
+            buttons.append(InlineKeyboardButton(str(epn), callback_data=f"yuklanolish={anime_id}={epn}"))
+    kb_rows = [buttons[i:i+4] for i in range(0, len(buttons), 4)]
+    nav = []
+    if current_page > 0:
+        nav.append(InlineKeyboardButton("⬅️ Oldingi", callback_data=f"pagenation={anime_id}={ep}=back"))
+    nav.append(InlineKeyboardButton("❌ Yopish", callback_data="close"))
+    if end < len(all_eps):
+        nav.append(InlineKeyboardButton("Keyingi ➡️", callback_data=f"pagenation={anime_id}={ep}=next"))
+    kb_rows.append(nav)
+    kb = InlineKeyboardMarkup(inline_keyboard=kb_rows)
+
+    caption = f"<b>{anime['nom']}</b>\n\n{ep}-bo'lim"
+    try:
+        await bot.send_video(chat_id=uid, video=episode['file_id'], caption=caption, parse_mode='HTML', reply_markup=kb, protect_content=settings.protect_content)
+    except Exception:
+        # fallback: send message with link or text
+        await bot.send_message(uid, caption, reply_markup=kb)
+
+# --- Pagination handler (pagenation) ---
+@dp.callback_query_handler(lambda c: c.data and c.data.startswith("pagenation="))
+@episode_coalescer.wrap
+async def cb_pagenation(query: types.CallbackQuery):
+    # format: pagenation=anime_id=current_ep=action
+    parts = query.data.split("=")
+    if len(parts) < 4:
+        await bot.send_message(query.from_user.id, "Noto'g'ri buyruq."); return
+    anime_id = int(parts[1]); current_ep = int(parts[2]); action = parts[3]
+    pool = dp.get('pool')
+    all_eps = await database.get_episode_numbers(pool, anime_id)
+    if current_ep not in all_eps:
+        await bot.send_message(query.from_user.id, "Xato: ep topilmadi."); return
+    idx = all_eps.index(current_ep)
+    if action == "back":
+        new_idx = max(0, idx - 25)
+    else:
+        new_idx = min(len(all_eps) - 1, idx + 25)
+    new_ep = all_eps[new_idx]
+
+    # fetch episode data
+    episode = await database.get_episode(pool, anime_id, new_ep, user_id=query.from_user.id)
+    event_log.record('download', query.from_user.id, anime_id)
+    anime = await database.get_anime_by_id(pool, anime_id, user_id=query.from_user.id)
+
+    # rebuild buttons for new page
+    current_page = new_idx // 25
+    start = current_page * 25
+    end = min(start + 25, len(all_eps))
+    buttons = []
+    for i in range(start, end):
+        epn = all_eps[i]
+        if epn == new_ep:
+            buttons.append(InlineKeyboardButton(f"[{epn}]", callback_data="null"))
+        else:
+            buttons.append(InlineKeyboardButton(str(epn), callback_data=f"yuklanolish={anime_id}={epn}"))
+    kb_rows = [buttons[i:i+4] for i in range(0, len(buttons), 4)]
+    nav = []
+    if current_page > 0:
+        nav.append(InlineKeyboardButton("⬅️ Oldingi", callback_data=f"pagenation={anime_id}={new_ep}=back"))
+    nav.append(InlineKeyboardButton("❌ Yopish", callback_data="close"))
+    if end < len(all_eps):
+        nav.append(InlineKeyboardButton("Keyingi ➡️", callback_data=f"pagenation={anime_id}={new_ep}=next"))
+    kb_rows.append(nav)
+    kb = InlineKeyboardMarkup(inline_keyboard=kb_rows)
+
+    caption = f"<b>{anime['nom']}</b>\n\n{new_ep}-bo'lim"
+    try:
+        await bot.send_video(chat_id=query.from_user.id, video=episode['file_id'], caption=caption, parse_mode='HTML', reply_markup=kb, protect_content=settings.protect_content)
+    except Exception:
+        await query.message.reply(caption, reply_markup=kb)
+    # remove previous message for cleanliness
+    try:
+        await query.message.delete()
+    except Exception:
+        pass
+
+# --- Close and null handlers (already in part1 but ensure present) ---
+@dp.callback_query_handler(lambda c: c.data in ['close', 'null'])
+async def cb_close_null_general(query: types.CallbackQuery):
+    if query.data == 'close':
+        try:
+            await query.message.delete()
+        except Exception:
+            pass
+        await query.answer()
+    else:
+        await query.answer()
+
+# --- Broadcast handling: admin sends any media/text and it is forwarded to all users ---
+# Start: admin issues /broadcast (in part1 we set step). Now accept media or text when step == 'broadcast'
+@dp.message_handler(lambda m: os.path.exists(f"{step_dir()}/{m.from_user.id}.step") and read_file(f"{step_dir()}/{m.from_user.id}.step") == "broadcast", content_types=ContentType.ANY)
+async def process_broadcast_message(message: types.Message):
+    uid = message.from_user.id
+    if not is_admin(uid):
+        await message.reply("❌ Siz admin emassiz."); return
+    pool = dp.get('pool')
+    # fetch all user ids
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("SELECT user_id FROM users")
+    target_ids = [r['user_id'] for r in rows]
+    success = 0; failed = 0
+    # prepare sending function to handle different media
+    async def send_to_user(user_id):
+        nonlocal success, failed
+        try:
+            if message.text:
+                await bot.send_message(chat_id=user_id, text=message.text, parse_mode='HTML')
+            elif message.photo:
+                await bot.send_photo(chat_id=user_id, photo=message.photo[-1].file_id, caption=message.caption or "", parse_mode='HTML')
+            elif message.video:
+                await bot.send_video(chat_id=user_id, video=message.video.file_id, caption=message.caption or "", parse_mode='HTML')
+            elif message.document:
+                await bot.send_document(chat_id=user_id, document=message.document.file_id, caption=message.caption or "")
+            else:
+                # fallback: send text about broadcast
+                await bot.send_message(chat_id=user_id, text=message.caption or "📣 Admindan xabar")
+            success += 1
+        except Exception:
+            failed += 1
+
+    # iterate with small sleep to avoid flood
+    for uid_target in target_ids:
+        await send_to_user(uid_target)
+        await asyncio.sleep(0.05)  # 50ms pause
+
+    # cleanup step file
+    try:
+        os.remove(f"{step_dir()}/{message.from_user.id}.step")
+    except:
+        pass
+
+    await message.reply(f"✅ Xabar yuborildi!\n✅ Muvaffaqiyatli: {success}\n❌ Xatolik: {failed}")
+
+# --- Admin: manage_user flow (foydalanuvchini boshqarish) ---
+@dp.callback_query_handler(lambda c: c.data == 'manage_user')
+async def cb_manage_user_start(query: types.CallbackQuery):
+    uid = query.from_user.id
+    if not is_admin(uid):
+        await query.answer("❌ Sizda ruxsat yo'q!", show_alert=True); return
+    await query.message.edit_text("🔎 Iltimos, boshqariladigan foydalanuvchi ID sini yuboring:")
+    write_file(f"{step_dir()}/{uid}.step", "manage_user_id")
+    await query.answer()
+
+@dp.message_handler(lambda m: os.path.exists(f"{step_dir()}/{m.from_user.id}.step") and read_file(f"{step_dir()}/{m.from_user.id}.step") == "manage_user_id")
+async def proc_manage_user_id(message: types.Message):
+    uid = message.from_user.id
+    target_txt = message.text.strip() if message.text else ""
+    if not target_txt.isdigit():
+        await message.reply("⚠️ Iltimos faqat raqam (user ID) yuboring."); return
+    tid = int(target_txt)
+    # show options
+    kb = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton("🔒 Ban qilish", callback_data=f"admin_ban={tid}")],
+        [InlineKeyboardButton("🔓 Unban qilish", callback_data=f"admin_unban={tid}")],
+        [InlineKeyboardButton("💰 Balans o'zgartirish", callback_data=f"admin_balance={tid}")],
+        [InlineKeyboardButton("◀️ Orqaga", callback_data='panel')]
+    ])
+    await message.reply(f"❗ Foydalanuvchi ID: {tid}\nNimani amalga oshirishni xohlaysiz?", reply_markup=kb)
+    try: os.remove(f"{step_dir()}/{uid}.step")
+    except: pass
+
+@dp.callback_query_handler(lambda c: c.data and c.data.startswith("admin_ban="))
+async def cb_admin_ban(query: types.CallbackQuery):
+    if not is_admin(query.from_user.id):
+        await query.answer("❌"); return
+    tid = int(query.data.split("=")[1])
+    await database.set_ban(dp.get('pool'), tid, True)
+    await query.answer("✅ Foydalanuvchi ban qilindi.")
+    await query.message.edit_text(f"Foydalanuvchi {tid} ban qilindi.")
+
+@dp.callback_query_handler(lambda c: c.data and c.data.startswith("admin_unban="))
+async def cb_admin_unban(query: types.CallbackQuery):
+    if not is_admin(query.from_user.id):
+        await query.answer("❌"); return
+    tid = int(query.data.split("=")[1])
+    await database.set_ban(dp.get('pool'), tid, False)
+    await query.answer("✅ Foydalanuvchi unban qilindi.")
+    await query.message.edit_text(f"Foydalanuvchi {tid} unban qilindi.")
+
+@dp.callback_query_handler(lambda c: c.data and c.data.startswith("admin_balance="))
+async def cb_admin_balance(query: types.CallbackQuery):
+    if not is_admin(query.from_user.id):
+        await query.answer("❌"); return
+    tid = int(query.data.split("=")[1])
+    write_file(f"{step_dir()}/{query.from_user.id}.step", f"set_balance:{tid}")
+    await query.message.answer("🔢 Iltimos, yangi balans miqdorini (faqat raqam) kiriting:")
+    await query.answer()
+
+@dp.message_handler(lambda m: os.path.exists(f"{step_dir()}/{m.from_user.id}.step") and read_file(f"{step_dir()}/{m.from_user.id}.step").startswith("set_balance:"))
+async def proc_set_balance(message: types.Message):
+    step = read_file(f"{step_dir()}/{message.from_user.id}.step")
+    tid = int(step.split(":")[1])
+    if not message.text or not message.text.isdigit():
+        await message.reply("⚠️ Faqat raqam yuboring!"); return
+    newbal = int(message.text)
+    await database.set_balance(dp.get('pool'), tid, newbal)
+    try: os.remove(f"{step_dir()}/{message.from_user.id}.step")
+    except: pass
+    await message.reply(f"✅ Foydalanuvchi {tid} balansini {newbal} ga sozladim.")
+
+# --- Admin: add/remove admin komandalar (oddiy matn buyruqlari) ---
+@dp.message_handler(commands=['add_admin'])
+async def cmd_add_admin(message: types.Message):
+    if not is_admin(message.from_user.id):
+        await message.reply("❌ Siz admin emassiz."); return
+    args = message.get_args().split()
+    if not args or not args[0].isdigit() or (len(args) > 1 and args[1] not in ('admin', 'moderator')):
+        await message.reply("⚠️ Foydalanish: /add_admin 123456789 [admin|moderator]"); return
+    newadmin = int(args[0])
+    role = args[1] if len(args) > 1 else 'admin'
+    if role_service.role_of(newadmin) in ('owner', role):
+        await message.reply("⚠️ Bu foydalanuvchi allaqachon admin.") 
+        return
+    # roles jadvali + NOTIFY: barcha replikalardagi nusxa yangilanadi
+    await role_service.set_role(dp.get('pool'), newadmin, role)
+    await message.reply(f"✅ {newadmin} {role} sifatida qo'shildi.")
+
+@dp.message_handler(commands=['remove_admin'])
+async def cmd_remove_admin(message: types.Message):
+    if not is_admin(message.from_user.id):
+        await message.reply("❌ Siz admin emassiz."); return
+    args = message.get_args().strip()
+    if not args.isdigit():
+        await message.reply("⚠️ Foydalanish: /remove_admin 123456789"); return
+    rem = int(args)
+    if role_service.is_owner(rem):
+        await message.reply("⚠️ Bot egasini olib tashlab bo'lmaydi.")
+        return
+    if not await role_service.remove(dp.get('pool'), rem):
+        await message.reply("⚠️ Bunday admin topilmadi.")
+        return
+    await message.reply(f"✅ {rem} adminlikdan olib tashlandi.")
+
+# --- Admin: majburiy obuna kanallari ---
+@dp.message_handler(commands=['add_channel'])
+async def cmd_add_channel(message: types.Message):
+    if not is_admin(message.from_user.id):
+        await message.reply("❌ Siz admin emassiz."); return
+    args = message.get_args().split()
+    if len(args) != 3 or args[1] not in ('lock', 'request'):
+        await message.reply("⚠️ Foydalanish: /add_channel -100123456789 lock|request https://t.me/+link"); return
+    pool = dp.get('pool')
+    await database.add_channel(pool, args[0], args[1], args[2])
+    await subscription_gate.reload(pool)
+    await message.reply(f"✅ {args[0]} kanali qo'shildi.")
+
+@dp.message_handler(commands=['remove_channel'])
+async def cmd_remove_channel(message: types.Message):
+    if not is_admin(message.from_user.id):
+        await message.reply("❌ Siz admin emassiz."); return
+    args = message.get_args().strip()
+    if not args:
+        await message.reply("⚠️ Foydalanish: /remove_channel -100123456789"); return
+    pool = dp.get('pool')
+    if not await database.remove_channel(pool, args):
+        await message.reply("⚠️ Bunday kanal topilmadi."); return
+    await subscription_gate.reload(pool)
+    await message.reply(f"✅ {args} kanali olib tashlandi.")
+
+# --- Admin: katalogni ommaviy import/eksport (catalog_io.py) ---
+# Hujjat izohi: /import animelar  yoki  /import anime_datas  (.csv yoki .jsonl)
+@dp.message_handler(lambda m: (m.caption or "").startswith("/import"), content_types=ContentType.DOCUMENT)
+async def cmd_import_catalog(message: types.Message):
+    if not is_admin(message.from_user.id):
+        await message.reply("❌ Siz admin emassiz."); return
+    args = message.caption.split()
+    if len(args) != 2 or args[1] not in catalog_io.TABLES:
+        await message.reply("⚠️ Hujjat izohi: /import animelar yoki /import anime_datas"); return
+    ext = os.path.splitext(message.document.file_name or "")[1].lower()
+    if ext not in ('.csv', '.jsonl'):
+        await message.reply("⚠️ Faqat .csv yoki .jsonl fayl yuboring."); return
+    fd, path = tempfile.mkstemp(suffix=ext)
+    os.close(fd)
+    try:
+        await message.document.download(destination_file=path)
+        await message.reply("⏳ Import boshlandi...")
+        res = await catalog_io.import_file(dp.get('pool'), args[1], path)
+    except Exception as e:
+        logger.exception("catalog import error: %s", e)
+        await message.reply(f"❌ Import xatosi: {e}"); return
+    finally:
+        os.remove(path)
+    text = (f"✅ Import yakunlandi ({res['table']})\n"
+            f"➕ Qo'shildi: {res['inserted']}\n⏭ O'tkazib yuborildi: {res['skipped']}\n"
+            f"⚠️ Xato qatorlar: {res['invalid']}")
+    if res['errors']:
+        text += "\n\n" + "\n".join(res['errors'])
+    await message.reply(text)
+
+@dp.message_handler(commands=['export'])
+async def cmd_export_catalog(message: types.Message):
+    if not is_admin(message.from_user.id):
+        await message.reply("❌ Siz admin emassiz."); return
+    args = message.get_args().split()
+    if len(args) != 2 or args[0] not in catalog_io.TABLES or args[1] not in ('csv', 'jsonl'):
+        await message.reply("⚠️ Foydalanish: /export animelar|anime_datas csv|jsonl"); return
+    fd, path = tempfile.mkstemp(suffix=f".{args[1]}")
+    os.close(fd)
+    try:
+        count = await catalog_io.export_file(dp.get('pool'), args[0], path)
+        await message.answer_document(types.InputFile(path, filename=f"{args[0]}.{args[1]}"),
+                                      caption=f"📦 {args[0]}: {count} qator")
+    except Exception as e:
+        logger.exception("catalog export error: %s", e)
+        await message.reply(f"❌ Eksport xatosi: {e}")
+    finally:
+        os.remove(path)
+
+# --- Shop (VIP) callback (buy) - bu qism part1 da ham bor edi; lekin bu yerda to'liq e'lon qilamiz ---
+@dp.callback_query_handler(lambda c: c.data and c.data.startswith("shop="))
+async def cb_shop_full(query: types.CallbackQuery):
+    uid = query.from_user.id
+    days = int(query.data.split("=")[1])
+    price = settings.vip_narx
+    val = settings.valyuta
+    total = int((price / 30) * days)
+    if await database.buy_vip(dp.get('pool'), uid, days, total):
+        await query.answer("✅ VIP muvaffaqiyatli sotib olindi!", show_alert=True)
+        await query.message.edit_text(f"💎 Siz VIP boʻldingiz. Amal qilish muddati: {days} kun")
+    else:
+        await query.answer("💸 Hisobingizda yetarli mablag' yo'q!", show_alert=True)
+
+# --- Bot status (admin) - uptime va oddiy statistikalar ---
+@dp.callback_query_handler(lambda c: c.data == 'bot_status')
+async def cb_bot_status(query: types.CallbackQuery):
+    if not is_admin(query.from_user.id):
+        await query.answer("❌"); return
+    # counters jadvali (trigger bilan yuritiladi) + qisqa TTL kesh: COUNT(*) yo'q
+    counters = await database.get_counters(dp.get('pool'))
+    users = counters.get('user_id', 0)
+    animes = counters.get('animelar', 0)
+    episodes = counters.get('anime_datas', 0)
+    uptime = datetime.now() - start_time
+    days = uptime.days
+    hours = uptime.seconds // 3600
+    minutes = (uptime.seconds % 3600) // 60
+    sub = subscription_gate.stats()
+    load = tenancy.current().stats()
+    text = (f"🤖 Bot holati:\nUptime: {days}d {hours}h {minutes}m\n\n"
+            f"👥 Foydalanuvchilar: {users}\n🎬 Animelar: {animes}\n📀 Bo'limlar: {episodes}\n\n"
+            f"📡 Obuna keshi: {sub['hit_ratio']:.0%} hit, "
+            f"{sub['telegram_calls']} so'rov / {sub['telegram_calls_avoided']} tejaldi\n"
+            f"📨 Update: {load['updates']} ({load['errors']} xato, ~{load['handler_ms_avg']} ms), "
+            f"API: {load['api_calls']} so'rov, limit kutish {load['rate_limited_s']}s")
+    await query.message.edit_text(text, reply_markup=InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton("◀️ Orqaga", callback_data='panel')]]))
+    await query.answer()
+
+# -----------------------------------------------------------------------
+# QISQACHA: Bu blok main_part1 ga to'liq qo'shilib, user/admin oqimlarini kengaytiradi.
+# Next steps (main_part3) — biz quyidagi vazifalarni bajaramiz:
+#  - Kanalga post jo'natish oynasini (sendto=...) batafsil to'ldirish (admin tomonidan)
+#  - "buttons" va "texts" sozlamalari orqali tugmalar/matnni tahrirlash imkoniyati
+#  - Analytics (kunlik/oylik statistikalar CSV export)
+#  - Qo'shimcha xavfsizlik: rate-limit va exceptions handlingni mustahkamlash
+#  - README, Procfile, requirements.txt, .env.example fayllari tuzish
+# -----------------------------------------------------------------------
+
+from aiogram.dispatcher.filters import BoundFilter
+
+# Faqat adminlarni ajratib olish uchun filter
+class AdminFilter(BoundFilter):
+    key = "is_admin"
+
+    def __init__(self, is_admin):
+        self.is_admin = is_admin
+
+    async def check(self, obj):
+        # message ham, callback ham from_user ga ega; tekshiruv - frozenset a'zoligi
+        return role_service.is_admin(obj.from_user.id) == self.is_admin
+
+dp.filters_factory.bind(AdminFilter)
+
+# Admin menyusi
+@dp.message_handler(commands=['admin'], is_admin=True)
+async def admin_panel(message: types.Message):
+    tugmalar = ReplyKeyboardMarkup(resize_keyboard=True)
+    tugmalar.add("➕ Anime yuklash")
+    tugmalar.add("✏️ Anime tahrirlash")
+    tugmalar.add("📊 Statistika")
+    tugmalar.add("📝 Post yaratish")
+    tugmalar.add("📢 Foydalanuvchilarga habar tarqatish")
+    tugmalar.add("⚙️ Sozlamalar")
+    tugmalar.add("📚 Anime ro‘yxati")
+    tugmalar.add("⬅️ Orqaga")
+
+    await message.answer("🔐 Admin panelga xush kelibsiz!", reply_markup=tugmalar)
+
+# ➕ Anime yuklash bosqichi
+@dp.message_handler(lambda msg: msg.text == "➕ Anime yuklash", is_admin=True)
+async def anime_yuklash_boshlash(message: types.Message, state: FSMContext):
+    await state.set_state("anime_nom")
+    await message.answer("📥 Yuklanadigan animening nomini kiriting:")
+
+@dp.message_handler(state="anime_nom", is_admin=True)
+async def anime_nom_qabul(message: types.Message, state: FSMContext):
+    await state.update_data(anime_nom=message.text)
+    await state.set_state("anime_kod")
+    await message.answer("🔑 Anime uchun kod kiriting (masalan: naruto_uz):")
+
+@dp.message_handler(state="anime_kod", is_admin=True)
+async def anime_kod_qabul(message: types.Message, state: FSMContext):
+    await state.update_data(anime_kod=message.text)
+    await state.set_state("anime_seriyalar")
+    await message.answer("🎬 Nechta qism yuklamoqchisiz?")
+
+@dp.message_handler(state="anime_seriyalar", is_admin=True)
+async def anime_seriyalar_qabul(message: types.Message, state: FSMContext):
+    await state.update_data(anime_seriyalar=message.text)
+    await state.set_state("anime_kanal")
+    await message.answer("📡 Qaysi Telegram kanaliga yuklansin? Kanal @username kiriting:")
+
+@dp.message_handler(state="anime_kanal", is_admin=True)
+async def anime_kanal_qabul(message: types.Message, state: FSMContext):
+    await state.update_data(anime_kanal=message.text)
+    await state.set_state("anime_github")
+    await message.answer("💾 GitHub manzilini kiriting (masalan: https://github.com/user/repo):")
+
+@dp.message_handler(state="anime_github", is_admin=True)
+async def anime_github_qabul(message: types.Message, state: FSMContext):
+    malumot = await state.get_data()
+    # JSON yoki DB ga saqlash logikasi shu yerda bo‘ladi
+    await state.finish()
+    await message.answer(
+        f"✅ Anime muvaffaqiyatli yuklandi!\n\n"
+        f"📌 Nomi: {malumot['anime_nom']}\n"
+        f"🔑 Kodi: {malumot['anime_kod']}\n"
+        f"🎬 Qismlar soni: {malumot['anime_seriyalar']}\n"
+        f"📡 Kanal: {malumot['anime_kanal']}\n"
+        f"💾 GitHub: {malumot['anime_github']}"
+	)
+
+
+# ================================
+# 4- va 5-part: Admin panel
+# ================================
+
+# ✏️ Anime tahrirlash menyusi
+@dp.message_handler(lambda msg: msg.text == "✏️ Anime tahrirlash", is_admin=True)
+async def anime_tahrirlash_boshlash(message: types.Message, state: FSMContext):
+    # Bu yerda mavjud animelarni DB yoki JSON’dan olish kerak
+    animelar = ["Naruto", "One Piece", "Attack on Titan"]  # vaqtincha misol
+    tugmalar = ReplyKeyboardMarkup(resize_keyboard=True)
+    for anime in animelar:
+        tugmalar.add(anime)
+    tugmalar.add("⬅️ Orqaga")
+    await state.set_state("tahrirlash_tanlash")
+    await message.answer("✏️ Qaysi animeni tahrirlashni xohlaysiz?", reply_markup=tugmalar)
+
+# Anime tanlash
+@dp.message_handler(state="tahrirlash_tanlash", is_admin=True)
+async def anime_tanlandi(message: types.Message, state: FSMContext):
+    if message.text == "⬅️ Orqaga":
+        await state.finish()
+        await admin_panel(message)
+        return
+    await state.update_data(tahrir_anime=message.text)
+
+    tugmalar = ReplyKeyboardMarkup(resize_keyboard=True)
+    tugmalar.add("📌 Nomini o‘zgartirish")
+    tugmalar.add("🔑 Kodini o‘zgartirish")
+    tugmalar.add("🎬 Qismlar sonini o‘zgartirish")
+    tugmalar.add("📡 Kanalni o‘zgartirish")
+    tugmalar.add("💾 GitHub manzilini o‘zgartirish")
+    tugmalar.add("🗑 O‘chirish")
+    tugmalar.add("➕ Davom ettirish")
+    tugmalar.add("⬅️ Orqaga")
+
+    await state.set_state("tahrirlash_amali")
+    await message.answer(f"🔧 {message.text} uchun amal tanlang:", reply_markup=tugmalar)
+
+# 📌 Nomini o‘zgartirish
+@dp.message_handler(lambda msg: msg.text == "📌 Nomini o‘zgartirish", state="tahrirlash_amali", is_admin=True)
+async def tahrir_nomi(message: types.Message, state: FSMContext):
+    await state.set_state("yangi_nomi")
+    await message.answer("✍️ Yangi nom kiriting:")
+
+@dp.message_handler(state="yangi_nomi", is_admin=True)
+async def yangi_nom_qabul(message: types.Message, state: FSMContext):
+    malumot = await state.get_data()
+    eski_nom = malumot['tahrir_anime']
+    yangi_nom = message.text
+    # DB da yangilash logikasi shu yerda
+    await state.finish()
+    await message.answer(f"✅ {eski_nom} nomi {yangi_nom} ga o‘zgartirildi!")
+
+# 🔑 Kodini o‘zgartirish
+@dp.message_handler(lambda msg: msg.text == "🔑 Kodini o‘zgartirish", state="tahrirlash_amali", is_admin=True)
+async def tahrir_kodi(message: types.Message, state: FSMContext):
+    await state.set_state("yangi_kod")
+    await message.answer("✍️ Yangi kod kiriting:")
+
+@dp.message_handler(state="yangi_kod", is_admin=True)
+async def yangi_kod_qabul(message: types.Message, state: FSMContext):
+    malumot = await state.get_data()
+    await state.finish()
+    await message.answer(f"✅ {malumot['tahrir_anime']} kodi {message.text} ga o‘zgartirildi!")
+
+# 🎬 Qismlar sonini o‘zgartirish
+@dp.message_handler(lambda msg: msg.text == "🎬 Qismlar sonini o‘zgartirish", state="tahrirlash_amali", is_admin=True)
+async def qismlar_ozgartirish(message: types.Message, state: FSMContext):
+    await state.set_state("yangi_qismlar")
+    await message.answer("🎬 Yangi qismlar sonini kiriting:")
+
+@dp.message_handler(state="yangi_qismlar", is_admin=True)
+async def yangi_qismlar_qabul(message: types.Message, state: FSMContext):
+    malumot = await state.get_data()
+    await state.finish()
+    await message.answer(f"✅ {malumot['tahrir_anime']} uchun qismlar soni {message.text} qilib o‘zgartirildi!")
+
+# 📡 Kanalni o‘zgartirish
+@dp.message_handler(lambda msg: msg.text == "📡 Kanalni o‘zgartirish", state="tahrirlash_amali", is_admin=True)
+async def kanal_ozgartirish(message: types.Message, state: FSMContext):
+    await state.set_state("yangi_kanal")
+    await message.answer("📡 Yangi kanal linkini kiriting:")
+
+@dp.message_handler(state="yangi_kanal", is_admin=True)
+async def yangi_kanal_qabul(message: types.Message, state: FSMContext):
+    malumot = await state.get_data()
+    await state.finish()
+    await message.answer(f"✅ {malumot['tahrir_anime']} kanali {message.text} qilib o‘zgartirildi!")
+
+# 💾 GitHub manzilini o‘zgartirish
+@dp.message_handler(lambda msg: msg.text == "💾 GitHub manzilini o‘zgartirish", state="tahrirlash_amali", is_admin=True)
+async def github_ozgartirish(message: types.Message, state: FSMContext):
+    await state.set_state("yangi_github")
+    await message.answer("💾 Yangi GitHub manzilini yuboring:")
+
+@dp.message_handler(state="yangi_github", is_admin=True)
+async def yangi_github_qabul(message: types.Message, state: FSMContext):
+    malumot = await state.get_data()
+    await state.finish()
+    await message.answer(f"✅ {malumot['tahrir_anime']} uchun GitHub manzili yangilandi: {message.text}")
+
+# 🗑 O‘chirish
+@dp.message_handler(lambda msg: msg.text == "🗑 O‘chirish", state="tahrirlash_amali", is_admin=True)
+async def anime_ochirish(message: types.Message, state: FSMContext):
+    malumot = await state.get_data()
+    anime = malumot['tahrir_anime']
+    # DB yoki JSON dan o‘chirish logikasi
+    await state.finish()
+    await message.answer(f"❌ {anime} muvaffaqiyatli o‘chirildi!")
+
+# ➕ Davom ettirish (yangi qismlar qo‘shish)
+@dp.message_handler(lambda msg: msg.text == "➕ Davom ettirish", state="tahrirlash_amali", is_admin=True)
+async def anime_davom(message: types.Message, state: FSMContext):
+    await state.set_state("davom_qismlar")
+    await message.answer("📥 Nechta yangi qism qo‘shmoqchisiz?")
+
+@dp.message_handler(state="davom_qismlar", is_admin=True)
+async def anime_davom_qabul(message: types.Message, state: FSMContext):
+    malumot = await state.get_data()
+    anime = malumot['tahrir_anime']
+    yangi_qismlar = message.text
+    # DB ga yangi qismlar qo‘shiladi
+    await state.finish()
+    await message.answer(f"✅ {anime} uchun {yangi_qismlar} ta yangi qism qo‘shildi!")
+
+# ======================
+# 📊 STATISTIKA
+# ======================
+@dp.message_handler(lambda msg: msg.text == "📊 Statistika", is_admin=True)
+async def statistika_menu(message: types.Message, state: FSMContext):
+    tugmalar = ReplyKeyboardMarkup(resize_keyboard=True)
+    tugmalar.add("📅 Kunlik", "📆 Haftalik", "🗓 Oylik")
+    tugmalar.add("⬅️ Orqaga")
+    await state.set_state("statistika_turi")
+    await message.answer("📊 Qaysi statistikani ko‘rishni xohlaysiz?", reply_markup=tugmalar)
+
+@dp.message_handler(state="statistika_turi", is_admin=True)
+async def statistika_korish(message: types.Message, state: FSMContext):
+    if message.text == "⬅️ Orqaga":
+        await state.finish()
+        await admin_panel(message)
+        return
+
+    turi = message.text
+    # daily_stats/daily_users dagi tayyor kunlik qatorlardan
+    if turi == "📅 Kunlik":
+        period, title = 'day', "📅 Bugun"
+    elif turi == "📆 Haftalik":
+        period, title = 'week', "📆 Oxirgi 7 kun"
+    else:
+        period, title = 'month', "🗓 Bu oy"
+    if not event_log.enabled:
+        await state.finish()
+        await message.answer(stats.UNAVAILABLE)
+        return
+    result = stats.format_summary(title, await stats.summary(dp.get('pool'), period))
+
+    await state.finish()
+    await message.answer(result, parse_mode="HTML")
+
+# ======================
+# 📝 POST YARATISH
+# ======================
+@dp.message_handler(lambda msg: msg.text == "📝 Post yaratish", is_admin=True)
+async def post_yaratish_boshlash(message: types.Message, state: FSMContext):
+    await state.set_state("post_rasm")
+    await message.answer("🖼 Post uchun rasm yuboring:")
+
+@dp.message_handler(content_types=["photo"], state="post_rasm", is_admin=True)
+async def post_rasm_qabul(message: types.Message, state: FSMContext):
+    rasm_id = message.photo[-1].file_id
+    await state.update_data(post_rasm=rasm_id)
+    await state.set_state("post_text")
+    await message.answer("✍️ Post matnini kiriting:")
+
+@dp.message_handler(state="post_text", is_admin=True)
+async def post_text_qabul(message: types.Message, state: FSMContext):
+    await state.update_data(post_text=message.text)
+    await state.set_state("post_kod")
+    await message.answer("🔑 Post uchun anime kodini kiriting:")
+
+async def send_post(chat_id, rasm: str, kod, **kwargs):
+    # suv belgisi (anime kanali) va kod/deep-link rasmga chiziladi; qayta nashrda tayyor file_id
+    try:
+        return await post_renderer.send_photo(bot, dp.get('pool'), chat_id, rasm, kod,
+                                              watermark=settings.anime_kanal, **kwargs)
+    except RenderError as e:
+        # post hali yuborilmagan: suv belgisisiz asl rasm
+        logger.exception("post render error: %s", e)
+        return await bot.send_photo(chat_id=chat_id, photo=rasm, **kwargs)
+
+@dp.message_handler(state="post_kod", is_admin=True)
+async def post_kod_qabul(message: types.Message, state: FSMContext):
+    malumot = await state.get_data()
+    rasm = malumot['post_rasm']
+    matn = malumot['post_text']
+    kod = message.text
+
+    caption = f"{matn}\n\n🔑 Kod: {kod}\n\n📺 Ko‘rish uchun botdan foydalaning!"
+
+    await send_post(message.chat.id, rasm, kod, caption=caption)
+    await state.finish()
+    await message.answer("✅ Post tayyorlandi va yuborildi!")
+
+
+# =======================
+# ADMIN PANEL - STATISTIKA VA POST YARATISH
+# =======================
+
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardMarkup, KeyboardButton, InputFile
+
+# --- Admin menyusi tugmalari ---
+admin_menu = ReplyKeyboardMarkup(resize_keyboard=True)
+admin_menu.add(
+    KeyboardButton("➕ Anime yuklash"),
+    KeyboardButton("✏️ Anime o‘zgartirish"),
+)
+admin_menu.add(
+    KeyboardButton("📊 Statistika"),
+    KeyboardButton("📝 Post yaratish"),
+)
+admin_menu.add(
+    KeyboardButton("📢 Habar tarqatish"),
+    KeyboardButton("⚙️ Sozlamalar"),
+)
+admin_menu.add(
+    KeyboardButton("📂 Anime ro‘yxati"),
+    KeyboardButton("🔙 Ortga"),
+)
+
+
+# --- Statistika tugmalari ---
+statistika_menu = ReplyKeyboardMarkup(resize_keyboard=True)
+statistika_menu.add(
+    KeyboardButton("📈 Kunlik"),
+    KeyboardButton("📉 Haftalik"),
+    KeyboardButton("📊 Oylik")
+)
+statistika_menu.add(KeyboardButton("🔙 Ortga"))
+
+
+# --- Post yaratish states ---
+class PostYaratish(StatesGroup):
+    rasm = State()
+    matn = State()
+    kodi = State()
+    tasdiqlash = State()
+
+
+# --- Statistika handler ---
+@dp.message_handler(lambda msg: msg.text == "📊 Statistika", state="*")
+async def admin_statistika_menu(message: types.Message):
+    await message.answer("📊 Qaysi statistikani ko‘rishni xohlaysiz?", reply_markup=statistika_menu)
+
+
+@dp.message_handler(lambda msg: msg.text in ["📈 Kunlik", "📉 Haftalik", "📊 Oylik"], state="*")
+async def admin_statistika(message: types.Message):
+    tanlov = message.text
+    period = {"📈 Kunlik": 'day', "📉 Haftalik": 'week'}.get(tanlov, 'month')
+    if not event_log.enabled:
+        await message.answer(stats.UNAVAILABLE); return
+
+    try:
+        summary = await stats.summary(dp.get('pool'), period)
+    except Exception as e:
+        logger.exception("stats summary error: %s", e)
+        await message.answer("❌ Statistikani olishda xatolik."); return
+
+    await message.answer(stats.format_summary(f"{tanlov} statistikasi", summary), parse_mode="HTML")
+
+
+# --- Post yaratish jarayoni ---
+@dp.message_handler(lambda msg: msg.text == "📝 Post yaratish", state="*")
+async def admin_post_start(message: types.Message, state: FSMContext):
+    await message.answer("🖼 Iltimos, post uchun rasm yuboring", reply_markup=ReplyKeyboardRemove())
+    await PostYaratish.rasm.set()
+
+
+@dp.message_handler(content_types=["photo"], state=PostYaratish.rasm)
+async def admin_post_rasm(message: types.Message, state: FSMContext):
+    photo_id = message.photo[-1].file_id
+    await state.update_data(rasm=photo_id)
+    await message.answer("✍️ Endi post uchun matn yozing:")
+    await PostYaratish.matn.set()
+
+
+@dp.message_handler(state=PostYaratish.matn)
+async def admin_post_matn(message: types.Message, state: FSMContext):
+    await state.update_data(matn=message.text)
+    await message.answer("🔢 Anime kodi kiriting:")
+    await PostYaratish.kodi.set()
+
+
+@dp.message_handler(state=PostYaratish.kodi)
+async def admin_post_kod(message: types.Message, state: FSMContext):
+    await state.update_data(kodi=message.text)
+
+    data = await state.get_data()
+    rasm = data.get("rasm")
+    matn = data.get("matn")
+    kodi = data.get("kodi")
+
+    # Tasdiqlash tugmalari
+    tasdiq_kb = InlineKeyboardMarkup(row_width=2)
+    tasdiq_kb.add(
+        InlineKeyboardButton("✅ Tasdiqlash", callback_data="post_tasdiq"),
+        InlineKeyboardButton("❌ Bekor qilish", callback_data="post_bekor")
+    )
+
+    # ko'rib chiqish uchun render; tasdiqlanganda shu natija file_id si qayta ishlatiladi
+    await send_post(
+        message.chat.id, rasm, kodi,
+        caption=f"📝 Post matni:\n\n{matn}\n\n📌 Anime kodi: {kodi}",
+        reply_markup=tasdiq_kb
+    )
+    await PostYaratish.tasdiqlash.set()
+
+
+@dp.callback_query_handler(lambda c: c.data in ["post_tasdiq", "post_bekor"], state=PostYaratish.tasdiqlash)
+async def admin_post_tasdiq(call: types.CallbackQuery, state: FSMContext):
+    if call.data == "post_tasdiq":
+        data = await state.get_data()
+        rasm = data.get("rasm")
+        matn = data.get("matn")
+        kodi = data.get("kodi")
+
+        caption = f"{matn}\n\n🔖 Anime kodi: <b>{kodi}</b>\n\n© AnimeBot"
+        await send_post(call.message.chat.id, rasm, kodi, caption=caption, parse_mode="HTML")
+
+        await call.message.answer("✅ Post muvaffaqiyatli yaratildi!", reply_markup=admin_menu)
+    else:
+        await call.message.answer("❌ Post yaratish bekor qilindi", reply_markup=admin_menu)
+
+    await state.finish()
+    await call.answer()
+
+# =======================
+# ADMIN PANEL - HABAR TARQATISH VA SOZLAMALAR
+# =======================
+
+from aiogram.dispatcher.filters import Text
+
+# --- Habar tarqatish state ---
+class HabarTarqatish(StatesGroup):
+    matn = State()
+    tasdiqlash = State()
+
+
+# --- Admin menyusida tanlov ---
+@dp.message_handler(Text(equals="📢 Habar tarqatish"), state="*")
+async def admin_habar_tarqatish_start(message: types.Message, state: FSMContext):
+    await message.answer("📢 Foydalanuvchilarga yuboriladigan habar matnini yozing:", reply_markup=ReplyKeyboardRemove())
+    await HabarTarqatish.matn.set()
+
+
+# --- Matnni qabul qilish ---
+@dp.message_handler(state=HabarTarqatish.matn)
+async def admin_habar_tarqatish_matn(message: types.Message, state: FSMContext):
+    await state.update_data(matn=message.text)
+
+    # Tasdiqlash tugmalari
+    tasdiq_kb = InlineKeyboardMarkup(row_width=2)
+    tasdiq_kb.add(
+        InlineKeyboardButton("✅ Tarqatish", callback_data="tarqatish_tasdiq"),
+        InlineKeyboardButton("❌ Bekor qilish", callback_data="tarqatish_bekor")
+    )
+
+    await message.answer(
+        f"📢 Siz yubormoqchisiz:\n\n{message.text}\n\nTasdiqlaysizmi?",
+        reply_markup=tasdiq_kb
+    )
+    await HabarTarqatish.tasdiqlash.set()
+
+
+# --- Tasdiqlash yoki bekor qilish ---
+@dp.callback_query_handler(lambda c: c.data in ["tarqatish_tasdiq", "tarqatish_bekor"], state=HabarTarqatish.tasdiqlash)
+async def admin_habar_tarqatish_tasdiq(call: types.CallbackQuery, state: FSMContext):
+    if call.data == "tarqatish_tasdiq":
+        data = await state.get_data()
+        matn = data.get("matn")
+
+        users = await db.fetch("SELECT id FROM foydalanuvchilar")
+        muvaffaqiyatli = 0
+        xatolik = 0
+
+        for user in users:
+            try:
+                await bot.send_message(chat_id=user["id"], text=matn)
+                muvaffaqiyatli += 1
+                await asyncio.sleep(0.05)  # flood limitdan saqlanish
+            except:
+                xatolik += 1
+
+        await call.message.answer(
+            f"✅ Tarqatish yakunlandi!\n\n"
+            f"📨 Yuborildi: {muvaffaqiyatli}\n"
+            f"❌ Xato: {xatolik}",
+            reply_markup=admin_menu
+        )
+    else:
+        await call.message.answer("❌ Tarqatish bekor qilindi", reply_markup=admin_menu)
+
+    await state.finish()
+    await call.answer()
+
+
+# =======================
+# ADMIN PANEL - SOZLAMALAR
+# =======================
+
+# Admin komandalarini sozlash: settings jadvalidagi 'toggles' kaliti
+# (avval sozlamalar.json edi, settings.py import qiladi). Masalan:
+# {
+#   "anime_yuklash": true,
+#   "anime_ozgartirish": true,
+#   "statistika": true,
+#   "post_yaratish": true,
+#   "habar_tarqatish": true,
+#   "sozlamalar": true,
+#   "anime_royxati": true
+# }
+
+async def sozlamalarni_olish():
+    # xotiradagi nusxa; fayl o'qilmaydi
+    return dict(settings.toggles)
+
+
+async def sozlamalarni_saqlash(data):
+    # barcha replikalarga NOTIFY orqali tarqaladi
+    await settings.set(dp.get('pool'), 'toggles', data)
+
+
+# --- Sozlamalar menyusi ---
+@dp.message_handler(Text(equals="⚙️ Sozlamalar"), state="*")
+async def admin_sozlamalar_menu(message: types.Message):
+    sozlamalar = await sozlamalarni_olish()
+    kb = InlineKeyboardMarkup(row_width=1)
+
+    for key, val in sozlamalar.items():
+        holat = "✅" if val else "❌"
+        kb.add(
+            InlineKeyboardButton(f"{holat} {key.replace('_',' ').capitalize()}", callback_data=f"sozlama_{key}")
+        )
+
+    await message.answer("⚙️ Sozlamalarni boshqarish:", reply_markup=kb)
+
+
+# --- Sozlamalarni yoqish/o‘chirish ---
+@dp.callback_query_handler(lambda c: c.data.startswith("sozlama_"))
+async def admin_sozlamalar_toggle(call: types.CallbackQuery):
+    sozlamalar = await sozlamalarni_olish()
+    key = call.data.replace("sozlama_", "")
+
+    if key in sozlamalar:
+        sozlamalar[key] = not sozlamalar[key]
+        await sozlamalarni_saqlash(sozlamalar)
+
+    kb = InlineKeyboardMarkup(row_width=1)
+    for k, v in sozlamalar.items():
+        holat = "✅" if v else "❌"
+        kb.add(
+            InlineKeyboardButton(f"{holat} {k.replace('_',' ').capitalize()}", callback_data=f"sozlama_{k}")
+        )
+
+    await call.message.edit_text("⚙️ Sozlamalarni boshqarish:", reply_markup=kb)
+    await call.answer("✅ O‘zgartirildi")
+
+
+# =======================
+# ORTGA QAYTISH
+# =======================
+
+@dp.message_handler(Text(equals="🔙 Ortga"), state="*")
+async def ortga_qaytish(message: types.Message, state: FSMContext):
+    await state.finish()
+    await message.answer("🏠 Bosh menyu", reply_markup=admin_menu if is_admin(message.from_user.id) else user_menu)
+
+# ===================== FOYDALANUVCHI MENU LOGIKASI =====================
+
+@dp.message_handler(lambda message: message.text == "🔎 Anime qidirish")
+async def qidirish_menu(message: types.Message):
+    tugma = ReplyKeyboardMarkup(resize_keyboard=True)
+    tugma.add("🔍 Kod orqali qidirish", "📖 Nomi orqali qidirish")
+    tugma.add("⬅️ Orqaga")
+    await message.answer("Anime qidirish usulini tanlang:", reply_markup=tugma)
+
+
+@dp.message_handler(lambda message: message.text == "🔍 Kod orqali qidirish")
+async def qidirish_kod(message: types.Message):
+    await message.answer("Anime kodini kiriting (masalan: ANM123):")
+    # bu yerda keyin foydalanuvchi kiritgan kodni DB dan qidiramiz
+
+
+@dp.message_handler(lambda message: message.text == "📖 Nomi orqali qidirish")
+async def qidirish_nomi(message: types.Message):
+    await message.answer("Anime nomini kiriting:")
+    # bu yerda nom bilan qidiramiz
+
+
+@dp.message_handler(lambda message: message.text == "📨 Admin bilan aloqa")
+async def admin_bilan(message: types.Message):
+    await message.answer("Admin uchun xabaringizni yozing. Yuborishdan oldin tasdiqlash olinadi.")
+    # bu yerda foydalanuvchi yozadi -> tasdiq tugmalari chiqadi
+
+
+@dp.message_handler(lambda message: message.text == "🧪 Hamkorlik testi")
+async def hamkorlik_testi(message: types.Message):
+    await message.answer("Hamkorlik testi uchun mavzu yozing:")
+    # keyin tasdiqlash va admin ga yuboriladi
+
+
+# ===================== ADMIN MENU LOGIKASI =====================
+
+@dp.message_handler(lambda message: message.text == "➕ Anime yuklash")
+async def yuklash_boshlash(message: types.Message):
+    await message.answer("Anime nomini yuboring:")
+    # bu bosqichma-bosqich nom, kod, seriyalar va h.k. olinadi
+
+
+@dp.message_handler(lambda message: message.text == "✏️ Anime tahrirlash")
+async def tahrirlash_boshlash(message: types.Message):
+    await message.answer("Qaysi animeni tahrirlashni xohlaysiz? Kodini kiriting:")
+    # bu yerda admin animeni tanlaydi va o‘zgartiradi
+
+
+@dp.message_handler(lambda message: message.text == "📊 Statistika")
+async def statistika(message: types.Message):
+    tugma = ReplyKeyboardMarkup(resize_keyboard=True)
+    tugma.add("📅 Kunlik", "📆 Haftalik", "🗓 Oylik")
+    tugma.add("⬅️ Orqaga")
+    await message.answer("Statistika turini tanlang:", reply_markup=tugma)
+
+
+@dp.message_handler(lambda message: message.text == "📝 Post yaratish")
+async def post_yaratish(message: types.Message):
+    await message.answer("Post uchun rasm yuboring:")
+    # keyin rasm + matn + kod + suv belgisi qo‘shiladi
+
+
+@dp.message_handler(lambda message: message.text == "📢 Xabar tarqatish")
+async def xabar_tarqatish(message: types.Message):
+    await message.answer("Tarqatmoqchi bo‘lgan xabaringizni yuboring:")
+    # barcha foydalanuvchilarga broadcast qilinadi
+
+
+@dp.message_handler(lambda message: message.text == "⚙️ Sozlamalar")
+async def sozlamalar(message: types.Message):
+    await message.answer("Sozlamalar menyusi: (bu yerda admin komandalarni boshqaradi)")
+    # bu yerda ON/OFF qilinadigan komandalar chiqadi
+
+
+@dp.message_handler(lambda message: message.text == "📂 Anime ro‘yxati")
+async def anime_royxati(message: types.Message):
+    await message.answer("Barcha animelar ro‘yxati kodi bilan chiqariladi:")
+    # DB dan olish va tartiblab chiqarish
+
+
+# ===================== ASOSIY START VA MAIN =====================
+
+@dp.message_handler(commands=["start"])
+async def start_handler(message: types.Message):
+    user_id = message.from_user.id
+    # bu yerda foydalanuvchini DB ga qo‘shamiz agar yo‘q bo‘lsa
+    if is_admin(user_id):
+        await message.answer("Admin panelga xush kelibsiz!", reply_markup=admin_menu)
+    else:
+        await message.answer("Anime botga xush kelibsiz!", reply_markup=user_menu)
+
+
+# --- Umumiy (catch-all) handlerlar eng oxirida ---
+dp.register_callback_query_handler(cb_all)
+dp.register_message_handler(msg_all)
+
+
+def run():
+    """python main.py: on_startup/on_shutdown yuqorida - pool, jadvallar va fon vazifalari; har bot o'z polling ida."""
+    tenancy.run(dp, on_startup=on_startup, on_shutdown=on_shutdown)
@@ -0,0 +1,139 @@
+"""
+Handler kechikishi: PostgreSQL (asyncpg) va SQLite (aiosqlite, WAL) backendlari.
+
+    python -m bench.backends [--backend both|postgres|sqlite] [--animes 5000] [--users 100000]
+                             [--repeat 500] [--concurrency 32]
+
+Har bir "handler" app.py dagi mos handler qiladigan database.* chaqiruvlari.
+PostgreSQL: .env dagi bazada vaqtinchalik `bench_backends` sxemasi; SQLite: vaqtinchalik fayl.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+import asyncpg
+
+import database
+import sqlite_backend
+from bench.counters import report, timed
+
+SCHEMA = "bench_backends"
+
+
+async def seed(pool, animes: int, users: int, episodes: int = 12):
+    async with pool.acquire() as conn:
+        await conn.executemany(
+            "INSERT INTO animelar (nom, rams, qismi, davlat, tili, yili, janri, qidiruv, sana) "
+            "VALUES ($1, 'P', $2, 'JP', 'uz', '2020', 'Drama', 0, '')",
+            [(f"Anime {i}", str(episodes)) for i in range(1, animes + 1)])
+        await conn.executemany(
+            "INSERT INTO anime_datas (id, file_id, qism, sana) VALUES ($1, $2, $3, '')",
+            [(str(a), f"f{a}_{e}", str(e)) for a in range(1, animes + 1) for e in range(1, episodes + 1)])
+        await conn.executemany(
+            "INSERT INTO user_id (user_id, status, sana) VALUES ($1, 'Oddiy', '01.01.2025')",
+            [(str(u),) for u in range(1, users + 1)])
+        await conn.executemany(
+            "INSERT INTO kabinet (user_id, pul, pul2, odam, ban) VALUES ($1, '1000000000', '0', '0', 'unban')",
+            [(str(u),) for u in range(1, users + 1)])
+
+
+def handlers(pool, animes: int, users: int):
+    rnd = random.Random(0)
+
+    async def start():
+        await database.ensure_user(pool, rnd.randint(1, users))
+
+    async def search():
+        await database.search_animes_by_name(pool, f"anime {rnd.randint(1, 999)}")
+
+    async def show_anime():
+        aid = rnd.randint(1, animes)
+        await database.get_anime_by_id(pool, aid)
+        async with pool.acquire() as conn:
+            await conn.execute("UPDATE animelar SET qidiruv = qidiruv + 1 WHERE id = $1", aid)
+
+    async def episode():
+        aid = rnd.randint(1, animes)
+        await database.get_episode(pool, aid, rnd.randint(1, 12))
+        await database.get_anime_by_id(pool, aid)
+        await database.get_episode_numbers(pool, aid)
+
+    async def balance():
+        await database.get_balance(pool, rnd.randint(1, users))
+
+    async def buy_vip():
+        await database.buy_vip(pool, rnd.randint(1, users), 30, 100)
+
+    return {"start": start, "search": search, "show_anime": show_anime,
+            "episode": episode, "balance": balance, "buy_vip": buy_vip}
+
+
+async def throughput(fns: list, total: int, concurrency: int) -> float:
+    queue = list(range(total))
+
+    async def worker(rnd):
+        while queue:
+            queue.pop()
+            await rnd.choice(fns)()
+
+    t = time.perf_counter()
+    await asyncio.gather(*(worker(random.Random(i)) for i in range(concurrency)))
+    return total / (time.perf_counter() - t)
+
+
+async def run(name: str, pool, args):
+    await database.init_tables(pool)
+    t = time.perf_counter()
+    await seed(pool, args.animes, args.users)
+    print(f"\n[{name}] seeded {args.animes:,} animes / {args.users:,} users in {time.perf_counter() - t:.1f}s")
+    fns = handlers(pool, args.animes, args.users)
+    for label, fn in fns.items():
+        report(f"{name}: {label}", await timed(fn, args.repeat))
+    ops = await throughput(list(fns.values()), args.repeat * len(fns), args.concurrency)
+    print(f"{name}: mixed x{args.concurrency:<3}        {ops:9.0f} handlers/s")
+
+
+async def bench_postgres(args):
+    admin = await asyncpg.connect(host=database.DB_HOST, user=database.DB_USER,
+                                  password=database.DB_PASS, database=database.DB_NAME)
+    await admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+    pool = await asyncpg.create_pool(host=database.DB_HOST, user=database.DB_USER,
+                                     password=database.DB_PASS, database=database.DB_NAME,
+                                     server_settings={'search_path': SCHEMA})
+    try:
+        await run("postgres", pool, args)
+    finally:
+        await pool.close()
+        await admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await admin.close()
+
+
+async def bench_sqlite(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = await sqlite_backend.create_pool(os.path.join(tmp, "bench.db"), readers=args.readers)
+        try:
+            await run("sqlite", pool, args)
+        finally:
+            await pool.close()
+
+
+async def main(args):
+    if args.backend in ("both", "postgres"):
+        await bench_postgres(args)
+    database.episodes_changed()
+    if args.backend in ("both", "sqlite"):
+        await bench_sqlite(args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["both", "postgres", "sqlite"], default="both")
+    parser.add_argument("--animes", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--readers", type=int, default=database.DB_SQLITE_READERS)
+    asyncio.run(main(parser.parse_args()))
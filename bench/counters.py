@@ -0,0 +1,90 @@
+"""
+bot_status hisoblagichlari: COUNT(*) va counters jadvali solishtirmasi.
+
+    python -m bench.counters [--users 1000000] [--repeat 50]
+
+.env dagi bazada vaqtinchalik `bench_counters` sxemasini yaratadi va oxirida o'chiradi.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import asyncpg
+
+import database
+
+SCHEMA = "bench_counters"
+
+
+async def timed(fn, repeat: int) -> list:
+    out = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        await fn()
+        out.append((time.perf_counter() - t) * 1000)
+    return out
+
+
+def report(name: str, samples: list):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<28} p50 {statistics.median(samples):9.3f} ms   p95 {p95:9.3f} ms")
+
+
+async def main(users: int, repeat: int):
+    admin = await asyncpg.connect(host=database.DB_HOST, user=database.DB_USER,
+                                  password=database.DB_PASS, database=database.DB_NAME)
+    await admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+    pool = await asyncpg.create_pool(host=database.DB_HOST, user=database.DB_USER,
+                                     password=database.DB_PASS, database=database.DB_NAME,
+                                     server_settings={'search_path': SCHEMA})
+    try:
+        await database.init_tables(pool)
+        async with pool.acquire() as conn:
+            t = time.perf_counter()
+            # bitta INSERT: statement-level trigger bir marta ishlaydi
+            await conn.execute("""
+            INSERT INTO user_id (user_id, status, sana)
+            SELECT g::text, 'Oddiy', '01.01.2025' FROM generate_series(1, $1) g
+            """, users)
+            print(f"seeded {users:,} users in {time.perf_counter() - t:.1f}s")
+            await conn.execute("INSERT INTO animelar (nom, rams, qismi, davlat, tili, yili, janri, qidiruv, sana) "
+                               "SELECT 'a' || g, 'P', '12', 'JP', 'uz', '2020', 'Drama', 0, '' "
+                               "FROM generate_series(1, 5000) g")
+            await conn.execute("INSERT INTO anime_datas (id, file_id, qism, sana) "
+                               "SELECT (g % 5000 + 1)::text, 'f' || g, (g / 5000 + 1)::text, '' "
+                               "FROM generate_series(0, 99999) g")
+            await conn.execute("VACUUM ANALYZE user_id")
+
+            async def before():
+                async with pool.acquire() as c:
+                    await c.fetchval("SELECT COUNT(*) FROM user_id")
+                    await c.fetchval("SELECT COUNT(*) FROM animelar")
+                    await c.fetchval("SELECT COUNT(*) FROM anime_datas")
+
+            async def counters_table():
+                database._counters_cache.clear()
+                await database.get_counters(pool)
+
+            async def counters_cached():
+                await database.get_counters(pool)
+
+            counted = await database.get_counters(pool)
+            assert counted['user_id'] == users, counted
+
+            report("before: 3x COUNT(*)", await timed(before, repeat))
+            report("after: counters table", await timed(counters_table, repeat))
+            report("after: counters + TTL cache", await timed(counters_cached, repeat))
+    finally:
+        await pool.close()
+        await admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await admin.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.repeat))
@@ -0,0 +1,279 @@
+"""
+Yuklama testlari uchun soxta Telegram Bot API serveri (aiohttp).
+
+    python -m bench.fake_telegram [--port 8081] [--latency 0.03] [--jitter 0.02]
+                                  [--error-rate 0.01] [--retry-after-rate 0.01] [--retry-after 2]
+
+Botni unga ulash: TELEGRAM_API_URL=http://127.0.0.1:8081 python main.py
+
+Bot metodlari: getMe, getUpdates, setWebhook, deleteWebhook, sendMessage, sendVideo,
+sendPhoto, editMessageText, deleteMessage, answerCallbackQuery, copyMessage, getChatMember.
+Sekin javob (latency/jitter), xato (400) va 429 (RetryAfter) ehtimollik bilan beriladi.
+
+Boshqaruv (bench.loadgen uchun):
+    POST /_inject                       update (yoki ro'yxat); update_id server qo'yadi
+    GET  /_wait?chat_id=&after=&methods=&timeout=   botning shu chatga keyingi chaqiruvi
+    GET  /_stats                        metodlar bo'yicha hisob
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import Counter, defaultdict
+
+from aiohttp import ClientSession, web
+
+BOT_USER = {"id": 100000001, "is_bot": True, "first_name": "Fake", "username": "fake_anime_bot"}
+
+# xato va 429 faqat shu metodlarda (polling o'zi to'xtab qolmasin)
+FAULTY = {"sendMessage", "sendVideo", "sendPhoto", "editMessageText", "deleteMessage",
+          "answerCallbackQuery", "copyMessage"}
+
+
+class FakeTelegram:
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 retry_after_rate: float = 0.0, retry_after: int = 1, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.retry_after_rate = retry_after_rate
+        self.retry_after = retry_after
+        self.rnd = random.Random(seed)
+        self.updates = []
+        self._update_ids = itertools.count(1)
+        self._new_update = asyncio.Event()
+        self.webhook_url = None
+        self._message_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+        self._seq = itertools.count(1)
+        self._callback_chats = {}  # callback_query_id -> chat_id
+        self.outbox = defaultdict(list)  # chat_id -> [call]
+        self._outbox_changed = defaultdict(asyncio.Event)
+        self.calls = Counter()
+        self.injected_errors = Counter()
+        self.started = time.monotonic()
+
+    # --- boshqaruv ---
+    async def inject(self, update: dict) -> int:
+        update = dict(update, update_id=next(self._update_ids))
+        cq = update.get("callback_query")
+        if cq:
+            self._callback_chats[cq["id"]] = cq["message"]["chat"]["id"] if cq.get("message") else cq["from"]["id"]
+        if self.webhook_url:
+            asyncio.ensure_future(self._push(update))
+        else:
+            self.updates.append(update)
+            self._new_update.set()
+        return update["update_id"]
+
+    def release_polling(self):
+        # kutib turgan getUpdates darhol bo'sh javob qaytaradi (bot to'xtayotganda)
+        self._new_update.set()
+
+    async def _push(self, update: dict):
+        async with ClientSession() as session:
+            async with session.post(self.webhook_url, json=update) as resp:
+                await resp.read()
+
+    def _record(self, chat_id, method: str, params: dict, result):
+        if chat_id is None:
+            return
+        box = self.outbox[int(chat_id)]
+        box.append({"seq": next(self._seq), "method": method, "params": params,
+                    "result": result, "ts": time.time()})
+        if len(box) > 100:
+            del box[:-50]
+        self._outbox_changed[int(chat_id)].set()
+
+    async def wait(self, chat_id: int, after: int, methods: set, timeout: float):
+        deadline = time.monotonic() + timeout
+        while True:
+            for call in self.outbox[chat_id]:
+                if call["seq"] > after and (not methods or call["method"] in methods):
+                    return call
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return None
+            event = self._outbox_changed[chat_id]
+            event.clear()
+            try:
+                await asyncio.wait_for(event.wait(), timeout=left)
+            except asyncio.TimeoutError:
+                return None
+
+    # --- Bot API ---
+    def _message(self, chat_id, **fields) -> dict:
+        return dict({"message_id": next(self._message_ids), "date": int(time.time()),
+                     "chat": {"id": int(chat_id), "type": "private"}, "from": BOT_USER}, **fields)
+
+    def _file(self, value, kind: str) -> dict:
+        # yuklangan fayl bo'lsa yangi file_id, aks holda berilgan file_id qaytadi
+        file_id = value if isinstance(value, str) else f"fake-{kind}-{next(self._file_ids)}"
+        return {"file_id": file_id, "file_unique_id": file_id[-16:], "width": 1280, "height": 720}
+
+    async def call(self, method: str, params: dict):
+        if method == "getMe":
+            return BOT_USER
+        if method == "getUpdates":
+            return await self._get_updates(params)
+        if method == "setWebhook":
+            self.webhook_url = params.get("url") or None
+            return True
+        if method == "deleteWebhook":
+            self.webhook_url = None
+            return True
+        if method == "getWebhookInfo":
+            return {"url": self.webhook_url or "", "has_custom_certificate": False,
+                    "pending_update_count": len(self.updates)}
+
+        chat_id = params.get("chat_id")
+        caption = {"caption": params["caption"]} if params.get("caption") else {}
+        if method == "sendMessage":
+            result = self._message(chat_id, text=params.get("text", ""))
+        elif method == "sendPhoto":
+            result = self._message(chat_id, photo=[self._file(params.get("photo"), "photo")], **caption)
+        elif method == "sendVideo":
+            video = dict(self._file(params.get("video"), "video"), duration=1440)
+            result = self._message(chat_id, video=video, **caption)
+        elif method == "editMessageText":
+            if params.get("inline_message_id"):
+                result = True
+            else:
+                result = self._message(chat_id, text=params.get("text", ""),
+                                       edit_date=int(time.time()))
+                result["message_id"] = int(params.get("message_id", result["message_id"]))
+        elif method == "copyMessage":
+            result = {"message_id": next(self._message_ids)}
+        elif method == "answerCallbackQuery":
+            chat_id = self._callback_chats.pop(params.get("callback_query_id"), None)
+            result = True
+        elif method == "getChatMember":
+            result = {"user": {"id": int(params.get("user_id", 0)), "is_bot": False, "first_name": "U"},
+                      "status": "member"}
+            chat_id = None
+        else:
+            # deleteMessage va boshqalar
+            result = True
+        self._record(chat_id, method, params, result)
+        return result
+
+    async def _get_updates(self, params: dict):
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        timeout = float(params.get("timeout") or 0)
+        if offset < 0:
+            self.updates = self.updates[offset:]
+        elif offset:
+            self.updates = [u for u in self.updates if u["update_id"] >= offset]
+        if not self.updates and timeout:
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.updates[:limit]
+
+    # --- HTTP ---
+    async def handle_bot(self, request: web.Request):
+        method = request.match_info["method"]
+        params = dict(request.query)
+        if request.content_type == "application/json":
+            params.update(await request.json())
+        elif request.can_read_body:
+            for key, value in (await request.post()).items():
+                # yuklangan fayl: faqat hajmi saqlanadi (/_wait javobi JSON bo'lishi kerak)
+                params[key] = value if isinstance(value, str) else {"upload_bytes": len(value.file.read())}
+        self.calls[method] += 1
+
+        if method in FAULTY:
+            delay = max(0.0, self.latency + self.rnd.uniform(-self.jitter, self.jitter))
+            if delay:
+                await asyncio.sleep(delay)
+            roll = self.rnd.random()
+            if roll < self.retry_after_rate:
+                self.injected_errors["429"] += 1
+                return web.json_response({"ok": False, "error_code": 429,
+                                          "description": f"Too Many Requests: retry after {self.retry_after}",
+                                          "parameters": {"retry_after": self.retry_after}}, status=429)
+            if roll < self.retry_after_rate + self.error_rate:
+                self.injected_errors["400"] += 1
+                return web.json_response({"ok": False, "error_code": 400,
+                                          "description": "Bad Request: injected error"}, status=400)
+        return web.json_response({"ok": True, "result": await self.call(method, params)})
+
+    async def handle_inject(self, request: web.Request):
+        body = await request.json()
+        ids = [await self.inject(u) for u in (body if isinstance(body, list) else [body])]
+        return web.json_response({"ok": True, "update_ids": ids})
+
+    async def handle_wait(self, request: web.Request):
+        q = request.query
+        methods = set(filter(None, q.get("methods", "").split(",")))
+        chat_id = int(q["chat_id"])
+        call = await self.wait(chat_id, int(q.get("after", 0)), methods, float(q.get("timeout", 10)))
+        box = self.outbox[chat_id]
+        # last_seq: keyingi kutish shundan boshlanadi (shu qadamning qo'shimcha chaqiruvlari hisobga olinmaydi)
+        return web.json_response({"ok": call is not None, "call": call,
+                                  "last_seq": box[-1]["seq"] if box else 0})
+
+    async def handle_stats(self, request: web.Request):
+        return web.json_response(self.stats())
+
+    def stats(self) -> dict:
+        return {"uptime": round(time.monotonic() - self.started, 1), "calls": dict(self.calls),
+                "injected_errors": dict(self.injected_errors), "pending_updates": len(self.updates),
+                "webhook": self.webhook_url}
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_post("/_inject", self.handle_inject)
+        app.router.add_get("/_wait", self.handle_wait)
+        app.router.add_get("/_stats", self.handle_stats)
+        app.router.add_route("*", "/bot{token}/{method}", self.handle_bot)
+        return app
+
+
+async def start(server: FakeTelegram, host: str = "127.0.0.1", port: int = 8081) -> web.AppRunner:
+    runner = web.AppRunner(server.app(), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="har bir chaqiruvga o'rtacha kechikish, s")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="400 Bad Request ulushi")
+    parser.add_argument("--retry-after-rate", type=float, default=0.0, help="429 RetryAfter ulushi")
+    parser.add_argument("--retry-after", type=int, default=1)
+
+
+def from_args(args) -> FakeTelegram:
+    return FakeTelegram(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        retry_after_rate=args.retry_after_rate, retry_after=args.retry_after)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    async def main():
+        server = from_args(args)
+        runner = await start(server, args.host, args.port)
+        print(f"fake Bot API: http://{args.host}:{args.port}")
+        try:
+            while True:
+                await asyncio.sleep(30)
+                print(json.dumps(server.stats(), ensure_ascii=False))
+        finally:
+            await runner.cleanup()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
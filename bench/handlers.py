@@ -0,0 +1,370 @@
+"""
+Handler mikro-benchmarklari: app.py dagi handler korutinlari to'g'ridan-to'g'ri chaqiriladi.
+
+    python -m bench.handlers [--backend sqlite|postgres] [--sizes 100,1000,10000]
+                             [--repeat 200] [--only cb_yuklanolish,...]
+                             [--save] [--baseline FILE] [--threshold 0.25]
+
+Bot o'rniga RecordingBot: Bot API chaqiruvlari yoziladi va bench.fake_telegram
+javoblari qaytariladi (tarmoq yo'q). Update lar soxta types.Message / CallbackQuery.
+Baza har katalog hajmi uchun qaytadan to'ldiriladi (PostgreSQL: vaqtinchalik
+`bench_handlers` sxemasi, SQLite: vaqtinchalik fayl).
+
+Har bir handler uchun: p50/p95 vaqt, bir chaqiruvdagi SQL so'rovlar, Bot API
+chaqiruvlari, syscall lar (/proc/self/io syscr+syscw: fayl o'qish/yozish, soketlar
+hisobga kirmaydi) va ajratilgan xotira cho'qqisi (tracemalloc, alohida o'tishda).
+
+--save natijani baseline JSON ga yozadi. Aks holda baseline bilan solishtiriladi:
+so'rovlar soni oshsa yoki vaqt / syscall / xotira --threshold dan ko'p oshsa,
+chiqish kodi 1; baseline fayli bo'lmasa - 2. Baseline lar bench/baselines/ da
+repoga kiritiladi (vaqt ko'rsatkichlari mashinaga bog'liq: boshqa mashinada
+avval --save bilan yangilang). Bir mashinada ham CPU tezligi suzadi: har handler
+yonida qat'iy sof-Python ish (cpu_ms) o'lchanadi va vaqtlar shu nisbatga
+keltirilib solishtiriladi.
+"""
+import argparse
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA = "bench_handlers"
+USERS = 1000
+EPISODES = 30  # 25 tadan ko'p: pagenation "next" sahifasi bo'lsin
+QUERY_METHODS = ("execute", "executemany", "fetch", "fetchrow", "fetchval", "copy_records_to_table")
+
+# mutlaq shovqin chegarasi: bundan kichik farq regressiya hisoblanmaydi (p95 faqat hisobotda)
+NOISE = {"p50_ms": 0.05, "syscalls": 1.0, "alloc_kb": 2.0}
+# mashina tezligi o'lchovi uchun qat'iy sof-Python ish (cpu_ms)
+PROBE_DATA = [{"id": i, "nom": f"anime {i}", "qism": i % 24} for i in range(200)]
+
+_queries = 0
+_in_query = contextvars.ContextVar("in_query", default=False)
+
+
+def count_queries(cls):
+    """cls ning so'rov metodlarini o'rab, chaqiruvlarni sanaydi (ichma-ich chaqiruv bitta)."""
+    for name in QUERY_METHODS:
+        fn = getattr(cls, name, None)
+        if fn is None or getattr(fn, "_counted", False):
+            continue
+
+        @functools.wraps(fn)
+        async def wrapper(self, *args, __fn=fn, **kwargs):
+            global _queries
+            if _in_query.get():
+                return await __fn(self, *args, **kwargs)
+            _queries += 1
+            token = _in_query.set(True)
+            try:
+                return await __fn(self, *args, **kwargs)
+            finally:
+                _in_query.reset(token)
+
+        wrapper._counted = True
+        setattr(cls, name, wrapper)
+
+
+def io_syscalls():
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["syscr"]) + int(fields["syscw"])
+    except OSError:
+        return None
+
+
+def percentile(samples: list, p: float) -> float:
+    samples = sorted(samples)
+    return samples[max(0, int(len(samples) * p + 0.5) - 1)]
+
+
+def cpu_probe() -> float:
+    """Bir martalik qat'iy ish vaqti (ms): handler bilan bir xil sharoitda o'lchanadi."""
+    t = time.perf_counter()
+    sorted(json.loads(json.dumps(PROBE_DATA)), key=lambda d: (d["qism"], d["nom"]))
+    return (time.perf_counter() - t) * 1000
+
+
+def load_app():
+    """app.py ni import qiladi: step/ papkasi vaqtinchalik katalogda yaratiladi."""
+    os.environ.setdefault("BOT_TOKEN", "123456789:BENCH")
+    os.environ.pop("TELEGRAM_API_URL", None)
+    os.chdir(tempfile.mkdtemp(prefix="bench_handlers_"))
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    import app
+    return app
+
+
+def recording_bot(app):
+    from aiogram import Bot
+    from bench.fake_telegram import FakeTelegram
+
+    class RecordingBot(Bot):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.fake = FakeTelegram()
+            self.calls = []
+
+        async def request(self, method, data=None, files=None, **kwargs):
+            params = dict(data or {})
+            for key, value in (files or {}).items():
+                params[key] = {"upload": str(key)}
+            self.calls.append(method)
+            return await self.fake.call(method, params)
+
+    bot = RecordingBot(token=os.environ["BOT_TOKEN"])
+    # handlerlar `bot` globalini va types obyektlari Bot.get_current() ni ishlatadi
+    app.bot = bot
+    app.dp.bot = bot
+    Bot.set_current(bot)
+    return bot
+
+
+class Updates:
+    """Soxta update obyektlari (aiogram types)."""
+
+    def __init__(self):
+        self._ids = iter(range(1, 10 ** 9))
+
+    def user(self, uid: int) -> dict:
+        return {"id": uid, "is_bot": False, "first_name": f"u{uid}", "language_code": "uz"}
+
+    def message(self, uid: int, text: str):
+        from aiogram import types
+
+        return types.Message.to_object({
+            "message_id": next(self._ids), "date": int(time.time()), "from": self.user(uid),
+            "chat": {"id": uid, "type": "private", "first_name": f"u{uid}"}, "text": text,
+            **({"entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]}
+               if text.startswith("/") else {})})
+
+    def callback(self, uid: int, data: str):
+        from aiogram import types
+
+        message = {"message_id": next(self._ids), "date": int(time.time()),
+                   "chat": {"id": uid, "type": "private"}, "text": "..."}
+        return types.CallbackQuery.to_object({"id": str(next(self._ids)), "from": self.user(uid),
+                                              "message": message, "chat_instance": str(uid), "data": data})
+
+
+def cases(app, animes: int):
+    """nom -> rnd bilan bitta chaqiruvni bajaradigan korutina."""
+    u = Updates()
+
+    def uid(rnd):
+        return rnd.randint(1, USERS)
+
+    def cb(data):
+        return lambda rnd: app.cb_all(u.callback(uid(rnd), data))
+
+    # coalescer (0.35 s kutish) chetlab o'tiladi: faqat handler tanasi o'lchanadi
+    yuklanolish = app.cb_yuklanolish.__wrapped__
+    pagenation = app.cb_pagenation.__wrapped__
+    return {
+        "cmd_start": lambda rnd: app.cmd_start(u.message(uid(rnd), "/start")),
+        "cb_all:search": cb("search"),
+        "cb_all:back": cb("back"),
+        "cb_all:vip": cb("vip"),
+        "cb_all:balance": cb("balance"),
+        "cb_all:allAnimes": cb("allAnimes"),
+        "msg_all:search": lambda rnd: app.msg_all(u.message(uid(rnd), f"Anime {rnd.randint(1, animes)}")),
+        "show_anime_callback": lambda rnd: app.show_anime_callback(
+            u.callback(uid(rnd), "anime"), rnd.randint(1, animes)),
+        "cb_yuklanolish": lambda rnd: yuklanolish(
+            u.callback(uid(rnd), f"yuklanolish={rnd.randint(1, animes)}={rnd.randint(1, EPISODES)}")),
+        "cb_pagenation": lambda rnd: pagenation(
+            u.callback(uid(rnd), f"pagenation={rnd.randint(1, animes)}={rnd.randint(1, 25)}=next")),
+        "cb_shop_full": lambda rnd: app.cb_shop_full(u.callback(uid(rnd), "shop=30")),
+    }
+
+
+async def measure(fn, bot, repeat: int, seed: int) -> dict:
+    global _queries
+    rnd = random.Random(seed)
+    for _ in range(max(5, repeat // 10)):  # isitish: keshlar va tayyorlangan so'rovlar
+        await fn(rnd)
+
+    samples, probes = [], []
+    _queries = 0
+    calls = len(bot.calls)
+    sys_before = io_syscalls()
+    for _ in range(repeat):
+        t = time.perf_counter()
+        await fn(rnd)
+        samples.append((time.perf_counter() - t) * 1000)
+        probes.append(cpu_probe())
+    sys_after = io_syscalls()
+    result = {"p50_ms": round(statistics.median(samples), 4),
+              "p95_ms": round(percentile(samples, 0.95), 4),
+              "cpu_ms": round(statistics.median(probes), 4),
+              "queries": round(_queries / repeat, 2),
+              "api_calls": round((len(bot.calls) - calls) / repeat, 2),
+              "syscalls": None if sys_before is None else round((sys_after - sys_before) / repeat, 1)}
+
+    # xotira: alohida o'tish, tracemalloc vaqtni buzadi
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(max(10, repeat // 4)):
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            await fn(rnd)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    result["alloc_kb"] = round(statistics.median(peaks) / 1024, 1)
+    return result
+
+
+async def seeded_pool(backend: str, size: int, tmp: str):
+    import asyncpg
+
+    import database
+    import sqlite_backend
+    from bench.backends import seed
+
+    if backend == "sqlite":
+        pool = await sqlite_backend.create_pool(os.path.join(tmp, f"handlers_{size}.db"),
+                                                readers=database.DB_SQLITE_READERS)
+        cleanup = pool.close
+    else:
+        admin = await asyncpg.connect(host=database.DB_HOST, user=database.DB_USER,
+                                      password=database.DB_PASS, database=database.DB_NAME)
+        await admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+        pool = await asyncpg.create_pool(host=database.DB_HOST, user=database.DB_USER,
+                                         password=database.DB_PASS, database=database.DB_NAME,
+                                         server_settings={'search_path': SCHEMA})
+
+        async def cleanup():
+            await pool.close()
+            await admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            await admin.close()
+
+    await database.init_tables(pool)
+    await seed(pool, size, USERS, episodes=EPISODES)
+    if backend != "sqlite":
+        async with pool.acquire() as conn:
+            await conn.execute("ANALYZE")
+    return pool, cleanup
+
+
+async def run(args) -> dict:
+    import asyncpg
+
+    app = load_app()
+    import database
+    import sqlite_backend
+
+    count_queries(sqlite_backend.Connection)
+    count_queries(asyncpg.connection.Connection)
+    bot = recording_bot(app)
+    # fon vazifalari ishlamaydi: jurnal navbati to'lib, yozuvlar "dropped" bo'ladi - bu ham arzon yo'l
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            database.catalog_changed()
+            t = time.perf_counter()
+            pool, cleanup = await seeded_pool(args.backend, size, tmp)
+            print(f"\n[{args.backend}] {size:,} animes x {EPISODES} episodes, {USERS:,} users "
+                  f"seeded in {time.perf_counter() - t:.1f}s")
+            try:
+                app.dp['pool'] = pool
+                await app.settings.load(pool)
+                await app.role_service.load(pool)
+                results[str(size)] = {}
+                for i, (name, fn) in enumerate(cases(app, size).items()):
+                    if args.only and name not in args.only:
+                        continue
+                    r = await measure(fn, bot, args.repeat, seed=i)
+                    results[str(size)][name] = r
+                    print(f"  {name:<22} p50 {r['p50_ms']:8.3f} ms  p95 {r['p95_ms']:8.3f} ms  "
+                          f"cpu {r['cpu_ms']:6.3f} ms  q {r['queries']:5.2f}  api {r['api_calls']:4.2f}  "
+                          f"sys {r['syscalls'] if r['syscalls'] is not None else '-':>6}  "
+                          f"alloc {r['alloc_kb']:7.1f} KB")
+            finally:
+                await cleanup()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    for size, handlers in results.items():
+        for name, r in handlers.items():
+            base = baseline.get(size, {}).get(name)
+            if not base:
+                continue
+            # SQL so'rovlar soni deterministik: har qanday oshish regressiya
+            if r["queries"] > base["queries"]:
+                regressions.append(f"{size}/{name}: queries {base['queries']} -> {r['queries']}")
+            # VM da CPU tezligi vaqt o'tishi bilan 2 barobargacha suzadi: vaqtlar cpu_ms nisbatiga keltiriladi
+            speed = r["cpu_ms"] / base["cpu_ms"] if base.get("cpu_ms") and r.get("cpu_ms") else 1.0
+            for metric, noise in NOISE.items():
+                old, new = base.get(metric), r.get(metric)
+                if old is None or new is None:
+                    continue
+                if metric.endswith("_ms"):
+                    old = round(old * speed, 4)
+                if new > old * (1 + threshold) and new - old > noise:
+                    note = f", cpu x{speed:.2f}" if metric.endswith("_ms") else ""
+                    regressions.append(f"{size}/{name}: {metric} {old} -> {new} (+{(new / old - 1) if old else 1:.0%}{note})")
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["sqlite", "postgres"], default=os.getenv("DB_BACKEND", "sqlite"))
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--only", default="", help="vergul bilan handler nomlari")
+    parser.add_argument("--baseline", default="")
+    parser.add_argument("--threshold", type=float, default=0.25, help="vaqt/syscall/xotira uchun nisbiy chegara")
+    parser.add_argument("--save", action="store_true", help="natijani baseline sifatida yozish")
+    args = parser.parse_args(argv)
+    args.sizes = [int(s) for s in args.sizes.split(",") if s]
+    args.only = set(filter(None, args.only.split(",")))
+    path = os.path.abspath(args.baseline or os.path.join(ROOT, "bench", "baselines", f"handlers-{args.backend}.json"))
+
+    results = asyncio.run(run(args))
+
+    if args.save:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        old = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                old = json.load(f).get("results", {})
+        for size, handlers in results.items():
+            old.setdefault(size, {}).update(handlers)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "repeat": args.repeat, "results": old}, f, indent=2, sort_keys=True)
+        print(f"\nbaseline saved: {path}")
+        return 0
+    if not os.path.exists(path):
+        # baseline siz regressiya tekshiruvi hech qachon yiqilmaydi: bu ham xato
+        print(f"\nno baseline at {path}: nothing to compare (run with --save and commit it)", file=sys.stderr)
+        return 2
+    with open(path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) vs {path}:")
+        for line in regressions:
+            print("  " + line)
+        return 1
+    print(f"\nno regressions vs {path} (threshold {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
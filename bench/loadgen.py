@@ -0,0 +1,274 @@
+"""
+Uchdan-uchgacha yuklama testi: soxta Bot API + haqiqiy bot (main.py) + lokal baza.
+
+    python -m bench.loadgen [--users 200] [--duration 60] [--think 0] [--animes 500]
+                            [--latency 0.03] [--retry-after-rate 0.005] [--error-rate 0.001]
+                            [--api-rate 0] [--no-bot]
+
+1. bench.fake_telegram serverini shu jarayonda ishga tushiradi;
+2. main.py ni TELEGRAM_API_URL bilan alohida jarayonda ishga tushiradi
+   (--no-bot: botni o'zingiz ishga tushirasiz, masalan bir nechta nusxa);
+3. N ta virtual foydalanuvchi yo'lni takrorlaydi:
+   /start -> qidiruv -> anime kartasi -> epizod -> keyingi sahifa -> VIP -> xarid;
+4. har qadam uchun p50/p95/p99, o'tkazuvchanlik, Bot API chaqiruvlari va
+   DB pool to'yinishi (pg_stat_activity, pool hajmi DB_POOL_MAX_SIZE) chiqariladi.
+
+.env dagi DB_* bazasi ishlatiladi va unga sintetik animelar/foydalanuvchilar yoziladi:
+faqat test uchun alohida baza bering.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import signal
+import sys
+import time
+from collections import Counter, defaultdict
+
+from aiohttp import ClientSession, ClientTimeout
+
+import database
+from bench import fake_telegram
+from bench.backends import seed
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_TOKEN = "123456789:LOADTEST"
+USER_BASE = 7_000_000_000
+REPLIES = "sendMessage,sendPhoto,sendVideo,editMessageText,copyMessage"
+STEPS = ("start", "search", "anime_card", "episode", "next_page", "vip", "buy_vip")
+
+
+class StepFailed(Exception):
+    pass
+
+
+def percentile(samples: list, p: float) -> float:
+    if not samples:
+        return float('nan')
+    samples = sorted(samples)
+    return samples[max(0, math.ceil(p * len(samples)) - 1)]
+
+
+def buttons(call: dict) -> list:
+    markup = call["params"].get("reply_markup")
+    if not markup:
+        return []
+    if isinstance(markup, str):
+        markup = json.loads(markup)
+    return [b.get("callback_data", "") for row in markup.get("inline_keyboard", []) for b in row]
+
+
+class VirtualUser:
+    _message_ids = itertools.count(1)
+    _callback_ids = itertools.count(1)
+
+    def __init__(self, harness, uid: int, rnd: random.Random):
+        self.h = harness
+        self.uid = uid
+        self.rnd = rnd
+        self.user = {"id": uid, "is_bot": False, "first_name": f"u{uid}", "language_code": "uz"}
+        self.after = 0
+        self.last_message = None
+
+    async def _step(self, name: str, update: dict, methods: str) -> dict:
+        started = time.perf_counter()
+        async with self.h.http.post(f"{self.h.api}/_inject", json=update) as resp:
+            await resp.read()
+        params = {"chat_id": self.uid, "after": self.after, "methods": methods, "timeout": self.h.timeout}
+        async with self.h.http.get(f"{self.h.api}/_wait", params=params) as resp:
+            body = await resp.json()
+        self.after = body["last_seq"]
+        if not body["ok"]:
+            self.h.failures[name] += 1
+            raise StepFailed(name)
+        self.h.samples[name].append((time.perf_counter() - started) * 1000)
+        call = body["call"]
+        if isinstance(call["result"], dict) and "chat" in call["result"]:
+            self.last_message = call["result"]
+        return call
+
+    def _message(self, text: str) -> dict:
+        msg = {"message_id": next(self._message_ids), "date": int(time.time()),
+               "chat": {"id": self.uid, "type": "private", "first_name": self.user["first_name"]},
+               "from": self.user, "text": text}
+        if text.startswith("/"):
+            msg["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"message": msg}
+
+    def _callback(self, data: str) -> dict:
+        message = self.last_message or {"message_id": 1, "date": int(time.time()),
+                                        "chat": {"id": self.uid, "type": "private"}}
+        return {"callback_query": {"id": str(next(self._callback_ids)), "from": self.user,
+                                   "message": message, "chat_instance": str(self.uid), "data": data}}
+
+    async def journey(self):
+        await self._step("start", self._message("/start"), "sendMessage")
+        call = await self._step("search", self._message(f"Anime {self.rnd.randint(1, self.h.animes)}"), "sendMessage")
+        found = [b for b in buttons(call) if b.startswith("anime=")]
+        if not found:
+            self.h.failures["search_empty"] += 1
+            return
+        call = await self._step("anime_card", self._callback(self.rnd.choice(found)), REPLIES)
+        episode = [b for b in buttons(call) if b.startswith("yuklanolish=")]
+        if episode:
+            call = await self._step("episode", self._callback(episode[0]), REPLIES)
+            page = [b for b in buttons(call) if b.startswith("pagenation=") and b.endswith("=next")]
+            if page:
+                await self._step("next_page", self._callback(page[0]), REPLIES)
+        await self._step("vip", self._callback("vip"), REPLIES)
+        await self._step("buy_vip", self._callback("shop=30"), "answerCallbackQuery")
+
+    async def run(self, deadline: float):
+        while time.monotonic() < deadline:
+            try:
+                await self.journey()
+                self.h.journeys += 1
+            except StepFailed:
+                pass
+            if self.h.think:
+                await asyncio.sleep(self.rnd.expovariate(1 / self.h.think))
+
+
+class PoolSampler:
+    """Bot ulanishlari: pg_stat_activity dan har 0.25 s."""
+
+    def __init__(self, pool_max: int):
+        self.pool_max = pool_max
+        self.active = []
+        self.total = []
+        self._conn = None
+
+    async def run(self):
+        self._conn = await database.connect()
+        try:
+            while True:
+                row = await self._conn.fetchrow("""
+                SELECT COUNT(*) FILTER (WHERE state = 'active') AS active, COUNT(*) AS total
+                FROM pg_stat_activity
+                WHERE datname = current_database() AND pid <> pg_backend_pid() AND backend_type = 'client backend'
+                """)
+                self.active.append(row['active'])
+                self.total.append(row['total'])
+                await asyncio.sleep(0.25)
+        finally:
+            await self._conn.close()
+
+    def report(self) -> str:
+        if not self.active:
+            return "db pool: no samples"
+        saturated = sum(1 for a in self.active if a >= self.pool_max) / len(self.active)
+        return (f"db pool (max {self.pool_max}): active mean {sum(self.active) / len(self.active):.1f}, "
+                f"peak {max(self.active)}, connections peak {max(self.total)}, "
+                f"saturated {saturated:.0%} of samples")
+
+
+class Harness:
+    def __init__(self, args):
+        self.api = f"http://{args.host}:{args.port}"
+        self.animes = args.animes
+        self.think = args.think
+        self.timeout = args.timeout
+        self.api_rate = args.api_rate
+        self.samples = defaultdict(list)
+        self.failures = Counter()
+        self.journeys = 0
+        self.http = None
+
+
+async def prepare_db(args) -> list:
+    pool = await database.create_pool()
+    try:
+        await database.init_tables(pool)
+        async with pool.acquire() as conn:
+            have = await conn.fetchval("SELECT COUNT(*) FROM animelar WHERE nom LIKE 'Anime %'")
+        if have < args.animes:
+            # 30 qism: epizod sahifasida "Keyingi" tugmasi bo'lishi uchun (sahifada 25 ta)
+            await seed(pool, args.animes - have, 0, episodes=30)
+        uids = [USER_BASE + i for i in range(args.users)]
+        for uid in uids:
+            await database.ensure_user(pool, uid)
+            await database.set_balance(pool, uid, 10 ** 9)
+        return uids
+    finally:
+        await pool.close()
+
+
+async def start_bot(h: Harness):
+    # --api-rate 0: botning o'zi o'lchanadi, tenancy token bucketi emas
+    env = dict(os.environ, BOT_TOKEN=FAKE_TOKEN, TELEGRAM_API_URL=h.api, TENANT_API_RATE=str(h.api_rate))
+    proc = await asyncio.create_subprocess_exec(sys.executable, "main.py", cwd=ROOT, env=env)
+    # bot polling ni boshlaguncha kutamiz
+    for _ in range(300):
+        async with h.http.get(f"{h.api}/_stats") as resp:
+            if (await resp.json())["calls"].get("getUpdates", 0) >= 2:
+                return proc
+        if proc.returncode is not None:
+            raise SystemExit(f"bot exited with code {proc.returncode}")
+        await asyncio.sleep(0.1)
+    raise SystemExit("bot did not start polling in 30s")
+
+
+def report(h: Harness, elapsed: float, server: fake_telegram.FakeTelegram, sampler: PoolSampler):
+    print(f"\n{h.journeys} journeys in {elapsed:.1f}s: {h.journeys / elapsed:.1f} journeys/s, "
+          f"{sum(len(s) for s in h.samples.values()) / elapsed:.1f} steps/s")
+    print(f"{'step':<12}{'ok':>8}{'fail':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name in STEPS:
+        s = h.samples.get(name, [])
+        print(f"{name:<12}{len(s):>8}{h.failures.get(name, 0):>7}"
+              f"{percentile(s, .5):>10.1f}{percentile(s, .95):>10.1f}{percentile(s, .99):>10.1f}")
+    if h.failures.get("search_empty"):
+        print(f"empty searches: {h.failures['search_empty']}")
+    print("bot api:", json.dumps(server.stats()["calls"], sort_keys=True))
+    print("injected:", json.dumps(server.stats()["injected_errors"], sort_keys=True))
+    if sampler:
+        print(sampler.report())
+
+
+async def main(args):
+    h = Harness(args)
+    uids = await prepare_db(args)
+    server = fake_telegram.from_args(args)
+    runner = await fake_telegram.start(server, args.host, args.port)
+    h.http = ClientSession(timeout=ClientTimeout(total=args.timeout + 5))
+    proc = None
+    sampler = None if database.DB_BACKEND == "sqlite" else PoolSampler(database.DB_POOL_MAX_SIZE)
+    tasks = []
+    try:
+        if not args.no_bot:
+            proc = await start_bot(h)
+        if sampler:
+            tasks.append(asyncio.ensure_future(sampler.run()))
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*(VirtualUser(h, uid, random.Random(uid)).run(deadline) for uid in uids))
+        report(h, time.monotonic() - started, server, sampler)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if proc and proc.returncode is None:
+            proc.send_signal(signal.SIGINT)
+            server.release_polling()
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=15)
+            except asyncio.TimeoutError:
+                proc.kill()
+        await h.http.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    fake_telegram.add_arguments(parser)
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--think", type=float, default=0.0, help="yo'llar orasidagi o'rtacha pauza, s")
+    parser.add_argument("--animes", type=int, default=500)
+    parser.add_argument("--timeout", type=float, default=10.0, help="bitta qadam javobini kutish, s")
+    parser.add_argument("--api-rate", type=float, default=0.0,
+                        help="botning Bot API limiti, so'rov/s (TENANT_API_RATE); 0 - cheklovsiz")
+    parser.add_argument("--no-bot", action="store_true")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,267 @@
+"""
+animelar va anime_datas katalogini CSV/JSONL ko'rinishida import/eksport qilish.
+
+    python catalog_io.py import animelar animelar.csv
+    python catalog_io.py import anime_datas episodes.jsonl
+    python catalog_io.py export anime_datas episodes.csv
+"""
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import os
+from typing import Iterator, List, Tuple
+
+import database
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 5000
+
+
+def _int(v):
+    return int(str(v).strip())
+
+def _opt_int(v):
+    return None if v is None or str(v).strip() == "" else int(str(v).strip())
+
+def _text(v):
+    v = "" if v is None else str(v)
+    if not v.strip():
+        raise ValueError("bo'sh qiymat")
+    return v
+
+def _opt_text(v):
+    return None if v is None or str(v) == "" else str(v)
+
+def _digits(v):
+    v = str(v).strip()
+    if not v.isdigit():
+        raise ValueError(f"raqam emas: {v!r}")
+    return v
+
+# ustun -> (tekshiruvchi, default)
+TABLES = {
+    'animelar': {
+        'id': (_opt_int, None),
+        'nom': (_text, None),
+        'rams': (_text, None),
+        'qismi': (_text, None),
+        'davlat': (_text, None),
+        'tili': (_text, None),
+        'yili': (_text, None),
+        'janri': (_text, None),
+        'qidiruv': (_int, 0),
+        'sana': (_text, None),
+        'anitype': (_opt_text, None),
+        'like': (_int, 0),
+        'deslike': (_int, 0),
+    },
+    'anime_datas': {
+        'id': (_digits, None),
+        'file_id': (_text, None),
+        'qism': (_digits, None),
+        'sana': (_opt_text, None),
+    },
+}
+
+# staging -> asosiy jadval
+INSERT_SQL = {
+    'animelar': """
+        INSERT INTO animelar (id, nom, rams, qismi, davlat, tili, yili, janri, qidiruv, sana, aniType, "like", deslike)
+        SELECT COALESCE(id, nextval(pg_get_serial_sequence('animelar', 'id'))),
+               nom, rams, qismi, davlat, tili, yili, janri, qidiruv, sana, anitype, "like", deslike
+        FROM catalog_stage
+        ON CONFLICT (id) DO NOTHING
+    """,
+    'anime_datas': """
+        INSERT INTO anime_datas (id, file_id, qism, sana)
+        SELECT s.id, s.file_id, s.qism, s.sana
+        FROM catalog_stage s
+        WHERE EXISTS (SELECT 1 FROM animelar a WHERE a.id::text = s.id)
+        ON CONFLICT (id, qism) DO NOTHING
+    """,
+}
+
+STAGE_SQL = {
+    'animelar': """
+        CREATE TEMP TABLE catalog_stage (
+            id INTEGER, nom TEXT, rams TEXT, qismi TEXT, davlat TEXT, tili TEXT, yili TEXT,
+            janri TEXT, qidiruv INTEGER, sana TEXT, anitype TEXT, "like" INTEGER, deslike INTEGER
+        ) ON COMMIT DROP
+    """,
+    'anime_datas': """
+        CREATE TEMP TABLE catalog_stage (id TEXT, file_id TEXT, qism TEXT, sana TEXT) ON COMMIT DROP
+    """,
+}
+
+
+def _detect_format(path: str, fmt: str = None) -> str:
+    fmt = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+    if fmt not in ('csv', 'jsonl'):
+        raise ValueError("Format csv yoki jsonl bo'lishi kerak")
+    return fmt
+
+def _read_rows(path: str, fmt: str) -> Iterator[Tuple[int, object]]:
+    """(qator raqami, xom qator): jsonl - satr, csv - dict yoki csv.Error. Tahlil import_file da, qator bo'yicha."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            reader = csv.DictReader(f)
+            lost = 0  # xato bilan o'tkazilgan qatorlar line_num ga kirmaydi
+            while True:
+                n = reader.line_num + lost + 1  # yozuvning birinchi qatori (sarlavha birinchi next() da)
+                try:
+                    row = next(reader)
+                except StopIteration:
+                    return
+                except csv.Error as e:
+                    # buzuq qator rad etiladi, o'qish keyingisidan davom etadi
+                    lost += 1
+                    yield max(n, 2), e
+                    continue
+                yield max(n, 2), row
+        else:
+            for n, line in enumerate(f, start=1):
+                if line.strip():
+                    yield n, line
+
+def _parse_row(fmt: str, raw) -> dict:
+    if isinstance(raw, csv.Error):
+        raise raw
+    row = json.loads(raw) if fmt == 'jsonl' else raw
+    if not isinstance(row, dict):
+        raise ValueError(f"obyekt kutilgan, {type(row).__name__} keldi")
+    return row
+
+def validate_row(table: str, row: dict) -> tuple:
+    out = []
+    for col, (check, default) in TABLES[table].items():
+        value = row.get(col)
+        if value is None and col == 'anitype':
+            value = row.get('aniType')
+        if (value is None or value == "") and default is not None:
+            out.append(default)
+            continue
+        try:
+            out.append(check(value))
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"{col}: {e}")
+    return tuple(out)
+
+
+async def import_file(pool, table: str, path: str, fmt: str = None) -> dict:
+    fmt = _detect_format(path, fmt)
+    columns = list(TABLES[table])
+    staged = 0
+    errors: List[str] = []
+    invalid = 0
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            await conn.execute(STAGE_SQL[table])
+            chunk = []
+            for n, raw in _read_rows(path, fmt):
+                try:
+                    chunk.append(validate_row(table, _parse_row(fmt, raw)))
+                except (ValueError, json.JSONDecodeError, csv.Error) as e:
+                    invalid += 1
+                    if len(errors) < 10:
+                        errors.append(f"{n}-qator: {e}")
+                    continue
+                if len(chunk) >= CHUNK_SIZE:
+                    await conn.copy_records_to_table('catalog_stage', records=chunk, columns=columns)
+                    staged += len(chunk)
+                    chunk = []
+            if chunk:
+                await conn.copy_records_to_table('catalog_stage', records=chunk, columns=columns)
+                staged += len(chunk)
+
+            if table == 'animelar':
+                # aniq berilgan id lardan keyin sequence to'qnashmasin
+                await conn.execute("""
+                SELECT setval(pg_get_serial_sequence('animelar', 'id'),
+                              GREATEST((SELECT COALESCE(MAX(id), 0) FROM animelar),
+                                       (SELECT COALESCE(MAX(id), 0) FROM catalog_stage), 1))
+                """)
+            res = await conn.execute(INSERT_SQL[table])
+            inserted = int(res.split()[-1])
+        # indeks statistikasi va keshlar import oxirida bir marta
+        await conn.execute(f"ANALYZE {table}")
+    if table == 'animelar':
+        await database.sync_genres(pool)
+    database.catalog_changed()
+    return {"table": table, "valid": staged, "invalid": invalid,
+            "inserted": inserted, "skipped": staged - inserted, "errors": errors}
+
+
+async def _export_plain(pool, table: str, path: str, fmt: str) -> int:
+    """SQLite: COPY va server kursori yo'q - kalit bo'yicha CHUNK_SIZE lik oddiy SELECT lar."""
+    columns = list(TABLES[table])
+    key = "id" if table == 'animelar' else "data_id"
+    select = "SELECT {}, {} AS _key FROM {} WHERE {} > $1 ORDER BY {} LIMIT $2".format(
+        ", ".join('"like"' if c == 'like' else c for c in columns), key, table, key, key)
+    count, after = 0, -1
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f) if fmt == 'csv' else None
+        if writer:
+            writer.writerow(columns)
+        async with database.reader(pool).acquire() as conn:
+            while True:
+                rows = await conn.fetch(select, after, CHUNK_SIZE)
+                for r in rows:
+                    values = [r[c] for c in columns]
+                    if writer:
+                        writer.writerow(values)
+                    else:
+                        f.write(json.dumps(dict(zip(columns, values)), ensure_ascii=False))
+                        f.write("\n")
+                count += len(rows)
+                if len(rows) < CHUNK_SIZE:
+                    return count
+                after = rows[-1]['_key']
+
+
+async def export_file(pool, table: str, path: str, fmt: str = None) -> int:
+    fmt = _detect_format(path, fmt)
+    if database.is_sqlite(pool):
+        return await _export_plain(pool, table, path, fmt)
+    columns = list(TABLES[table])
+    select = "SELECT {} FROM {} ORDER BY {}".format(
+        ", ".join('"like"' if c == 'like' else c for c in columns), table,
+        "id" if table == 'animelar' else "data_id")
+    async with pool.acquire() as conn:
+        if fmt == 'csv':
+            # COPY ... TO STDOUT to'g'ridan-to'g'ri faylga oqadi
+            res = await conn.copy_from_query(select, output=path, format='csv', header=True)
+            return int(res.split()[-1])
+        count = 0
+        with open(path, 'w', encoding='utf-8') as f:
+            async with conn.transaction():
+                async for r in conn.cursor(select, prefetch=CHUNK_SIZE):
+                    f.write(json.dumps(dict(r), ensure_ascii=False))
+                    f.write("\n")
+                    count += 1
+        return count
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="animelar/anime_datas import va eksport (COPY)")
+    parser.add_argument("action", choices=["import", "export"])
+    parser.add_argument("table", choices=list(TABLES))
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"])
+    args = parser.parse_args()
+
+    async def main():
+        pool = await database.create_pool()
+        await database.init_tables(pool)
+        try:
+            if args.action == "import":
+                print(await import_file(pool, args.table, args.path, args.format))
+            else:
+                print(f"{await export_file(pool, args.table, args.path, args.format)} rows -> {args.path}")
+        finally:
+            await pool.close()
+
+    asyncio.run(main())
@@ -0,0 +1,120 @@
+import asyncio
+import functools
+import logging
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (bot_id, user_id, message_id): bir jarayonda bir nechta bot (tenancy.py)
+Key = Tuple[int, int, int]
+
+
+class CallbackCoalescer:
+    """
+    Bitta xabar ustida tez-tez bosilgan callbacklarni birlashtiradi:
+    har bir (user, message) uchun faqat oxirgi bosilgan holat bajariladi.
+    """
+
+    def __init__(self, delay: float = 0.35):
+        self.delay = delay
+        self._tasks: Dict[Key, asyncio.Task] = {}
+        self.received = 0
+        self.executed = 0
+        self.superseded = 0
+
+    def wrap(self, handler):
+        @functools.wraps(handler)
+        async def wrapper(query):
+            await self.submit(query, handler)
+        return wrapper
+
+    async def submit(self, query, handler):
+        self.received += 1
+        message_id = query.message.message_id if query.message else 0
+        key = (query.bot.id, query.from_user.id, message_id)
+        old = self._tasks.get(key)
+        if old and not old.done():
+            # kutayotgan yoki bajarilayotgan eski bosishni bekor qilamiz
+            old.cancel()
+            self.superseded += 1
+        self._tasks[key] = asyncio.ensure_future(self._run(key, query, handler))
+        # foydalanuvchi soat belgisini kutib qolmasligi uchun darhol javob
+        try:
+            await query.answer()
+        except Exception as e:
+            logger.debug("answer_callback_query failed: %s", e)
+
+    async def _run(self, key: Key, query, handler):
+        try:
+            await asyncio.sleep(self.delay)
+            self.executed += 1
+            await handler(query)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.exception("Coalesced callback failed: %s", e)
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "executed": self.executed,
+            "superseded": self.superseded,
+            "pending": len(self._tasks),
+        }
+
+
+if __name__ == "__main__":
+    # Simulyatsiya: N foydalanuvchi bitta xabarda "Keyingi ➡️" ni bir necha marta bosadi.
+    # Har bir handler ishga tushishi = send_video + delete_message (2 ta Bot API chaqiruvi),
+    # har bir bosish = 1 ta answer_callback_query.
+    import random
+
+    USERS, CLICKS, GAP, API_LATENCY = 200, 5, 0.08, 0.05
+
+    class FakeQuery:
+        def __init__(self, calls, uid):
+            self.calls = calls
+            self.bot = type("B", (), {"id": 1})()
+            self.from_user = type("U", (), {"id": uid})()
+            self.message = type("M", (), {"message_id": 1})()
+
+        async def answer(self, *args, **kwargs):
+            self.calls["answer"] += 1
+
+    async def handler(query):
+        await asyncio.sleep(API_LATENCY)
+        query.calls["send_video"] += 1
+        await asyncio.sleep(API_LATENCY)
+        query.calls["delete"] += 1
+
+    async def storm(submit):
+        calls = {"answer": 0, "send_video": 0, "delete": 0}
+
+        async def user(uid):
+            for _ in range(CLICKS):
+                await submit(FakeQuery(calls, uid))
+                await asyncio.sleep(GAP * random.uniform(0.5, 1.5))
+
+        await asyncio.gather(*(user(u) for u in range(USERS)))
+        await asyncio.sleep(1.5)
+        return calls
+
+    async def naive(query):
+        await query.answer()
+        asyncio.ensure_future(handler(query))
+
+    async def main():
+        before = await storm(naive)
+        c = CallbackCoalescer()
+        after = await storm(c.wrap(handler))
+        total_before, total_after = sum(before.values()), sum(after.values())
+        print(f"{USERS} users x {CLICKS} clicks, ~{int(GAP * 1000)} ms apart")
+        print(f"naive:     {before} = {total_before} API calls")
+        print(f"coalesced: {after} = {total_after} API calls")
+        print(f"saved:     {total_before - total_after} ({100 * (total_before - total_after) / total_before:.0f}%)")
+        print(f"coalescer: {c.stats()}")
+
+    asyncio.run(main())
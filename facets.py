@@ -0,0 +1,138 @@
+"""
+Janr -> yil -> davlat bo'yicha filtrlash uchun xotiradagi indeks.
+
+Har bir qiymat (janr, yil, davlat) uchun bitmap: Python int, bit o'rni - animening
+alifbo tartibidagi o'rni. Bir nechta filtr kesishmasi `&`, soni `bit_count()`,
+sahifa esa kursor o'rnidan keyingi eng kichik bitlar - bazaga so'rov yo'q.
+100k anime uchun bitta bitmap ~12.5 KB. Katalog o'zgarsa keyingi so'rovda qayta quriladi.
+"""
+import asyncio
+import logging
+import time
+import zlib
+
+import database
+
+logger = logging.getLogger(__name__)
+
+FACETS = ('genre', 'year', 'country')
+ANY = '*'  # bu qadamda filtr yo'q
+
+
+def value_key(value: str) -> str:
+    # callback_data ga sig'adigan barqaror kalit (yil / davlat matni uzun bo'lishi mumkin)
+    return f"{zlib.crc32(value.encode()):08x}"
+
+
+def _bitmaps(members: dict, nbytes: int) -> dict:
+    """kalit -> o'rinlar ro'yxati => kalit -> int (har bitni int ga alohida OR qilish O(n^2))"""
+    out = {}
+    for key, positions in members.items():
+        buf = bytearray(nbytes)
+        for pos in positions:
+            buf[pos >> 3] |= 1 << (pos & 7)
+        out[key] = int.from_bytes(buf, 'little')
+    return out
+
+
+def build(animes, links, genres):
+    """(o'rin -> (id, nom), kalit -> nom, kalit -> bitmap) - alohida oqimda ishlaydi."""
+    animes = sorted(animes, key=lambda r: (r['nom'].lower(), r['id']))
+    position = {r['id']: i for i, r in enumerate(animes)}
+    members = {facet: {} for facet in FACETS}
+    labels = {facet: {} for facet in FACETS}
+    for i, r in enumerate(animes):
+        for facet, value in (('year', r['yili']), ('country', r['davlat'])):
+            value = (value or "").strip()
+            if value:
+                key = value_key(value.lower())
+                labels[facet].setdefault(key, value)
+                members[facet].setdefault(key, []).append(i)
+    labels['genre'] = {str(r['id']): r['name'] for r in genres}
+    for link in links:
+        pos = position.get(link['anime_id'])
+        if pos is not None:
+            members['genre'].setdefault(str(link['genre_id']), []).append(pos)
+    nbytes = (len(animes) + 7) // 8
+    bitmaps = {facet: _bitmaps(members[facet], nbytes) for facet in FACETS}
+    return [(r['id'], r['nom']) for r in animes], labels, bitmaps
+
+
+class FacetIndex:
+    def __init__(self):
+        self.names = []  # o'rin -> (anime id, nom)
+        self.labels = {facet: {} for facet in FACETS}  # kalit -> ko'rinadigan nom
+        self.bitmaps = {facet: {} for facet in FACETS}  # kalit -> int
+        self.all = 0
+        self.loaded_at = None
+        self.load_seconds = 0.0
+        self._stale = True
+        self._lock = asyncio.Lock()
+        database.on_catalog_change(self.invalidate)
+
+    def invalidate(self):
+        self._stale = True
+
+    async def ready(self, pool) -> "FacetIndex":
+        if self._stale:
+            async with self._lock:
+                if self._stale:
+                    await self.load(pool)
+        return self
+
+    async def load(self, pool):
+        started = time.perf_counter()
+        # yuklash davomida kelgan o'zgarish keyingi so'rovda yana qayta qurishga olib keladi;
+        # xato bo'lsa (baza, isitish) indeks eskiligicha qoladi va keyingi so'rov qayta urinadi
+        self._stale = False
+        try:
+            rows = await database.load_facets(pool)
+            # 100k qatorda qurish ~0.5 s CPU: event loop to'xtab qolmasin
+            names, labels, bitmaps = await asyncio.get_running_loop().run_in_executor(None, build, *rows)
+        except BaseException:
+            self._stale = True
+            raise
+        self.names, self.labels, self.bitmaps = names, labels, bitmaps
+        self.all = (1 << len(names)) - 1
+        self.loaded_at = time.time()
+        self.load_seconds = time.perf_counter() - started
+        logger.info("facet index: %d animes, %d genres, %d years, %d countries in %.0f ms",
+                    len(names), len(bitmaps['genre']), len(bitmaps['year']),
+                    len(bitmaps['country']), self.load_seconds * 1000)
+
+    def select(self, filters: dict) -> int:
+        """filters: facet -> kalit (ANY yoki None - filtr yo'q). Noma'lum kalit - bo'sh to'plam."""
+        selection = self.all
+        for facet, key in filters.items():
+            if key and key != ANY:
+                selection &= self.bitmaps[facet].get(key, 0)
+        return selection
+
+    def counts(self, facet: str, selection: int) -> list:
+        """[(kalit, nom, soni)] - faqat bo'sh bo'lmaganlari, yil kamayish, qolganlari soni bo'yicha."""
+        out = []
+        for key, bitmap in self.bitmaps[facet].items():
+            n = (selection & bitmap).bit_count()
+            if n:
+                out.append((key, self.labels[facet].get(key, key), n))
+        if facet == 'year':
+            out.sort(key=lambda x: x[1], reverse=True)
+        else:
+            out.sort(key=lambda x: (-x[2], x[1]))
+        return out
+
+    def page(self, selection: int, after: int = -1, limit: int = 20):
+        """after o'rnidan keyingi `limit` ta: ([(o'rin, id, nom)], yana_bormi)."""
+        rest = selection >> (after + 1)
+        base = after + 1
+        out = []
+        while rest and len(out) < limit:
+            low = rest & -rest
+            pos = base + low.bit_length() - 1
+            out.append((pos,) + self.names[pos])
+            rest ^= low
+        return out, bool(rest)
+
+    def stats(self) -> dict:
+        return {"animes": len(self.names), "values": {f: len(self.bitmaps[f]) for f in FACETS},
+                "load_ms": round(self.load_seconds * 1000, 1), "loaded_at": self.loaded_at}
@@ -0,0 +1,131 @@
+"""
+Inline rejim: istalgan chatda `@bot naruto`.
+
+BotFather da /setinline yoqilgan bo'lishi kerak. Natijalar umumiy
+(is_personal=False), shuning uchun Telegram mashhur so'rovlarni cache_time
+davomida o'zi keshlaydi; bot tomonda normallashtirilgan so'rov -> natijalar LRU.
+Kalit prefiksining to'liq (limitga yetmagan) natijasi bo'lsa, uzunroq so'rov
+bazaga bormasdan shu ro'yxatdan filtrlanadi. Katalog o'zgarsa kesh tozalanadi.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from aiogram import types
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+import database
+
+logger = logging.getLogger(__name__)
+
+INLINE_MIN_PREFIX = int(os.getenv("INLINE_MIN_PREFIX", "2"))
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "300"))  # Telegram tomonidagi kesh, s
+INLINE_DEBOUNCE = float(os.getenv("INLINE_DEBOUNCE", "0.3"))  # s
+PAGE_SIZE = 20  # Telegram bitta javobda 50 tagacha qabul qiladi
+MAX_RESULTS = 200  # bitta so'rov uchun bazadan olinadigan eng ko'p natija
+
+
+def normalize(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class InlineSearch:
+    def __init__(self, ttl: float = 600, max_entries: int = 5000, debounce: float = INLINE_DEBOUNCE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.debounce = debounce
+        self._cache = OrderedDict()  # normallashgan so'rov -> (expires_at, rows, complete)
+        self._latest = {}  # user_id -> oxirgi inline_query.id
+        self.hits = 0
+        self.prefix_hits = 0
+        self.misses = 0
+        self.debounced = 0
+        database.on_catalog_change(self.clear)
+
+    def clear(self):
+        self._cache.clear()
+
+    def _get(self, key: str):
+        now = time.monotonic()
+        entry = self._cache.get(key)
+        if entry and entry[0] > now:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        # qisqaroq prefiksning to'liq natijasidan filtrlash (qidiruv - nom ichida qism satr)
+        for n in range(len(key) - 1, INLINE_MIN_PREFIX - 1, -1):
+            entry = self._cache.get(key[:n])
+            if entry and entry[0] > now and entry[2]:
+                self.prefix_hits += 1
+                rows = [r for r in entry[1] if key in r['nom'].lower()]
+                self._put(key, rows, True, entry[0])
+                return rows
+        return None
+
+    def _put(self, key: str, rows: list, complete: bool, expires_at: float):
+        self._cache[key] = (expires_at, rows, complete)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def search(self, pool, key: str) -> list:
+        rows = self._get(key)
+        if rows is None:
+            self.misses += 1
+            rows = [dict(r) for r in await database.search_anime_cards(pool, key, MAX_RESULTS)]
+            self._put(key, rows, len(rows) < MAX_RESULTS, time.monotonic() + self.ttl)
+        return rows
+
+    async def _superseded(self, query: types.InlineQuery) -> bool:
+        # har harf uchun yangi so'rov keladi: foydalanuvchi to'xtaguncha kutamiz
+        uid = query.from_user.id
+        self._latest[uid] = query.id
+        await asyncio.sleep(self.debounce)
+        if self._latest.get(uid) != query.id:
+            self.debounced += 1
+            return True
+        del self._latest[uid]
+        return False
+
+    async def answer(self, query: types.InlineQuery, pool, bot_username: str) -> bool:
+        key = normalize(query.query)
+        if len(key) < INLINE_MIN_PREFIX:
+            await query.answer([], cache_time=INLINE_CACHE_TIME, is_personal=False)
+            return False
+        # keyingi sahifalar (offset) foydalanuvchi yozayotganda emas, aylantirganda so'raladi
+        if not query.offset and await self._superseded(query):
+            return False
+        rows = await self.search(pool, key)
+        offset = int(query.offset) if query.offset.isdigit() else 0
+        page = rows[offset:offset + PAGE_SIZE]
+        next_offset = str(offset + PAGE_SIZE) if offset + PAGE_SIZE < len(rows) else ""
+        await query.answer([result(r, bot_username) for r in page], cache_time=INLINE_CACHE_TIME,
+                           is_personal=False, next_offset=next_offset)
+        return True
+
+    def stats(self) -> dict:
+        return {"cached": len(self._cache), "hits": self.hits, "prefix_hits": self.prefix_hits,
+                "misses": self.misses, "debounced": self.debounced}
+
+
+def result(row, bot_username: str) -> types.InlineQueryResult:
+    caption = (f"<b>🎬 {row['nom']}</b>\n"
+               f"🎥 Bólimi: {row['qismi']}\n"
+               f"📆 Yılı: {row['yili']}\n"
+               f"🎞 Janrı: {row['janri']}")
+    # deep link: cmd_start kodni ko'radi va kartani botda ochadi
+    kb = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(
+        "📥 Botda kóriw", url=f"https://t.me/{bot_username}?start={row['id']}")]])
+    rid = str(row['id'])
+    rams = row['rams'] or ""
+    if rams.startswith('P'):
+        return types.InlineQueryResultCachedPhoto(id=rid, photo_file_id=rams[1:], title=row['nom'],
+                                                  caption=caption, parse_mode='HTML', reply_markup=kb)
+    if rams.startswith('B'):
+        return types.InlineQueryResultCachedVideo(id=rid, video_file_id=rams[1:], title=row['nom'],
+                                                  caption=caption, parse_mode='HTML', reply_markup=kb)
+    return types.InlineQueryResultArticle(
+        id=rid, title=row['nom'], description=f"{row['qismi']} qism, {row['yili']}",
+        input_message_content=types.InputTextMessageContent(caption, parse_mode='HTML'), reply_markup=kb)
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Deque, Tuple
+
+import database
+
+logger = logging.getLogger(__name__)
+
+# (channelId, userId) - joinRequests ustunlari kabi matn
+Record = Tuple[str, str]
+
+
+class JoinRequestBuffer:
+    """
+    chat_join_request larni xotirada yig'ib, joinRequests ga COPY bilan
+    paketlab yozadi. Handler bazaga umuman murojaat qilmaydi.
+    """
+
+    def __init__(self, max_batch: int = 5000, interval: float = 0.5, max_pending: int = 200_000):
+        self.max_batch = max_batch
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: Deque[Record] = deque()
+        self._wakeup = asyncio.Event()
+        self.received = 0
+        self.written = 0
+        self.dropped = 0
+
+    def add(self, channel_id, user_id):
+        self.received += 1
+        self._pending.append((str(channel_id), str(user_id)))
+        if len(self._pending) > self.max_pending:
+            self._pending.popleft()
+            self.dropped += 1
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    async def flush(self, pool) -> int:
+        total = 0
+        while self._pending:
+            n = min(len(self._pending), self.max_batch)
+            batch = [self._pending.popleft() for _ in range(n)]
+            try:
+                await self._write(pool, batch)
+            except Exception as e:
+                logger.exception("joinRequests flush failed: %s", e)
+                # keyingi urinishda qayta yozamiz
+                self._pending.extendleft(reversed(batch))
+                break
+            total += n
+        self.written += total
+        return total
+
+    @staticmethod
+    async def _write(pool, batch):
+        if database.is_sqlite(pool):
+            async with pool.acquire() as conn:
+                await conn.executemany(
+                    "INSERT INTO joinRequests (channelId, userId) VALUES ($1, $2) ON CONFLICT DO NOTHING", batch)
+            return
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS joinrequests_stage (
+                    channelId VARCHAR(32) NOT NULL,
+                    userId VARCHAR(255) NOT NULL
+                ) ON COMMIT DELETE ROWS;
+                """)
+                await conn.copy_records_to_table('joinrequests_stage', records=batch,
+                                                 columns=['channelid', 'userid'])
+                await conn.execute("""
+                INSERT INTO joinRequests (channelId, userId)
+                SELECT DISTINCT channelId, userId FROM joinrequests_stage
+                ON CONFLICT (channelId, userId) DO NOTHING;
+                """)
+
+    async def run(self, pool):
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush(pool)
+        except asyncio.CancelledError:
+            await self.flush(pool)
+            raise
+
+    def stats(self) -> dict:
+        return {"received": self.received, "written": self.written,
+                "pending": len(self._pending), "dropped": self.dropped}
+
+
+class ApprovalWorker:
+    """
+    Navbatdagi so'rovlarni fon rejimida, sekundiga `rate` tadan ko'p
+    bo'lmagan tezlikda tasdiqlaydi (approveChatJoinRequest).
+
+    Navbat chegaralangan: Telegram sekinlashganda to'lib qolsa yangi so'rov
+    tasdiqlanmaydi (dropped). U baribir joinRequests ga yozilgan (JoinRequestBuffer) -
+    obuna tekshiruvidan o'tadi, kanalda esa admin qo'lda tasdiqlaydi.
+    """
+
+    def __init__(self, bot, rate: float = 20.0, max_queued: int = 10_000):
+        self.bot = bot
+        self.rate = rate
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        self.approved = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def enqueue(self, channel_id, user_id) -> bool:
+        try:
+            self.queue.put_nowait((channel_id, user_id))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning("Join approval queue full (%d), %d requests left pending",
+                               self.queue.maxsize, self.dropped)
+            return False
+        return True
+
+    async def run(self):
+        delay = 1.0 / self.rate
+        while True:
+            channel_id, user_id = await self.queue.get()
+            started = time.monotonic()
+            try:
+                await self.bot.approve_chat_join_request(channel_id, user_id)
+                self.approved += 1
+            except Exception as e:
+                retry_after = getattr(e, 'timeout', None)
+                if retry_after:
+                    # RetryAfter: kutib, qayta navbatga qo'yamiz
+                    logger.warning("Join approval flood control, sleeping %ss", retry_after)
+                    await asyncio.sleep(retry_after)
+                    self.enqueue(channel_id, user_id)
+                else:
+                    self.failed += 1
+                    logger.warning("approve_chat_join_request(%s, %s) failed: %s", channel_id, user_id, e)
+            rest = delay - (time.monotonic() - started)
+            if rest > 0:
+                await asyncio.sleep(rest)
+
+    def stats(self) -> dict:
+        return {"queued": self.queue.qsize(), "approved": self.approved, "failed": self.failed,
+                "dropped": self.dropped}
+
+
+if __name__ == "__main__":
+    # Lokal PostgreSQL ga yuklama: python join_requests.py [soni]
+    import sys
+
+    async def main():
+        n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+        pool = await database.create_pool()
+        await database.init_tables(pool)
+        buf = JoinRequestBuffer()
+        runner = asyncio.ensure_future(buf.run(pool))
+        started = time.perf_counter()
+        channel = "-100" + str(int(started))
+        for i in range(n):
+            buf.add(channel, 10_000_000 + i)
+            if i % 1000 == 0:
+                await asyncio.sleep(0)  # boshqa handlerlarga navbat
+        # pending bo'shashi yetmaydi: oxirgi paket hali yozilayotgan bo'lishi mumkin
+        while buf.written + buf.dropped < n:
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - started
+        runner.cancel()
+        print(f"{n} join requests in {elapsed:.2f}s = {buf.written / elapsed:,.0f} written/s; {buf.stats()}")
+        async with pool.acquire() as conn:
+            await conn.execute("DELETE FROM joinRequests WHERE channelId = $1", channel)
+        await pool.close()
+
+    asyncio.run(main())
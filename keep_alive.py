@@ -1,12 +1,33 @@
-from flask import Flask
-from threading import Thread
+from flask import Flask, jsonify
+from threading import Event, Thread
 
 app = Flask('')
+_ready = Event()
+_metrics = dict
 
 @app.route('/')
 def home():
     return "✅ sky yaratkan bot ishlayapti!"
 
+@app.route('/ready')
+def ready():
+    # startup isitishi tugaguncha 503 (deploy health-check uchun)
+    if _ready.is_set():
+        return "ready"
+    return "warming up", 503
+
+@app.route('/metrics')
+def metrics():
+    # har bot: update lar, xatolar, Bot API so'rovlari va limit kutishlari (tenancy.stats)
+    return jsonify(_metrics())
+
+def set_ready():
+    _ready.set()
+
+def set_metrics(provider):
+    global _metrics
+    _metrics = provider
+
 def run():
     app.run(host="0.0.0.0", port=8080)
 
@@ -0,0 +1,156 @@
+"""
+"🔔 Obuna bo‘lish": yangi qism qo'shilganda faqat shu anime obunachilariga xabar.
+
+Qism qo'shilishi NOTIFY_DIGEST_WINDOW davomida yig'iladi (bir nechta qism yoki anime
+bitta paket). So'ng har anime obunachilari subscriptions (anime_id, user_id)
+indeksidan keyset bo'laklarda o'qiladi va user_id bo'yicha birlashtiriladi - bir
+foydalanuvchi bir nechta animega obuna bo'lsa ham bitta xabar oladi. Navbat
+chegaralangan: yuboruvchi ulgurmasa o'qish kutadi, obunachilar xotiraga to'planmaydi.
+"""
+import asyncio
+import heapq
+import logging
+import os
+import time
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.utils import exceptions
+
+import database
+import tenancy
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_DIGEST_WINDOW = float(os.getenv("NOTIFY_DIGEST_WINDOW", "60"))  # s
+NOTIFY_RATE = float(os.getenv("NOTIFY_RATE", "25"))  # xabar / s (Telegram: ~30/s)
+FANOUT_BATCH = 1000
+QUEUE_SIZE = 10_000
+
+
+def episodes_label(eps: list) -> str:
+    return f"{eps[0]}-bo'lim" if len(eps) == 1 else f"{eps[0]}–{eps[-1]}-bo'limlar"
+
+
+class EpisodeNotifier:
+    def __init__(self, bot, rate: float = NOTIFY_RATE, window: float = NOTIFY_DIGEST_WINDOW):
+        self.bot = bot
+        self.rate = rate
+        self.window = window
+        self._pending = {}  # anime_id -> qo'shilgan qism raqamlari
+        self._wakeup = asyncio.Event()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.digests = 0
+        self.sent = 0
+        self.failed = 0
+        self.unsubscribed = 0
+
+    def episodes_added(self, anime_id: int, eps: list):
+        self._pending.setdefault(int(anime_id), []).extend(eps)
+        self._wakeup.set()
+
+    async def _subscribers(self, pool, anime_id: int):
+        after = 0
+        while True:
+            users = await database.subscribers_after(pool, anime_id, after, FANOUT_BATCH)
+            for user_id in users:
+                yield user_id
+            if len(users) < FANOUT_BATCH:
+                return
+            after = users[-1]
+
+    async def fan_out(self, pool, pending: dict) -> int:
+        """
+        pending: anime_id -> (nom, qismlar). Har obunachi uchun navbatga bitta
+        (user_id, [(anime_id, nom, qismlar)]). Foydalanuvchilar soni qaytadi.
+        """
+        streams = {aid: self._subscribers(pool, aid) for aid in pending}
+        heap = []
+        for aid, stream in streams.items():
+            user_id = await anext(stream, None)
+            if user_id is not None:
+                heap.append((user_id, aid))
+        heapq.heapify(heap)
+        users = 0
+        while heap:
+            user_id = heap[0][0]
+            items = []
+            while heap and heap[0][0] == user_id:
+                _, aid = heapq.heappop(heap)
+                items.append((aid,) + pending[aid])
+                following = await anext(streams[aid], None)
+                if following is not None:
+                    heapq.heappush(heap, (following, aid))
+            await self.queue.put((user_id, items))
+            users += 1
+        return users
+
+    async def run_fanout(self, pool):
+        while True:
+            await self._wakeup.wait()
+            # oyna: admin paketni oxirigacha yuklab bo'lsin
+            await asyncio.sleep(self.window)
+            self._wakeup.clear()
+            pending, self._pending = self._pending, {}
+            if not pending:
+                continue
+            self.digests += 1
+            started = time.perf_counter()
+            try:
+                names = await database.anime_names(pool, list(pending))
+                users = await self.fan_out(pool, {aid: (names.get(aid, str(aid)), sorted(set(eps)))
+                                                  for aid, eps in pending.items()})
+            except Exception as e:
+                logger.exception("episode fan-out failed: %s", e)
+                continue
+            logger.info("episode fan-out: %d animes -> %d users in %.1fs",
+                        len(pending), users, time.perf_counter() - started)
+
+    @staticmethod
+    def message(items: list, bot_username: str):
+        lines, kb = ["🔔 Yangi bo'limlar:"], InlineKeyboardMarkup()
+        for aid, nom, eps in items:
+            lines.append(f"• {nom} — {episodes_label(eps)}")
+            # deep link: cmd_start birinchi yangi qismni yuboradi
+            kb.add(InlineKeyboardButton(f"▶️ {nom} — {eps[0]}",
+                                        url=f"https://t.me/{bot_username}?start=ep_{aid}_{eps[0]}"))
+        return "\n".join(lines), kb
+
+    async def run_sender(self, pool):
+        delay = 1.0 / self.rate
+        # tezlik shu yerda: tarqatma botning interaktiv javoblari bucketini egallamaydi
+        tenancy.own_budget()
+        me = await self.bot.me
+        while True:
+            user_id, items = await self.queue.get()
+            started = time.monotonic()
+            text, kb = self.message(items, me.username)
+            try:
+                try:
+                    await self.bot.send_message(user_id, text, reply_markup=kb)
+                except exceptions.RetryAfter as e:
+                    # navbat to'la bo'lishi mumkin: qayta qo'ymasdan shu xabarni kutib qayta yuboramiz
+                    logger.warning("Notification flood control, sleeping %ss", e.timeout)
+                    await asyncio.sleep(e.timeout)
+                    await self.bot.send_message(user_id, text, reply_markup=kb)
+                self.sent += 1
+            except (exceptions.BotBlocked, exceptions.UserDeactivated, exceptions.ChatNotFound):
+                # botni bloklagan foydalanuvchiga keyingi safar yubormaymiz
+                self.failed += 1
+                try:
+                    self.unsubscribed += await database.unsubscribe_all(pool, user_id)
+                except Exception as e:
+                    logger.warning("unsubscribe %s failed: %s", user_id, e)
+            except Exception as e:
+                self.failed += 1
+                logger.warning("notification to %s failed: %s", user_id, e)
+            rest = delay - (time.monotonic() - started)
+            if rest > 0:
+                await asyncio.sleep(rest)
+
+    async def run(self, pool):
+        await asyncio.gather(self.run_fanout(pool), self.run_sender(pool))
+
+    def stats(self) -> dict:
+        return {"digests": self.digests, "queued": self.queue.qsize(), "sent": self.sent,
+                "failed": self.failed, "unsubscribed": self.unsubscribed,
+                "pending_animes": len(self._pending)}
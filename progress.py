@@ -0,0 +1,101 @@
+"""
+"▶️ Davom ettirish": har foydalanuvchining oxirgi ochgan qismi.
+
+Qism yuborilganda faqat xotira yangilanadi (LRU va yozilmaganlar lug'ati, har
+foydalanuvchi uchun oxirgisi ustun). Fon vazifasi watch_progress ga paketlab upsert
+qiladi. O'qish avval LRU dan, bo'lmasa bazadan (natija ham keshlanadi).
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import database
+
+logger = logging.getLogger(__name__)
+
+Position = Tuple[int, int]  # (anime_id, qism)
+_MISSING = (0, 0)  # bazada ham yo'q - qayta so'ramaslik uchun keshlanadi
+
+
+class WatchProgress:
+    def __init__(self, max_batch: int = 5000, interval: float = 5.0, cache_size: int = 50_000):
+        self.max_batch = max_batch
+        self.interval = interval
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[int, Position]" = OrderedDict()
+        self._pending: Dict[int, Position] = {}
+        self._inflight: Dict[int, Position] = {}  # flush yozayotgan paket: commit gacha get() ko'radi
+        self._wakeup = asyncio.Event()
+        self.hits = 0
+        self.misses = 0
+        self.written = 0
+
+    def _remember(self, user_id: int, position: Position):
+        self._cache[user_id] = position
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def record(self, user_id: int, anime_id: int, episode: int):
+        position = (int(anime_id), int(episode))
+        self._remember(int(user_id), position)
+        self._pending[int(user_id)] = position
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    async def get(self, pool, user_id: int) -> Optional[Position]:
+        user_id = int(user_id)
+        # LRU dan chiqib ketgan, lekin hali yozilmagan (yoki yozilayotgan) bo'lishi mumkin
+        position = self._cache.get(user_id) or self._pending.get(user_id) or self._inflight.get(user_id)
+        if position is not None:
+            self.hits += 1
+            self._remember(user_id, position)
+        else:
+            self.misses += 1
+            position = await database.get_watch_progress(pool, user_id) or _MISSING
+            # o'qish davomida yangi qism ochilgan bo'lsa (record) o'sha ustun
+            position = self._cache.get(user_id, position)
+            self._remember(user_id, position)
+        return None if position == _MISSING else position
+
+    async def flush(self, pool) -> int:
+        total = 0
+        while self._pending:
+            users = list(self._pending)[:self.max_batch]
+            batch = [(u,) + self._pending.pop(u) for u in users]
+            self._inflight.update((u, (anime_id, episode)) for u, anime_id, episode in batch)
+            saved = False
+            try:
+                await database.save_watch_progress(pool, batch)
+                saved = True
+            except Exception as e:
+                logger.exception("watch_progress flush failed: %s", e)
+            finally:
+                for u, anime_id, episode in batch:
+                    self._inflight.pop(u, None)
+                    if not saved:
+                        # keyingi urinishda qayta yozamiz; shu orada ochilgan yangi qism ustun
+                        self._pending.setdefault(u, (anime_id, episode))
+            if not saved:
+                break
+            total += len(batch)
+        self.written += total
+        return total
+
+    async def run(self, pool):
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush(pool)
+        except asyncio.CancelledError:
+            await self.flush(pool)
+            raise
+
+    def stats(self) -> dict:
+        return {"cached": len(self._cache), "hits": self.hits, "misses": self.misses,
+                "pending": len(self._pending), "written": self.written}
@@ -0,0 +1,177 @@
+"""
+"🎯 O'xshash animelar": har bir anime uchun oldindan hisoblangan top-k qo'shnilar.
+
+O'xshashlik = janr one-hot vektorlari kosinusi (anime_genres) va birga ko'rish
+kosinusi (events dagi view/download + votes dagi 👍: anime x foydalanuvchi sparse
+matritsa) ning og'irlikli yig'indisi. Hisob NumPy/SciPy bilan satr bloklarida
+(BATCH x n matritsa), natija recommendations jadvaliga va xotiradagi
+lug'atga yoziladi - tugma bosilganda bitta lookup.
+
+    python recommend.py          # qo'lda qayta hisoblash (PostgreSQL yoki DB_BACKEND=sqlite)
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import database
+import stats
+
+logger = logging.getLogger(__name__)
+
+RECOMMEND_TOP_K = int(os.getenv("RECOMMEND_TOP_K", "10"))
+RECOMMEND_INTERVAL = float(os.getenv("RECOMMEND_INTERVAL", str(24 * 3600)))  # s, "tungi" qayta hisob
+RECOMMEND_MIN_GAP = float(os.getenv("RECOMMEND_MIN_GAP", "600"))  # katalog o'zgarsa ham bundan tez emas
+RECOMMEND_EVENT_DAYS = int(os.getenv("RECOMMEND_EVENT_DAYS", "90"))
+GENRE_WEIGHT = 0.4
+COVIEW_WEIGHT = 0.6
+POPULARITY_WEIGHT = 1e-3  # teng ballarda mashhurroq anime oldinda
+BATCH = 512  # bir blokda BATCH x n float32 (50k anime uchun ~100 MB)
+
+
+def _normalized(matrix):
+    """Satrlarni L2 bo'yicha normallash (bo'sh satr - nol qoladi)."""
+    import numpy as np
+    from scipy import sparse
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms).dot(matrix).tocsr().astype(np.float32)
+
+
+def compute(animes, links, interactions, k: int = RECOMMEND_TOP_K, batch: int = BATCH) -> list:
+    """
+    animes: [(id, qidiruv)], links: [(anime_id, genre_id)], interactions: [(user_id, anime_id)].
+    Natija: [(anime_id, rank, similar_id, score)] - alohida oqimda ishlaydi.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    n = len(animes)
+    if n < 2:
+        return []
+    ids = np.fromiter((a[0] for a in animes), dtype=np.int64, count=n)
+    order = np.argsort(ids)
+
+    def matrix(pairs):
+        pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        # anime id -> satr (katalogda yo'q id lar tashlanadi), ikkinchi ustun -> zich ustun raqami
+        at = np.minimum(np.searchsorted(ids, pairs[:, 0], sorter=order), n - 1)
+        known = ids[order[at]] == pairs[:, 0]
+        columns, cols = np.unique(pairs[known, 1], return_inverse=True)
+        m = sparse.csr_matrix((np.ones(len(cols), dtype=np.float32), (order[at[known]], cols.ravel())),
+                              shape=(n, max(len(columns), 1)))
+        m.data[:] = 1.0  # takroriy juftlar (bir foydalanuvchi ko'p marta ko'rgan) - bitta
+        return _normalized(m)
+
+    # janrlar kam (o'nlab): zich matritsa, ko'paytma BLAS da
+    genres = matrix(links).toarray() * np.float32(np.sqrt(GENRE_WEIGHT))
+    coview = matrix([(a, u) for u, a in interactions]) * np.float32(np.sqrt(COVIEW_WEIGHT))
+    coview_t = coview.T.tocsr()
+    popularity = np.log1p(np.fromiter((max(a[1] or 0, 0) for a in animes), dtype=np.float32, count=n))
+    if popularity.max() > 0:
+        popularity *= np.float32(POPULARITY_WEIGHT / popularity.max())
+
+    k = min(k, n - 1)
+    # top-k tanlash: argpartition butun qatorda sekin (~1.5 ms / 50k). Bloklar maksimumlaridan
+    # k-chisi - qatorning k-chi eng katta balli uchun quyi chegara; undan (mashhurlik qo'shimchasi
+    # hisobga olingan holda) kichik ballar nomzod bo'la olmaydi, qolganlari saralanadi.
+    block = 64 if n >= 64 * k else 1
+    block_starts = np.arange(0, n, block)
+    out = []
+    for start in range(0, n, batch):
+        stop = min(start + batch, n)
+        rows = np.arange(stop - start)
+        scores = genres[start:stop] @ genres.T
+        if coview.nnz:
+            part = (coview[start:stop] @ coview_t).tocoo()
+            scores[part.row, part.col] += part.data
+        scores[rows, rows + start] = 0  # o'zi
+        kth = np.partition(np.maximum.reduceat(scores, block_starts, axis=1), -k, axis=1)[:, -k]
+        # 0 ball - umuman bog'lanmagan: faqat mashhurligi uchun tavsiya qilinmaydi
+        floor = np.maximum(kth - np.float32(POPULARITY_WEIGHT), np.float32(1e-12))
+        # flatnonzero 2D nonzero dan ~10 marta tez
+        r, c = np.divmod(np.flatnonzero(scores >= floor[:, None]), n)
+        final = scores[r, c] + popularity[c]
+        order = np.lexsort((-final, r))
+        r, c, final = r[order], c[order], final[order]
+        rank = np.arange(len(r)) - np.searchsorted(r, rows)[r]
+        keep = rank < k
+        out.extend(zip(ids[start + r[keep]].tolist(), (rank[keep] + 1).tolist(),
+                       ids[c[keep]].tolist(), final[keep].tolist()))
+    return out
+
+
+class Recommender:
+    def __init__(self, k: int = RECOMMEND_TOP_K, interval: float = RECOMMEND_INTERVAL,
+                 min_gap: float = RECOMMEND_MIN_GAP):
+        self.k = k
+        self.interval = interval
+        self.min_gap = min_gap
+        self.similar = {}  # anime_id -> (similar_id, ...) reyting bo'yicha
+        self.names = {}  # similar_id -> nom
+        self.computed_at = None
+        self.compute_seconds = 0.0
+        self._changed = asyncio.Event()
+        self._lock = asyncio.Lock()
+        database.on_catalog_change(self._changed.set)
+
+    def get(self, anime_id: int) -> list:
+        """[(similar_id, nom)] - bazaga murojaat yo'q."""
+        return [(i, self.names[i]) for i in self.similar.get(int(anime_id), ())]
+
+    async def load(self, pool):
+        """Oxirgi hisob natijasini jadvaldan xotiraga (startup)."""
+        self.similar, self.names, self.computed_at = await database.load_recommendations(pool)
+
+    async def rebuild(self, pool) -> int:
+        async with self._lock:
+            started = time.perf_counter()
+            self._changed.clear()
+            since = datetime.now(timezone.utc) - timedelta(days=RECOMMEND_EVENT_DAYS)
+            animes, links, interactions = await database.load_recommendation_inputs(
+                pool, since, (stats.EVENT_KINDS['view'], stats.EVENT_KINDS['download']))
+            # ~50k anime: bir necha soniya CPU - event loop to'xtab qolmasin
+            rows = await asyncio.get_running_loop().run_in_executor(
+                None, compute, animes, links, interactions, self.k)
+            await database.save_recommendations(pool, rows)
+            await self.load(pool)
+            # bo'sh katalog: jadvalda vaqt yo'q - run() darhol qayta hisoblab aylanib qolmasin
+            self.computed_at = self.computed_at or datetime.now(timezone.utc)
+            self.compute_seconds = time.perf_counter() - started
+            logger.info("recommendations: %d animes, %d interactions, %d rows in %.1fs",
+                        len(animes), len(interactions), len(rows), self.compute_seconds)
+            return len(rows)
+
+    async def run(self, pool):
+        """Har `interval` da, katalog o'zgarganda esa `min_gap` dan keyin qayta hisoblaydi."""
+        while True:
+            age = time.time() - self.computed_at.timestamp() if self.computed_at else self.interval
+            if age < self.interval:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=self.interval - age)
+                    await asyncio.sleep(max(self.min_gap - age, 0))
+                except asyncio.TimeoutError:
+                    pass
+            try:
+                await self.rebuild(pool)
+            except Exception as e:
+                logger.exception("recommendations rebuild failed: %s", e)
+                await asyncio.sleep(self.min_gap)
+
+    def stats(self) -> dict:
+        return {"animes": len(self.similar), "computed_at": self.computed_at,
+                "compute_s": round(self.compute_seconds, 1)}
+
+
+if __name__ == "__main__":
+    async def main():
+        pool = await database.create_pool()
+        await database.ensure_schema(pool)
+        n = await Recommender().rebuild(pool)
+        print(f"{n} recommendations written")
+        await pool.close()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
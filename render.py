@@ -0,0 +1,207 @@
+"""
+Post rasmlariga suv belgisi va anime kodi / deep-link qo'shish (Pillow).
+
+Rasm chizish ProcessPoolExecutor da bajariladi, event loop bloklanmaydi.
+Natija (manba file_id, shablon, kod) bo'yicha keshlanadi. Birinchi yuborishdan keyin
+Telegram qaytargan file_id ishlatiladi: qayta nashr qilish uchun yuklab olish,
+render va yuklash kerak emas.
+"""
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from aiogram.types import InputFile
+from aiogram.utils import exceptions
+
+logger = logging.getLogger(__name__)
+
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", "2"))
+WATERMARK_FONT = os.getenv("WATERMARK_FONT", "")  # .ttf yo'li; bo'lmasa Pillow standart shrifti
+
+# o'lchamlar rasm eniga nisbatan
+TEMPLATES = {
+    'default': {'mark_size': 0.08, 'mark_alpha': 70, 'angle': 30,
+                'text_size': 0.04, 'band': (0, 0, 0, 150), 'text': (255, 255, 255, 255)},
+    'corner': {'mark_size': 0.05, 'mark_alpha': 150, 'angle': 0,
+               'text_size': 0.035, 'band': (0, 0, 0, 110), 'text': (255, 255, 255, 255)},
+}
+
+
+def _font(size: int):
+    from PIL import ImageFont
+
+    if WATERMARK_FONT:
+        return ImageFont.truetype(WATERMARK_FONT, size)
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1
+        return ImageFont.load_default()
+
+
+def compose(data: bytes, template: str, watermark: str, code: str, link: str) -> bytes:
+    """Jarayonlar poolida ishlaydi: faqat bytes kiradi va chiqadi."""
+    from PIL import Image, ImageDraw
+
+    t = TEMPLATES[template]
+    img = Image.open(io.BytesIO(data)).convert("RGBA")
+    w, h = img.size
+    overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
+
+    if watermark:
+        font = _font(max(12, int(w * t['mark_size'])))
+        box = ImageDraw.Draw(overlay).textbbox((0, 0), watermark, font=font)
+        mark = Image.new("RGBA", (box[2] - box[0] + 8, box[3] - box[1] + 8), (0, 0, 0, 0))
+        ImageDraw.Draw(mark).text((4 - box[0], 4 - box[1]), watermark, font=font,
+                                  fill=(255, 255, 255, t['mark_alpha']))
+        mark = mark.rotate(t['angle'], expand=True)
+        if t['angle']:
+            pos = ((w - mark.width) // 2, (h - mark.height) // 2)
+        else:
+            pos = (w - mark.width - w // 40, h // 40)
+        overlay.alpha_composite(mark, (max(pos[0], 0), max(pos[1], 0)))
+
+    text = f"Kod: {code}" + (f"   {link}" if link else "")
+    font = _font(max(10, int(w * t['text_size'])))
+    draw = ImageDraw.Draw(overlay)
+    box = draw.textbbox((0, 0), text, font=font)
+    band = int((box[3] - box[1]) * 2.2)
+    draw.rectangle((0, h - band, w, h), fill=t['band'])
+    draw.text(((w - (box[2] - box[0])) // 2 - box[0], h - band + (band - (box[3] - box[1])) // 2 - box[1]),
+              text, font=font, fill=t['text'])
+
+    out = io.BytesIO()
+    Image.alpha_composite(img, overlay).convert("RGB").save(out, "JPEG", quality=90)
+    return out.getvalue()
+
+
+class RenderError(Exception):
+    """Post yuborilmagan: rasm tayyorlanmadi yoki Telegram uni qabul qilmadi - oddiy rasm yuborsa bo'ladi."""
+
+
+class PostRenderer:
+    """
+    send_photo() - keshda bo'lsa tayyor file_id ni yuboradi, aks holda rasmni
+    yuklab olib render qiladi, yuboradi va natija file_id sini eslab qoladi.
+    Bir xil post bir vaqtda ikki marta so'ralsa, render bitta.
+    """
+
+    def __init__(self, workers: int = RENDER_WORKERS, max_cached: int = 2000):
+        self.workers = workers
+        self.max_cached = max_cached
+        self._executor = None
+        self._cache = OrderedDict()  # (manba, shablon, kod) -> Telegram file_id
+        self._inflight = {}
+        self.renders = 0
+        self.hits = 0
+
+    @staticmethod
+    def key(source: str, template: str, watermark: str, code) -> tuple:
+        # suv belgisi matni shablonning bir qismi: kanal nomi o'zgarsa eski natija ishlatilmaydi
+        return source, f"{template}:{watermark}", str(code)
+
+    def _remember(self, key, file_id):
+        self._cache[key] = file_id
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_cached:
+            self._cache.popitem(last=False)
+
+    async def cached(self, pool, key):
+        file_id = self._cache.get(key)
+        if file_id is None and pool is not None:
+            async with pool.acquire() as conn:
+                file_id = await conn.fetchval(
+                    "SELECT file_id FROM rendered_posts WHERE source_file_id = $1 AND template = $2 AND code = $3",
+                    *key)
+            if file_id:
+                self._remember(key, file_id)
+        return file_id
+
+    async def store(self, pool, key, file_id: str):
+        self._remember(key, file_id)
+        if pool is None:
+            return
+        async with pool.acquire() as conn:
+            await conn.execute("""
+            INSERT INTO rendered_posts (source_file_id, template, code, file_id) VALUES ($1, $2, $3, $4)
+            ON CONFLICT (source_file_id, template, code) DO UPDATE SET file_id = EXCLUDED.file_id
+            """, *key, file_id)
+
+    async def render(self, bot, source: str, template: str, watermark: str, code, link: str) -> bytes:
+        key = self.key(source, template, watermark, code)
+        fut = self._inflight.get(key)
+        if fut is None:
+            fut = asyncio.ensure_future(self._render(bot, source, template, watermark, str(code), link))
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(fut)
+
+    async def _render(self, bot, source, template, watermark, code, link) -> bytes:
+        data = (await bot.download_file_by_id(source)).getvalue()
+        if self._executor is None:
+            # spawn: fork event loop va aiosqlite oqimlari bilan xavfsiz emas
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        self.renders += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, compose, data, template, watermark, code, link)
+
+    async def send_photo(self, bot, pool, chat_id, source: str, code, *, watermark: str = "",
+                         template: str = 'default', **kwargs):
+        """
+        Yuborishdan oldingi xatolar (kesh, yuklab olish, render, Telegram rad etgan rasm) -
+        RenderError. Yuborilgandan keyingi (file_id ni saqlash) xato post ni qayta yubortirmaydi.
+        """
+        key = self.key(source, template, watermark, code)
+        try:
+            file_id = await self.cached(pool, key)
+            if file_id:
+                self.hits += 1
+                photo = file_id
+            else:
+                me = await bot.me
+                link = f"t.me/{me.username}?start={code}" if me.username else ""
+                data = await self.render(bot, source, template, watermark, code, link)
+                # parallel yuborishda ikkinchisi birinchisining file_id sini olgan bo'lishi mumkin
+                file_id = self._cache.get(key)
+                photo = file_id or InputFile(io.BytesIO(data), filename=f"post_{code}.jpg")
+        except Exception as e:
+            raise RenderError(e) from e
+        try:
+            msg = await bot.send_photo(chat_id, photo, **kwargs)
+        except exceptions.BadRequest as e:
+            # javob keldi va rad etildi - post yuborilmagan; tarmoq xatosi / RetryAfter esa yuqoriga
+            raise RenderError(e) from e
+        if not file_id:
+            try:
+                await self.store(pool, key, msg.photo[-1].file_id)
+            except Exception as e:
+                logger.warning("rendered post file_id not saved: %s", e)
+        return msg
+
+    def stats(self) -> dict:
+        return {"renders": self.renders, "hits": self.hits, "cached": len(self._cache)}
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+if __name__ == "__main__":
+    # python render.py rasm.jpg 123 [shablon] -> rasm.rendered.jpg
+    import sys
+    import time
+
+    src, code = sys.argv[1], sys.argv[2]
+    template = sys.argv[3] if len(sys.argv) > 3 else 'default'
+    with open(src, 'rb') as f:
+        raw = f.read()
+    started = time.perf_counter()
+    result = compose(raw, template, "@anime_kanal", code, f"t.me/anime_bot?start={code}")
+    out_path = os.path.splitext(src)[0] + ".rendered.jpg"
+    with open(out_path, 'wb') as f:
+        f.write(result)
+    print(f"{out_path}: {len(result) // 1024} KB, {(time.perf_counter() - started) * 1000:.0f} ms")
@@ -0,0 +1,111 @@
+import logging
+import os
+
+import database
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "roles_changed"
+ROLES = ('owner', 'admin', 'moderator')
+
+
+class RoleService:
+    """
+    roles jadvalining xotiradagi nusxasi (frozenset lar).
+    Tekshiruv - oddiy `in`, I/O yo'q; faqat rol o'zgarganda qayta yuklanadi.
+    """
+
+    def __init__(self, owner_id: str = ""):
+        self.owner_id = str(owner_id) if str(owner_id).isdigit() else ""
+        self._apply([])
+
+    def _apply(self, rows):
+        owners = {r['user_id'] for r in rows if r['role'] == 'owner'}
+        admins = {r['user_id'] for r in rows if r['role'] == 'admin'}
+        moderators = {r['user_id'] for r in rows if r['role'] == 'moderator'}
+        if self.owner_id:
+            owners.add(int(self.owner_id))
+        self.owners = frozenset(owners)
+        self.admins = frozenset(owners | admins)
+        self.moderators = frozenset(owners | admins | moderators)
+
+    def is_owner(self, user_id: int) -> bool:
+        return user_id in self.owners
+
+    def is_admin(self, user_id: int) -> bool:
+        return user_id in self.admins
+
+    def is_moderator(self, user_id: int) -> bool:
+        return user_id in self.moderators
+
+    def role_of(self, user_id: int):
+        if user_id in self.owners:
+            return 'owner'
+        if user_id in self.admins:
+            return 'admin'
+        if user_id in self.moderators:
+            return 'moderator'
+        return None
+
+    async def load(self, pool):
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("SELECT user_id, role FROM roles")
+        if not rows:
+            # birinchi ishga tushish: admins.txt ro'yxatidan
+            admins = read_legacy_admins()
+            if admins or self.owner_id:
+                await self.import_legacy(pool, admins)
+                async with pool.acquire() as conn:
+                    rows = await conn.fetch("SELECT user_id, role FROM roles")
+        self._apply(rows)
+
+    async def set_role(self, pool, user_id: int, role: str):
+        if role not in ROLES:
+            raise ValueError(role)
+        async with pool.acquire() as conn:
+            if database.is_sqlite(pool):
+                await conn.execute("""
+                INSERT INTO roles (user_id, role) VALUES ($1, $2)
+                ON CONFLICT (user_id) DO UPDATE SET role = EXCLUDED.role
+                """, int(user_id), role)
+            else:
+                await conn.execute("""
+                WITH up AS (
+                    INSERT INTO roles (user_id, role) VALUES ($1, $2)
+                    ON CONFLICT (user_id) DO UPDATE SET role = EXCLUDED.role
+                    RETURNING user_id
+                )
+                SELECT pg_notify($3, user_id::text) FROM up
+                """, int(user_id), role, CHANNEL)
+        await self.load(pool)
+
+    async def remove(self, pool, user_id: int) -> bool:
+        async with pool.acquire() as conn:
+            if database.is_sqlite(pool):
+                res = await conn.execute("DELETE FROM roles WHERE user_id = $1 AND role <> 'owner'", int(user_id))
+            else:
+                res = await conn.execute("""
+                WITH del AS (DELETE FROM roles WHERE user_id = $1 AND role <> 'owner' RETURNING user_id)
+                SELECT pg_notify($2, user_id::text) FROM del
+                """, int(user_id), CHANNEL)
+        await self.load(pool)
+        return res.split()[-1] != "0"
+
+    async def import_legacy(self, pool, admins) -> int:
+        """Bir martalik: ADMIN_ID -> owner, eski admins.txt ro'yxati -> admin."""
+        rows = [(int(a), 'admin') for a in admins if str(a).isdigit()]
+        if self.owner_id:
+            rows.append((int(self.owner_id), 'owner'))
+        async with pool.acquire() as conn:
+            await conn.executemany("""
+            INSERT INTO roles (user_id, role) VALUES ($1, $2)
+            ON CONFLICT (user_id) DO NOTHING
+            """, rows)
+        return len(rows)
+
+
+def read_legacy_admins(path: str = "admin/admins.txt") -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return [s.strip() for s in f.read().splitlines() if s.strip()]
@@ -0,0 +1,197 @@
+"""
+Bot sozlamalari: bitta `settings` jadvali + har bir jarayonda xotiradagi nusxa.
+O'zgarish LISTEN/NOTIFY orqali barcha replikalarga tarqaladi.
+
+    python settings.py import   # admin/*.txt, tugma/*.txt, ... fayllardan bir martalik import
+"""
+import asyncio
+import json
+import logging
+import os
+
+import asyncpg
+
+import database
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "settings_changed"
+
+DEFAULT_TOGGLES = {
+    "anime_yuklash": True,
+    "anime_ozgartirish": True,
+    "statistika": True,
+    "post_yaratish": True,
+    "habar_tarqatish": True,
+    "sozlamalar": True,
+    "anime_royxati": True
+}
+
+# kalit -> (standart qiymat, eski fayl)
+DEFAULTS = {
+    'valyuta': ("so'm", 'admin/valyuta.txt'),
+    'vip_narx': (25000, 'admin/vip.txt'),
+    'referal_bonus': (0, 'admin/referal.txt'),
+    'holat': ("Yoqilgan", 'admin/holat.txt'),
+    'anime_kanal': ("@username", 'admin/anime_kanal.txt'),
+    'protect_content': (False, 'tizim/content.txt'),
+    'start_text': ("✨ Assalomu alaykum! Botga xush kelibsiz.", 'matn/start.txt'),
+    'keys': (["🔎 Anime izlash", "💎 VIP", "💰 Hisobim", "➕ Pul kiritish",
+              "📚 Qo'llanma", "💵 Reklama va Homiylik"], 'tugma/key{}.txt'),
+    'toggles': (DEFAULT_TOGGLES, 'sozlamalar.json'),
+}
+
+
+class SettingsService:
+    """
+    Handlerlar oddiy atributlarni o'qiydi (settings.valyuta, settings.keys ...),
+    fayl yoki baza so'rovi yo'q.
+    """
+
+    def __init__(self):
+        self._listener = None
+        self._subscriptions = {}
+        self.apply({})
+
+    def subscribe(self, channel: str, reload):
+        # boshqa xizmatlar (masalan roles) ham shu LISTEN ulanishidan foydalanadi
+        self._subscriptions[channel] = reload
+
+    def apply(self, values: dict):
+        self._values = dict(values)
+        get = lambda k: values.get(k, DEFAULTS[k][0])
+        self.valyuta = str(get('valyuta'))
+        self.vip_narx = int(get('vip_narx'))
+        self.referal_bonus = int(get('referal_bonus'))
+        self.holat = str(get('holat'))
+        self.anime_kanal = str(get('anime_kanal'))
+        self.protect_content = bool(get('protect_content'))
+        self.start_text = str(get('start_text'))
+        self.keys = tuple(get('keys'))
+        self.toggles = dict(get('toggles'))
+
+    async def load(self, pool):
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("SELECT key, value FROM settings")
+        if not rows:
+            # birinchi ishga tushish: eski fayllardan ko'chiramiz
+            await import_files(pool)
+            async with pool.acquire() as conn:
+                rows = await conn.fetch("SELECT key, value FROM settings")
+        self.apply({r['key']: json.loads(r['value']) for r in rows})
+
+    async def set(self, pool, key: str, value):
+        if key not in DEFAULTS:
+            raise KeyError(key)
+        async with pool.acquire() as conn:
+            if database.is_sqlite(pool):
+                # bitta jarayon: xabar beradigan boshqa replika yo'q
+                await conn.execute("""
+                INSERT INTO settings (key, value, updated_at) VALUES ($1, $2, now())
+                ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = now()
+                """, key, json.dumps(value, ensure_ascii=False))
+            else:
+                # yozish va NOTIFY bitta tranzaksiyada: commitdan keyin boshqa replikalar oladi
+                await conn.execute("""
+                WITH up AS (
+                    INSERT INTO settings (key, value, updated_at) VALUES ($1, $2::jsonb, now())
+                    ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value, updated_at = now()
+                    RETURNING key
+                )
+                SELECT pg_notify($3, key) FROM up
+                """, key, json.dumps(value, ensure_ascii=False), CHANNEL)
+        values = dict(self._values)
+        values[key] = value
+        self.apply(values)
+
+    async def listen(self, pool, check_interval: float = 30.0):
+        """Alohida ulanishda LISTEN; ulanish uzilsa qayta ulanib, to'liq qayta yuklaydi."""
+
+        reloads = dict(self._subscriptions, **{CHANNEL: self.load})
+
+        def on_notify(conn, pid, channel, payload):
+            asyncio.ensure_future(self._reload_safe(reloads[channel], pool))
+
+        try:
+            while True:
+                try:
+                    self._listener = await database.connect()
+                    for channel in reloads:
+                        await self._listener.add_listener(channel, on_notify)
+                    # uzilish paytida o'tkazib yuborilgan xabarlar uchun to'liq qayta yuklash
+                    for reload in reloads.values():
+                        await reload(pool)
+                    while not self._listener.is_closed():
+                        await asyncio.sleep(check_interval)
+                    logger.warning("settings listener connection closed, reconnecting")
+                except (OSError, asyncio.TimeoutError, asyncpg.PostgresError) as e:
+                    logger.warning("settings listener error: %s", e)
+                    await asyncio.sleep(5)
+        finally:
+            if self._listener and not self._listener.is_closed():
+                await self._listener.close()
+
+    @staticmethod
+    async def _reload_safe(reload, pool):
+        try:
+            await reload(pool)
+        except Exception as e:
+            logger.exception("settings reload failed: %s", e)
+
+
+def read_legacy_files() -> dict:
+    def read(path):
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        return None
+
+    values = {}
+    for key in ('valyuta', 'holat', 'anime_kanal', 'start_text'):
+        text = read(DEFAULTS[key][1])
+        if text:
+            values[key] = text
+    for key in ('vip_narx', 'referal_bonus'):
+        number = read(DEFAULTS[key][1])
+        if number and number.isdigit():
+            values[key] = int(number)
+    content = read(DEFAULTS['protect_content'][1])
+    if content:
+        values['protect_content'] = content == 'true'
+    keys = [read(DEFAULTS['keys'][1].format(i)) for i in range(1, 7)]
+    values['keys'] = [k or d for k, d in zip(keys, DEFAULTS['keys'][0])]
+    toggles = read(DEFAULTS['toggles'][1])
+    if toggles:
+        try:
+            values['toggles'] = json.loads(toggles)
+        except ValueError:
+            logger.warning("sozlamalar.json is not valid JSON, skipped")
+    return values
+
+
+async def import_files(pool) -> int:
+    """Eski fayllardan import; bazada bor kalitlar o'zgartirilmaydi."""
+    values = read_legacy_files()
+    async with pool.acquire() as conn:
+        await conn.executemany("""
+        INSERT INTO settings (key, value) VALUES ($1, $2::jsonb)
+        ON CONFLICT (key) DO NOTHING
+        """, [(k, json.dumps(v, ensure_ascii=False)) for k, v in values.items()])
+    return len(values)
+
+
+if __name__ == "__main__":
+    import sys
+
+    async def main():
+        pool = await database.create_pool()
+        await database.init_tables(pool)
+        try:
+            if sys.argv[1:] == ["import"]:
+                print(f"✅ {await import_files(pool)} ta sozlama import qilindi")
+            else:
+                print("Foydalanish: python settings.py import")
+        finally:
+            await pool.close()
+
+    asyncio.run(main())
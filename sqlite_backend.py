@@ -0,0 +1,438 @@
+"""
+Bitta serverli o'rnatishlar uchun SQLite (WAL) backend: PostgreSQL serveri kerak emas.
+
+    DB_BACKEND=sqlite DB_SQLITE_PATH=anime_bot.db python main.py
+
+database.py dagi funksiyalar asyncpg pool interfeysini kutadi (`acquire()`, `fetch`,
+`fetchrow`, `fetchval`, `execute`, `executemany`, `transaction()`). SqlitePool shu
+interfeysni aiosqlite ustida beradi: bitta yozuvchi ulanish (navbat bilan) va
+`readers` - faqat o'qiydigan ulanishlar pooli. WAL rejimida o'quvchilar yozuvchini
+kutmaydi va har doim oxirgi commit ni ko'radi.
+"""
+import asyncio
+import json
+import os
+import re
+import sqlite3
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from urllib.parse import quote
+
+_PARAM = re.compile(r"\$(\d+)")
+_CAST = re.compile(r"::\w+(\[\])?")
+
+
+@lru_cache(maxsize=512)
+def translate(sql: str) -> str:
+    # $1 -> ?1; PostgreSQL kastlari ($2::jsonb, qism::int) SQLite da kerak emas
+    return _CAST.sub("", _PARAM.sub(r"?\1", sql))
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(sep=" ")
+
+
+class Connection:
+    """aiosqlite ulanishi ustidagi asyncpg-ga o'xshash qobiq."""
+
+    def __init__(self, db, writer: bool):
+        self._db = db
+        self.writer = writer
+        self._depth = 0
+
+    async def execute(self, sql: str, *args, timeout: float = None) -> str:
+        async with self._db.execute(translate(sql), args) as cur:
+            n = max(cur.rowcount, 0)
+        verb = sql.lstrip().split(None, 1)[0].upper()
+        # asyncpg kabi holat satri: "UPDATE 3", "INSERT 0 1"
+        return f"INSERT 0 {n}" if verb == "INSERT" else f"{verb} {n}"
+
+    async def executescript(self, script: str):
+        await self._db.executescript(script)
+
+    async def executemany(self, sql: str, args, timeout: float = None):
+        if self._depth:
+            await self._db.executemany(translate(sql), args)
+            return
+        # har qator uchun alohida commit bo'lmasin
+        async with self.transaction():
+            await self._db.executemany(translate(sql), args)
+
+    async def fetch(self, sql: str, *args, timeout: float = None) -> list:
+        async with self._db.execute(translate(sql), args) as cur:
+            return await cur.fetchall()
+
+    async def fetchrow(self, sql: str, *args, timeout: float = None):
+        async with self._db.execute(translate(sql), args) as cur:
+            return await cur.fetchone()
+
+    async def fetchval(self, sql: str, *args, column: int = 0, timeout: float = None):
+        row = await self.fetchrow(sql, *args)
+        return None if row is None else row[column]
+
+    async def copy_records_to_table(self, table: str, *, records, columns, **kwargs) -> str:
+        records = list(records)
+        marks = ", ".join(f"${i}" for i in range(1, len(columns) + 1))
+        await self.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({marks})", records)
+        return f"COPY {len(records)}"
+
+    def transaction(self):
+        return _Transaction(self)
+
+
+class _Transaction:
+    def __init__(self, conn: Connection):
+        self._conn = conn
+
+    async def __aenter__(self):
+        conn = self._conn
+        if conn._depth:
+            await conn._db.execute(f"SAVEPOINT sp{conn._depth}")
+        else:
+            # IMMEDIATE: yozish qulfi boshidanoq olinadi, o'rtada SQLITE_BUSY bo'lmaydi
+            await conn._db.execute("BEGIN IMMEDIATE" if conn.writer else "BEGIN")
+        conn._depth += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        conn = self._conn
+        conn._depth -= 1
+        if conn._depth:
+            name = f"sp{conn._depth}"
+            if exc_type:
+                await conn._db.execute(f"ROLLBACK TO {name}")
+            await conn._db.execute(f"RELEASE {name}")
+        else:
+            await conn._db.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+class ReaderPool:
+    """Faqat o'qish ulanishlari; acquire() bo'sh ulanishni kutadi."""
+
+    def __init__(self):
+        self._free = asyncio.Queue()
+        self._all = []
+
+    def add(self, conn: Connection):
+        self._all.append(conn)
+        self._free.put_nowait(conn)
+
+    @property
+    def size(self) -> int:
+        return len(self._all)
+
+    @asynccontextmanager
+    async def acquire(self):
+        conn = await self._free.get()
+        try:
+            yield conn
+        finally:
+            self._free.put_nowait(conn)
+
+    async def close(self):
+        for conn in self._all:
+            await conn._db.close()
+        self._all = []
+
+
+class SqlitePool:
+    """
+    acquire() - yagona yozuvchi ulanish. Bir vaqtda bitta vazifa ushlaydi, aks holda
+    bir vazifaning tranzaksiyasiga boshqasining so'rovlari aralashib ketadi.
+    Shu vazifa ichidagi ichma-ich acquire() o'sha ulanishni qaytaradi.
+    """
+
+    def __init__(self, path: str, readers: int = 4):
+        self.path = path
+        self.reader_count = readers if path != ":memory:" else 0
+        self.readers = self
+        self._writer = None
+        self._lock = asyncio.Lock()
+        self._owner = None
+
+    async def open(self):
+        import aiosqlite
+
+        db = await aiosqlite.connect(self.path, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        await db.execute("PRAGMA journal_mode = WAL")
+        # WAL + NORMAL: commit fsync qilmaydi, checkpoint qiladi (quvvat uzilsa oxirgi commitlar yo'qolishi mumkin)
+        await db.execute("PRAGMA synchronous = NORMAL")
+        await db.execute("PRAGMA busy_timeout = 5000")
+        await db.create_function("now", 0, _now)
+        self._writer = Connection(db, writer=True)
+
+        if self.reader_count:
+            self.readers = ReaderPool()
+            uri = "file:" + quote(os.path.abspath(self.path)) + "?mode=ro"
+            for _ in range(self.reader_count):
+                rdb = await aiosqlite.connect(uri, uri=True, isolation_level=None)
+                rdb.row_factory = sqlite3.Row
+                await rdb.execute("PRAGMA busy_timeout = 5000")
+                self.readers.add(Connection(rdb, writer=False))
+        return self
+
+    @asynccontextmanager
+    async def acquire(self):
+        task = asyncio.current_task()
+        if self._owner is task:
+            yield self._writer
+            return
+        async with self._lock:
+            self._owner = task
+            try:
+                yield self._writer
+            finally:
+                self._owner = None
+
+    async def close(self):
+        if self.readers is not self:
+            await self.readers.close()
+        if self._writer:
+            await self._writer._db.close()
+            self._writer = None
+
+
+async def create_pool(path: str, readers: int = 4) -> SqlitePool:
+    return await SqlitePool(path, readers).open()
+
+
+# database.init_tables dagi sxema; SERIAL -> INTEGER PRIMARY KEY, JSONB/TIMESTAMPTZ -> TEXT
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS anime_datas (
+    data_id INTEGER PRIMARY KEY,
+    id TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    qism TEXT NOT NULL,
+    sana TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS anime_datas_anime_qism_uq ON anime_datas (id, qism);
+CREATE TABLE IF NOT EXISTS animelar (
+    id INTEGER PRIMARY KEY,
+    nom TEXT NOT NULL,
+    rams TEXT NOT NULL,
+    qismi TEXT NOT NULL,
+    davlat TEXT NOT NULL,
+    tili TEXT NOT NULL,
+    yili TEXT NOT NULL,
+    janri TEXT NOT NULL,
+    qidiruv INTEGER NOT NULL,
+    sana TEXT NOT NULL,
+    aniType TEXT,
+    "like" INTEGER DEFAULT 0,
+    deslike INTEGER DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS animelar_nom_id_idx ON animelar (nom, id);
+CREATE INDEX IF NOT EXISTS animelar_qidiruv_id_idx ON animelar (qidiruv, id);
+CREATE TABLE IF NOT EXISTS channels (
+    id INTEGER PRIMARY KEY,
+    channelId TEXT NOT NULL,
+    channelType TEXT NOT NULL,
+    channelLink TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS joinRequests (
+    id INTEGER PRIMARY KEY,
+    channelId TEXT NOT NULL,
+    userId TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS joinrequests_user_channel_idx ON joinRequests (userId, channelId);
+CREATE UNIQUE INDEX IF NOT EXISTS joinrequests_channel_user_uq ON joinRequests (channelId, userId);
+CREATE TABLE IF NOT EXISTS kabinet (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    pul TEXT NOT NULL,
+    pul2 TEXT NOT NULL,
+    odam TEXT NOT NULL,
+    ban TEXT NOT NULL
+);
+-- eski fayllardagi takroriy qatorlar: birinchisi qoladi (database.init_tables kabi)
+DELETE FROM kabinet WHERE id NOT IN (SELECT MIN(id) FROM kabinet GROUP BY user_id);
+DROP INDEX IF EXISTS kabinet_user_idx;
+CREATE UNIQUE INDEX IF NOT EXISTS kabinet_user_uq ON kabinet (user_id);
+CREATE TABLE IF NOT EXISTS send (
+    send_id INTEGER PRIMARY KEY,
+    time1 TEXT NOT NULL,
+    time2 TEXT NOT NULL,
+    start_id TEXT NOT NULL,
+    stop_id TEXT NOT NULL,
+    admin_id TEXT NOT NULL,
+    message_id TEXT NOT NULL,
+    reply_markup TEXT NOT NULL,
+    step TEXT NOT NULL,
+    time3 TEXT NOT NULL,
+    time4 TEXT NOT NULL,
+    time5 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS status (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    kun TEXT NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS status_user_idx ON status (user_id);
+CREATE TABLE IF NOT EXISTS user_id (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    refid TEXT,
+    sana TEXT NOT NULL
+);
+DELETE FROM user_id WHERE id NOT IN (SELECT MIN(id) FROM user_id GROUP BY user_id);
+DROP INDEX IF EXISTS user_id_user_idx;
+CREATE UNIQUE INDEX IF NOT EXISTS user_id_user_uq ON user_id (user_id);
+CREATE INDEX IF NOT EXISTS user_id_refid_idx ON user_id (refid) WHERE refid IS NOT NULL;
+CREATE TABLE IF NOT EXISTS referral_leaderboard (
+    user_id TEXT PRIMARY KEY,
+    referrals INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    kind INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    anime_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS daily_stats (
+    day TEXT NOT NULL,
+    kind INTEGER NOT NULL,
+    events INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, kind)
+);
+CREATE TABLE IF NOT EXISTS daily_users (
+    day TEXT PRIMARY KEY,
+    hll BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rollup_state (
+    name TEXT PRIMARY KEY,
+    last_id INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO rollup_state (name, last_id) VALUES ('events', 0);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS roles (
+    user_id INTEGER PRIMARY KEY,
+    role TEXT NOT NULL CHECK (role IN ('owner', 'admin', 'moderator')),
+    added_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS rendered_posts (
+    source_file_id TEXT NOT NULL,
+    template TEXT NOT NULL,
+    code TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (source_file_id, template, code)
+);
+CREATE TABLE IF NOT EXISTS genres (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS anime_genres (
+    anime_id INTEGER NOT NULL,
+    genre_id INTEGER NOT NULL,
+    PRIMARY KEY (anime_id, genre_id)
+);
+CREATE INDEX IF NOT EXISTS anime_genres_genre_idx ON anime_genres (genre_id);
+CREATE TABLE IF NOT EXISTS votes (
+    user_id INTEGER NOT NULL,
+    anime_id INTEGER NOT NULL,
+    value INTEGER NOT NULL CHECK (value IN (-1, 1)),
+    voted_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, anime_id)
+);
+CREATE TABLE IF NOT EXISTS recommendations (
+    anime_id INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    similar_id INTEGER NOT NULL,
+    score REAL NOT NULL,
+    computed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (anime_id, rank)
+);
+CREATE TABLE IF NOT EXISTS trending (
+    anime_id INTEGER PRIMARY KEY,
+    score REAL NOT NULL,
+    landmark REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS subscriptions (
+    anime_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (anime_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS subscriptions_user_idx ON subscriptions (user_id);
+CREATE TABLE IF NOT EXISTS watch_progress (
+    user_id INTEGER PRIMARY KEY,
+    anime_id INTEGER NOT NULL,
+    episode INTEGER NOT NULL,
+    updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+async def init_tables(pool: SqlitePool, counted_tables):
+    async with pool.acquire() as conn:
+        await conn.executescript(SCHEMA)
+        async with conn.transaction():
+            for table in counted_tables:
+                # SQLite da transition table yo'q: qator darajasidagi triggerlar
+                await conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_count_ins AFTER INSERT ON {table}
+                BEGIN UPDATE counters SET value = value + 1 WHERE name = '{table}'; END
+                """)
+                await conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_count_del AFTER DELETE ON {table}
+                BEGIN UPDATE counters SET value = value - 1 WHERE name = '{table}'; END
+                """)
+                await conn.execute(
+                    f"INSERT OR IGNORE INTO counters (name, value) SELECT '{table}', COUNT(*) FROM {table}")
+
+
+async def ensure_user(pool: SqlitePool, user_id: int, sana: str, ref: str = None, bonus: int = 0) -> bool:
+    # PostgreSQL da bitta CTE so'rov; bu yerda bitta tranzaksiya (yozuvchi yagona)
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            if ref is not None and not await conn.fetchval("SELECT 1 FROM user_id WHERE user_id = $1", ref):
+                ref = None
+            res = await conn.execute("INSERT INTO user_id (user_id, status, refid, sana) VALUES ($1, 'Oddiy', $2, $3) "
+                                     "ON CONFLICT (user_id) DO NOTHING", str(user_id), ref, sana)
+            if res == "INSERT 0 0":
+                return False
+            await conn.execute("INSERT INTO kabinet (user_id, pul, pul2, odam, ban) VALUES ($1, '0', '0', '0', 'unban') "
+                               "ON CONFLICT (user_id) DO NOTHING", str(user_id))
+            if ref is not None:
+                await conn.execute("""
+                UPDATE kabinet SET odam = CAST(CAST(odam AS INTEGER) + 1 AS TEXT),
+                                   pul = CAST(CAST(pul AS INTEGER) + $2 AS TEXT)
+                WHERE user_id = $1
+                """, ref, int(bonus))
+    return True
+
+
+async def add_episodes(pool: SqlitePool, anime_id: int, file_ids: list, sana: str) -> list:
+    # yozuvchi yagona va BEGIN IMMEDIATE: advisory lock shart emas
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            base = await conn.fetchval(
+                "SELECT COALESCE(MAX(CAST(qism AS INTEGER)), 0) FROM anime_datas WHERE id = $1", str(anime_id))
+            eps = [base + n for n in range(1, len(file_ids) + 1)]
+            await conn.executemany(
+                "INSERT INTO anime_datas (id, file_id, qism, sana) VALUES ($1, $2, $3, $4)",
+                [(str(anime_id), f, str(ep), sana) for f, ep in zip(file_ids, eps)])
+    return eps
+
+
+async def get_join_requested(pool: SqlitePool, user_id: int, channel_ids: list) -> set:
+    async with pool.readers.acquire() as conn:
+        rows = await conn.fetch(
+            "SELECT channelId AS channel_id FROM joinRequests "
+            "WHERE userId = $1 AND channelId IN (SELECT value FROM json_each($2))",
+            str(user_id), json.dumps([str(c) for c in channel_ids]))
+    return {r['channel_id'] for r in rows}
@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import database
+
+logger = logging.getLogger(__name__)
+
+STATS_TZ = os.getenv("STATS_TZ", "Asia/Tashkent")
+
+# SQLite: hodisalar yozilmaydi (rollup PostgreSQL ga xos) - nollar o'rniga shu javob
+UNAVAILABLE = "ℹ️ Faollik statistikasi SQLite bazada yuritilmaydi (faqat PostgreSQL)."
+
+# events.kind qiymatlari
+EVENT_KINDS = {'join': 1, 'search': 2, 'view': 3, 'download': 4}
+KIND_NAMES = {v: k for k, v in EVENT_KINDS.items()}
+
+
+# --- HyperLogLog: kunlik faol foydalanuvchilar taxmini (~1.6% xato) ---
+class HyperLogLog:
+    P = 12
+    M = 1 << P
+
+    def __init__(self, registers: bytes = None):
+        self.registers = bytearray(registers) if registers else bytearray(self.M)
+
+    def add(self, value):
+        h = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+        idx = h >> (64 - self.P)
+        rest = h & ((1 << (64 - self.P)) - 1)
+        rank = (64 - self.P) - rest.bit_length() + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        m = self.M
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return bytes(self.registers)
+
+
+class EventLog:
+    """
+    Faollik hodisalari (join, search, view, download) xotirada yig'iladi va
+    events jadvaliga COPY bilan yoziladi. Rollup ularni kunlik qatorlarga yig'adi.
+    """
+
+    def __init__(self, flush_interval: float = 2.0, rollup_interval: float = 60.0, max_pending: int = 500_000):
+        self.flush_interval = flush_interval
+        self.rollup_interval = rollup_interval
+        self.max_pending = max_pending
+        self.enabled = True
+        self._pending = []
+        self.dropped = 0
+        self._observers = []
+
+    def subscribe(self, callback):
+        """callback(kind, user_id, anime_id) - har hodisada, enabled dan qat'i nazar (trending.py)."""
+        self._observers.append(callback)
+        return callback
+
+    def record(self, kind: str, user_id: int, anime_id: int = None):
+        for callback in self._observers:
+            callback(kind, user_id, anime_id)
+        if not self.enabled:
+            return
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+            return
+        self._pending.append((datetime.now().astimezone(), EVENT_KINDS[kind], int(user_id), anime_id))
+
+    async def flush(self, pool) -> int:
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, []
+        try:
+            async with pool.acquire() as conn:
+                await conn.copy_records_to_table('events', records=batch,
+                                                 columns=['ts', 'kind', 'user_id', 'anime_id'])
+        except Exception as e:
+            logger.exception("events flush failed: %s", e)
+            self._pending[:0] = batch
+            return 0
+        return len(batch)
+
+    async def run(self, pool):
+        last_rollup = 0.0
+        try:
+            while True:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush(pool)
+                if time.monotonic() - last_rollup >= self.rollup_interval:
+                    try:
+                        await rollup(pool)
+                    except Exception as e:
+                        logger.exception("stats rollup failed: %s", e)
+                    last_rollup = time.monotonic()
+        except asyncio.CancelledError:
+            await self.flush(pool)
+            raise
+
+
+async def rollup(pool, batch_size: int = 100_000) -> int:
+    """
+    events dagi yangi qatorlarni daily_stats va daily_users ga qo'shadi. Tarixni qayta
+    o'qimaydi: rollup_state - (last_xid, last_id) bo'yicha kursor. Faqat xid i barcha ochiq
+    tranzaksiyalardan kichik (pg_snapshot_xmin) qatorlar olinadi: ular commit bo'lgan, bundan
+    keyin kursordan oldinga hech qanday qator tushmaydi (kech commit bo'lgan id lar ham).
+    Qo'shilgan hodisalar soni qaytadi.
+    """
+    total = 0
+    while True:
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                state = await conn.fetchrow(
+                    "SELECT last_xid::text AS xid, last_id FROM rollup_state WHERE name = 'events' FOR UPDATE")
+                last = (state['xid'], state['last_id'])
+                upto = await conn.fetchrow("""
+                SELECT xid::text AS xid, id FROM (
+                    SELECT xid, id FROM events
+                    WHERE (xid, id) > ($1::text::xid8, $2)
+                      AND xid < pg_snapshot_xmin(pg_current_snapshot())
+                    ORDER BY xid, id LIMIT $3
+                ) t ORDER BY xid DESC, id DESC LIMIT 1
+                """, *last, batch_size)
+                if not upto:
+                    return total
+                batch = """
+                FROM events WHERE (xid, id) > ($1::text::xid8, $2) AND (xid, id) <= ($3::text::xid8, $4)
+                """
+                added = await conn.fetchval(f"""
+                WITH counts AS (
+                    SELECT (ts AT TIME ZONE $5)::date AS day, kind, COUNT(*) AS n {batch}
+                    GROUP BY 1, 2
+                ), merged AS (
+                    INSERT INTO daily_stats (day, kind, events) SELECT day, kind, n FROM counts
+                    ON CONFLICT (day, kind) DO UPDATE SET events = daily_stats.events + EXCLUDED.events
+                )
+                SELECT COALESCE(SUM(n), 0) FROM counts
+                """, *last, upto['xid'], upto['id'], STATS_TZ)
+
+                rows = await conn.fetch(f"""
+                SELECT DISTINCT (ts AT TIME ZONE $5)::date AS day, user_id {batch}
+                """, *last, upto['xid'], upto['id'], STATS_TZ)
+                sketches = {}
+                for r in rows:
+                    sketches.setdefault(r['day'], HyperLogLog()).add(r['user_id'])
+                old = await conn.fetch("SELECT day, hll FROM daily_users WHERE day = ANY($1::date[])", list(sketches))
+                for r in old:
+                    sketches[r['day']].merge(HyperLogLog(r['hll']))
+                await conn.executemany("""
+                INSERT INTO daily_users (day, hll) VALUES ($1, $2)
+                ON CONFLICT (day) DO UPDATE SET hll = EXCLUDED.hll
+                """, [(day, h.to_bytes()) for day, h in sketches.items()])
+
+                await conn.execute("""
+                UPDATE rollup_state SET last_xid = $1::text::xid8, last_id = $2 WHERE name = 'events'
+                """, upto['xid'], upto['id'])
+                total += int(added)
+
+
+def period_start(period: str):
+    today = datetime.now(ZoneInfo(STATS_TZ)).date()
+    if period == 'day':
+        return today
+    if period == 'week':
+        return today - timedelta(days=6)
+    return today.replace(day=1)
+
+
+async def summary(pool, period: str) -> dict:
+    """Tayyor kunlik qatorlardan o'qiydi: oyiga ko'pi bilan ~31 qator."""
+    start = period_start(period)
+    async with database.reader(pool).acquire() as conn:
+        counts = await conn.fetch(
+            "SELECT kind, SUM(events) AS n FROM daily_stats WHERE day >= $1 GROUP BY kind", start)
+        sketches = await conn.fetch("SELECT hll FROM daily_users WHERE day >= $1", start)
+    result = {name: 0 for name in EVENT_KINDS}
+    for r in counts:
+        result[KIND_NAMES[r['kind']]] = int(r['n'])
+    users = HyperLogLog()
+    for r in sketches:
+        users.merge(HyperLogLog(r['hll']))
+    result['active'] = users.count() if sketches else 0
+    return result
+
+
+def format_summary(title: str, s: dict) -> str:
+    return (f"{title}\n\n"
+            f"👥 Faol foydalanuvchilar: <b>{s['active']}</b>\n"
+            f"🆕 Yangi foydalanuvchilar: <b>{s['join']}</b>\n"
+            f"🔍 Qidiruvlar: <b>{s['search']}</b>\n"
+            f"👁 Ko'rishlar: <b>{s['view']}</b>\n"
+            f"📥 Yuklab olishlar: <b>{s['download']}</b>")
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from aiogram import types
+from aiogram.dispatcher.handler import CancelHandler
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.utils import exceptions
+
+import database
+
+logger = logging.getLogger(__name__)
+
+# get_chat_member javobidagi obuna hisoblanadigan holatlar
+MEMBER_STATUSES = ('creator', 'administrator', 'member', 'restricted')
+SUBSCRIBE_TEXT = "❗ Botdan foydalanish uchun quyidagi kanallarga obuna bo'ling:"
+
+
+class SubscriptionGate(BaseMiddleware):
+    """
+    Majburiy obuna tekshiruvi.
+    Kanallar ro'yxati bir marta o'qiladi (admin o'zgartirganda reload()),
+    foydalanuvchi natijalari TTL bilan keshlanadi.
+    """
+
+    def __init__(self, is_admin: Callable[[int], bool], ttl: int = 600,
+                 negative_ttl: int = 20, max_users: int = 100_000):
+        super().__init__()
+        self.is_admin = is_admin
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_users = max_users
+        self._channels: Optional[Tuple] = None
+        self._members: OrderedDict = OrderedDict()  # user_id -> (expires_at, missing)
+        # obunasiz bosilgan /start (ref_/ep_ havolasi bilan): checksub dan keyin qayta ishlanadi
+        self._starts: OrderedDict = OrderedDict()  # user_id -> types.Message
+        self.hits = 0
+        self.misses = 0
+        self.telegram_calls = 0
+        self.telegram_calls_avoided = 0
+
+    # --- kanallar keshi ---
+    async def channels(self, pool) -> Tuple:
+        if self._channels is None:
+            self._channels = tuple(await database.get_channels(pool))
+        return self._channels
+
+    async def reload(self, pool):
+        self._channels = tuple(await database.get_channels(pool))
+        self._members.clear()
+        logger.info("Subscription channels reloaded: %d", len(self._channels))
+
+    def forget(self, user_id: int):
+        self._members.pop(user_id, None)
+
+    # --- a'zolik keshi ---
+    async def missing_channels(self, bot, pool, user_id: int) -> Tuple:
+        channels = await self.channels(pool)
+        if not channels:
+            return ()
+        now = time.monotonic()
+        cached = self._members.get(user_id)
+        if cached and cached[0] > now:
+            self._members.move_to_end(user_id)
+            self.hits += 1
+            self.telegram_calls_avoided += len(channels)
+            return cached[1]
+        self.misses += 1
+
+        # yopiq kanallarda yuborilgan so'rov ham obuna hisoblanadi
+        request_ids = [c['channel_id'] for c in channels if c['channel_type'] == 'request']
+        requested = await database.get_join_requested(pool, user_id, request_ids) if request_ids else set()
+        to_check = [c for c in channels if c['channel_id'] not in requested]
+        self.telegram_calls_avoided += len(channels) - len(to_check)
+
+        results = await asyncio.gather(*(self._is_member(bot, c['channel_id'], user_id) for c in to_check))
+        missing = tuple(c for c, ok in zip(to_check, results) if not ok)
+
+        self._members[user_id] = (now + (self.negative_ttl if missing else self.ttl), missing)
+        self._members.move_to_end(user_id)
+        while len(self._members) > self.max_users:
+            self._members.popitem(last=False)
+        return missing
+
+    async def _is_member(self, bot, channel_id: str, user_id: int) -> bool:
+        self.telegram_calls += 1
+        try:
+            member = await bot.get_chat_member(channel_id, user_id)
+        except Exception as e:
+            # bot kanalda admin bo'lmasa foydalanuvchini bloklamaymiz
+            logger.warning("get_chat_member(%s) failed: %s", channel_id, e)
+            return True
+        return member.status in MEMBER_STATUSES
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "channels": len(self._channels or ()),
+            "cached_users": len(self._members),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / total) if total else 0.0,
+            "telegram_calls": self.telegram_calls,
+            "telegram_calls_avoided": self.telegram_calls_avoided,
+        }
+
+    # --- middleware ---
+    @staticmethod
+    def _keyboard(missing) -> InlineKeyboardMarkup:
+        kb = InlineKeyboardMarkup()
+        for i, c in enumerate(missing, 1):
+            kb.add(InlineKeyboardButton(f"➕ {i}-kanal", url=c['channel_link']))
+        kb.add(InlineKeyboardButton("✅ Tekshirish", callback_data='checksub'))
+        return kb
+
+    async def on_pre_process_message(self, message: types.Message, data: dict):
+        uid = message.from_user.id
+        if message.chat.type != 'private' or self.is_admin(uid):
+            return
+        dispatcher = self.manager.dispatcher
+        missing = await self.missing_channels(dispatcher.bot, dispatcher.get('pool'), uid)
+        if missing:
+            if message.is_command() and message.get_command(pure=True) == 'start':
+                # havolasiz /start birinchi havolali /start ni almashtirmaydi
+                if message.get_args() or uid not in self._starts:
+                    self._starts[uid] = message
+                    self._starts.move_to_end(uid)
+                    while len(self._starts) > self.max_users:
+                        self._starts.popitem(last=False)
+            await message.answer(SUBSCRIBE_TEXT, reply_markup=self._keyboard(missing))
+            raise CancelHandler()
+        # obuna bo'lgan (kesh muddati o'tib checksub siz o'tgan): eski /start endi kerak emas
+        self._starts.pop(uid, None)
+
+    async def on_pre_process_callback_query(self, query: types.CallbackQuery, data: dict):
+        uid = query.from_user.id
+        if self.is_admin(uid):
+            return
+        dispatcher = self.manager.dispatcher
+        if query.data == 'checksub':
+            self.forget(uid)
+        missing = await self.missing_channels(dispatcher.bot, dispatcher.get('pool'), uid)
+        if query.data == 'checksub':
+            if missing:
+                await query.answer("❌ Hali barcha kanallarga obuna bo'lmadingiz!", show_alert=True)
+            else:
+                await query.answer("✅ Rahmat! Endi botdan foydalanishingiz mumkin.")
+                if query.message:
+                    try:
+                        await query.message.delete()
+                    except Exception:
+                        pass
+                start = self._starts.pop(uid, None)
+                if start:
+                    # to'xtatilgan /start: foydalanuvchi, referal va deep-link endi yoziladi
+                    await dispatcher.process_update(types.Update(message=start))
+            raise CancelHandler()
+        if missing:
+            await query.answer("❗ Avval kanallarga obuna bo'ling!", show_alert=True)
+            if query.message:
+                await query.message.answer(SUBSCRIBE_TEXT, reply_markup=self._keyboard(missing))
+            else:
+                # inline rejimdagi xabar (inline.py): chat yo'q - foydalanuvchining o'ziga
+                try:
+                    await query.bot.send_message(uid, SUBSCRIBE_TEXT, reply_markup=self._keyboard(missing))
+                except exceptions.TelegramAPIError as e:
+                    # botni hali ishga tushirmagan foydalanuvchiga yozib bo'lmaydi: alert yetarli
+                    logger.debug("subscription prompt to %s failed: %s", uid, e)
+            raise CancelHandler()
@@ -0,0 +1,339 @@
+"""
+Bitta jarayonda bir nechta bot (har kanal uchun alohida nusxa).
+
+BOT_TENANTS_FILE (JSON ro'yxat) bo'lsa har yozuv - alohida bot:
+
+    [{"name": "asosiy", "token": "123:AAA", "admin_id": "111"},
+     {"name": "drama", "token": "456:BBB", "admin_id": "222", "rate": 20, "concurrency": 32}]
+
+"rate" (yoki TENANT_API_RATE) berilmasa Bot API so'rovlari cheklanmaydi - avvalgidek.
+
+Bo'lmasa BOT_TOKEN / ADMIN_ID dan bitta bot (avvalgi xatti-harakat). Birinchi bot
+avvalgi joyda qoladi (public sxema, step/); qolganlari o'z sxemasida ("schema",
+standart - name) va step/<name>/ da.
+
+Handlerlar bir marta ro'yxatdan o'tadi. Har update o'z botining kontekstida
+ishlanadi (contextvar - aiogram Bot.get_current kabi): bot, FSM storage, dp['...']
+va app.py dagi xizmatlar (Local) shu botniki. Event loop, baza pooli, aiohttp
+sessiyasi va keep-alive umumiy. Har bot uchun alohida: Bot API token bucketi (ixtiyoriy),
+bir vaqtda ishlanadigan update lar chegarasi va metrikalar (stats()).
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import re
+import time
+
+from aiogram import Bot, Dispatcher
+from aiogram.bot.api import Methods, TelegramAPIServer
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+from aiogram.dispatcher.middlewares import BaseMiddleware
+from aiogram.utils import exceptions
+from aiogram.utils.mixins import ContextInstanceMixin
+
+logger = logging.getLogger(__name__)
+
+BOT_TENANTS_FILE = os.getenv("BOT_TENANTS_FILE", "tenants.json")
+TENANT_API_RATE = float(os.getenv("TENANT_API_RATE", "0"))  # Bot API so'rov / s (bitta bot), 0 - cheklovsiz
+TENANT_CONCURRENCY = int(os.getenv("TENANT_CONCURRENCY", "64"))  # bir vaqtda ishlanadigan update
+TENANT_DRAIN_TIMEOUT = float(os.getenv("TENANT_DRAIN_TIMEOUT", "10"))  # s, shutdown da ishlanayotgan update lar
+TENANT_HTTP_CONNECTIONS = int(os.getenv("TENANT_HTTP_CONNECTIONS", "100"))  # umumiy connector
+SCHEMA_NAME = re.compile(r"^[a-z_][a-z0-9_]{0,62}$")
+
+tenants = []
+# o'z tezligini o'zi boshqaradigan vazifa (EpisodeNotifier) - bot bucketidan o'tmaydi
+_own_budget = contextvars.ContextVar('tenancy_own_budget', default=False)
+
+
+class RateLimiter:
+    """Token bucket: soniyasiga `rate` ta, `burst` tagacha yig'iladi. Kutuvchilar navbat bilan."""
+
+    def __init__(self, rate: float, burst: float = None):
+        self.rate = rate
+        self.burst = burst or rate
+        self._tokens = self.burst
+        self._at = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waited = 0.0
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._at) * self.rate)
+            self._at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            delay = (1 - self._tokens) / self.rate
+            self.waited += delay
+            await asyncio.sleep(delay)
+            self._tokens = 0.0
+            self._at = time.monotonic()
+
+
+def own_budget():
+    """Joriy vazifa Bot API ga o'z tezligida yuboradi: interaktiv javoblar bucketini band qilmaydi."""
+    _own_budget.set(True)
+
+
+class TenantBot(Bot):
+    """Bot API: barcha botlar uchun bitta aiohttp sessiya; so'rovlar bot token bucketidan (bo'lsa) o'tadi."""
+
+    _shared_session = None
+
+    def __init__(self, token: str, limiter: RateLimiter = None, **kwargs):
+        super().__init__(token, connections_limit=TENANT_HTTP_CONNECTIONS, **kwargs)
+        self.limiter = limiter
+        self.api_calls = 0
+        self.api_errors = 0
+        self.retry_after = 0
+
+    async def get_new_session(self):
+        session = TenantBot._shared_session
+        if session is None or session.closed:
+            session = TenantBot._shared_session = await super().get_new_session()
+        return session
+
+    async def request(self, method, data=None, files=None, **kwargs):
+        # long polling javobni kutib turadi - Telegram limitiga kirmaydi
+        if self.limiter and method != Methods.GET_UPDATES and not _own_budget.get():
+            await self.limiter.acquire()
+        self.api_calls += 1
+        try:
+            return await super().request(method, data, files, **kwargs)
+        except exceptions.RetryAfter:
+            self.retry_after += 1
+            self.api_errors += 1
+            raise
+        except Exception:
+            self.api_errors += 1
+            raise
+
+    async def close(self):
+        # sessiya umumiy: close_session() hammasi uchun bir marta yopadi
+        self._session = None
+
+
+async def close_session():
+    session = TenantBot._shared_session
+    if session is not None and not session.closed:
+        await session.close()
+    TenantBot._shared_session = None
+
+
+class Tenant(ContextInstanceMixin):
+    """Bitta bot: token, sxema, chegaralar va app.py xizmatlari (setup_tenant atributlari)."""
+
+    def __init__(self, name: str, token: str, admin_id: str = "", schema: str = None,
+                 step_dir: str = "step", rate: float = TENANT_API_RATE,
+                 concurrency: int = TENANT_CONCURRENCY, api_url: str = ""):
+        self.name = name
+        self.admin_id = str(admin_id or "")
+        self.schema = schema
+        self.step_dir = step_dir
+        server = {'server': TelegramAPIServer.from_base(api_url)} if api_url else {}
+        self.bot = TenantBot(token, RateLimiter(rate) if rate > 0 else None, **server)
+        self.storage = MemoryStorage()  # post yaratish va boshqa FSM holatlari
+        self.data = {}  # dp['pool'], dp['tasks']
+        self.concurrency = concurrency
+        self.slots = asyncio.Semaphore(concurrency)
+        self.tasks = set()  # ishlanayotgan update lar - shutdown ularni kutadi
+        self.updates = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.handler_seconds = 0.0
+
+    async def process(self, dp: Dispatcher, update):
+        """poll() slot olgan holda chaqiradi; slot shu yerda qaytariladi."""
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await dp.process_updates([update])
+        except Exception as e:
+            self.errors += 1
+            logger.exception("[%s] update %s failed: %s", self.name, update.update_id, e)
+        finally:
+            self.updates += 1
+            self.in_flight -= 1
+            self.handler_seconds += time.perf_counter() - started
+            self.slots.release()
+
+    def spawn(self, dp: Dispatcher, update):
+        task = asyncio.ensure_future(self.process(dp, update))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def drain(self, timeout: float = TENANT_DRAIN_TIMEOUT):
+        """Ishlanayotgan update lar tugashini kutadi (pool yopilishidan oldin); muddatdan keyin bekor qiladi."""
+        if not self.tasks:
+            return
+        _, pending = await asyncio.wait(set(self.tasks), timeout=timeout)
+        if pending:
+            logger.warning("[%s] %d updates still running after %ss, cancelling", self.name, len(pending), timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self) -> dict:
+        bot = self.bot
+        return {"schema": self.schema or "public", "updates": self.updates, "errors": self.errors,
+                "in_flight": self.in_flight,
+                "handler_ms_avg": round(self.handler_seconds * 1000 / self.updates, 2) if self.updates else 0.0,
+                "api_calls": bot.api_calls, "api_errors": bot.api_errors, "retry_after": bot.retry_after,
+                "rate_limited_s": round(bot.limiter.waited, 1) if bot.limiter else 0.0}
+
+
+def current() -> Tenant:
+    """Joriy update ning boti; kontekstsiz (startup, CLI, bench) - birinchi bot."""
+    return Tenant.get_current() or tenants[0]
+
+
+def stats() -> dict:
+    return {t.name: t.stats() for t in tenants}
+
+
+def load_tenants(token: str = "", admin_id: str = "", api_url: str = "",
+                 path: str = BOT_TENANTS_FILE) -> list:
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    elif token:
+        entries = [{"name": "main", "token": token, "admin_id": admin_id}]
+    else:
+        entries = []
+    names = set()
+    for i, entry in enumerate(entries):
+        name = str(entry['name'])
+        if name in names:
+            raise ValueError(f"{path}: bot nomi takrorlangan: {name}")
+        names.add(name)
+        # birinchi bot - mavjud ma'lumotlar joyida (public sxema, step/)
+        schema = entry.get('schema', name if i else None)
+        if schema is not None and not SCHEMA_NAME.match(schema):
+            raise ValueError(f"{path}: {name}: sxema nomi [a-z0-9_] bo'lishi kerak: {schema!r}")
+        tenants.append(Tenant(name, entry['token'], entry.get('admin_id', ""), schema,
+                              step_dir="step" if i == 0 else os.path.join("step", name),
+                              rate=float(entry.get('rate', TENANT_API_RATE)),
+                              concurrency=int(entry.get('concurrency', TENANT_CONCURRENCY)),
+                              api_url=api_url))
+    if len(tenants) > 1:
+        logger.info("Tenants: %s", ", ".join(f"{t.name} ({t.schema or 'public'})" for t in tenants))
+    return tenants
+
+
+class Local:
+    """Modul darajasidagi nom (app.settings, app.bot ...) -> joriy botning shu nomli atributi."""
+
+    __slots__ = ('_name',)
+
+    def __init__(self, name: str):
+        object.__setattr__(self, '_name', name)
+
+    def _target(self):
+        return getattr(current(), self._name)
+
+    def __getattr__(self, item):
+        return getattr(self._target(), item)
+
+    def __setattr__(self, item, value):
+        setattr(self._target(), item, value)
+
+    def __bool__(self):
+        return bool(self._target())
+
+    def __repr__(self):
+        return f"<{self._name} of {current().name}: {self._target()!r}>"
+
+
+class Middleware(BaseMiddleware):
+    """Joriy botning middleware iga uzatadi (masalan har botning majburiy kanallari)."""
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+
+    async def trigger(self, action, args):
+        middleware = getattr(current(), self.name)
+        if not middleware.is_configured():
+            middleware.setup(self.manager)
+        return await middleware.trigger(action, args)
+
+
+class TenantDispatcher(Dispatcher):
+    """dp.bot, dp.storage va dp['...'] - joriy botniki; handlerlar hammasiga umumiy."""
+
+    def __init__(self, **kwargs):
+        tenant = current()
+        super().__init__(tenant.bot, storage=tenant.storage, **kwargs)
+
+    @property
+    def bot(self):
+        return current().bot
+
+    @bot.setter
+    def bot(self, value):
+        current().bot = value
+
+    @property
+    def storage(self):
+        return current().storage
+
+    @storage.setter
+    def storage(self, value):
+        current().storage = value
+
+    @property
+    def data(self):
+        return current().data
+
+
+async def poll(dp: Dispatcher, tenant: Tenant, timeout: int = 20, relax: float = 0.1, error_sleep: int = 5):
+    """Dispatcher.start_polling (skip_updates=True) ning bitta bot uchun nusxasi."""
+    Tenant.set_current(tenant)
+    Bot.set_current(tenant.bot)
+    Dispatcher.set_current(dp)
+    bot = tenant.bot
+    await bot.delete_webhook(drop_pending_updates=True)
+    offset = None
+    logger.info("[%s] Start polling.", tenant.name)
+    while True:
+        try:
+            updates = await bot.get_updates(offset=offset, timeout=timeout)
+        except Exception as e:
+            logger.warning("[%s] get_updates failed: %s", tenant.name, e)
+            await asyncio.sleep(error_sleep)
+            continue
+        if updates:
+            offset = updates[-1].update_id + 1
+            for update in updates:
+                # slot bo'lmasa shu bot kutadi (Telegram update larni o'zida saqlaydi),
+                # boshqa botlar va umumiy pool band bo'lib qolmaydi
+                await tenant.slots.acquire()
+                tenant.spawn(dp, update)
+        if relax:
+            await asyncio.sleep(relax)
+
+
+def run(dp: Dispatcher, on_startup, on_shutdown):
+    """executor.start_polling o'rniga: startup, har bot uchun poll(), Ctrl+C da shutdown."""
+
+    async def main():
+        await on_startup(dp)
+        polls = [asyncio.ensure_future(poll(dp, t)) for t in tenants]
+        try:
+            await asyncio.gather(*polls)
+        finally:
+            for task in polls:
+                task.cancel()
+            await asyncio.gather(*polls, return_exceptions=True)
+            # yangi update olinmaydi; boshlanganlari pool yopilishidan oldin tugasin
+            await asyncio.gather(*(t.drain() for t in tenants))
+            await on_shutdown(dp)
+            await close_session()
+
+    try:
+        asyncio.run(main())
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("Polling stopped.")
@@ -0,0 +1,163 @@
+"""
+"🔥 Trenddagilar": vaqt o'tishi bilan so'nadigan mashhurlik.
+
+Forward decay: hodisa ball ga w * 2^((t - landmark) / half_life) qo'shadi. Barcha
+ballar bir xil sur'atda so'nadi, shuning uchun tartib faqat yangi hodisada
+o'zgaradi - hech narsani qayta hisoblash yoki tarixni o'qish kerak emas. Ball faqat
+o'sadi, demak top ro'yxatga kirish uchun uning eng kichigidan oshish yetarli.
+Ko'rsatkich katta bo'lib ketsa landmark suriladi (hamma ball bir xil ko'paytuvchiga).
+O'zgargan ballar trending jadvaliga davriy yoziladi, startup da qayta o'qiladi.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+
+import database
+
+logger = logging.getLogger(__name__)
+
+TRENDING_HALF_LIFE = float(os.getenv("TRENDING_HALF_LIFE", str(24 * 3600)))  # s
+TRENDING_CHECKPOINT = float(os.getenv("TRENDING_CHECKPOINT", "60"))  # s
+TRENDING_TOP = 20
+WEIGHTS = {'view': 1.0, 'download': 2.0}
+DEDUPE_WINDOW = 3600.0  # bir foydalanuvchi bir animeni soatiga bir marta oshiradi
+DEDUPE_MAX = 100_000
+REBASE_AT = 60.0  # 2^60 dan oshmasin (float aniqligi)
+PRUNE_BELOW = 0.01  # hozirgi qiymati bundan kichik ballar unutiladi
+
+
+class Trending:
+    def __init__(self, half_life: float = TRENDING_HALF_LIFE, top: int = TRENDING_TOP):
+        self.half_life = half_life
+        self.top_n = top
+        self.landmark = time.time()
+        self.scores = {}  # anime_id -> forward ball (landmark ga nisbatan)
+        self.top = []  # [(ball, anime_id)] kamayish bo'yicha, top_n tagacha
+        self.names = {}  # top dagi anime_id -> nom
+        self._dirty = set()
+        self._removed = set()
+        self._seen = OrderedDict()  # (user_id, anime_id) -> oxirgi hisoblangan vaqt
+        self._names_stale = True
+        self.recorded = 0
+        self.deduped = 0
+        database.on_catalog_change(self._catalog_changed)
+
+    def _catalog_changed(self):
+        # nomlar eskirgan bo'lishi mumkin: keyingi checkpoint yangilaydi, ungacha eskisi ko'rsatiladi
+        self._names_stale = True
+
+    def record(self, kind: str, user_id: int, anime_id) -> None:
+        """stats.EventLog kuzatuvchisi: view/download."""
+        weight = WEIGHTS.get(kind)
+        if not weight or anime_id is None:
+            return
+        now = time.time()
+        key = (int(user_id), int(anime_id))
+        last = self._seen.get(key)
+        if last is not None and now - last < DEDUPE_WINDOW:
+            self.deduped += 1
+            return
+        self._seen[key] = now
+        self._seen.move_to_end(key)
+        while len(self._seen) > DEDUPE_MAX:
+            self._seen.popitem(last=False)
+        self.recorded += 1
+        self.add(int(anime_id), weight, now)
+
+    def add(self, anime_id: int, weight: float, at: float = None):
+        at = at or time.time()
+        exponent = (at - self.landmark) / self.half_life
+        if exponent > REBASE_AT:
+            self._rebase(at)
+            exponent = 0.0
+        score = self.scores.get(anime_id, 0.0) + weight * 2.0 ** exponent
+        self.scores[anime_id] = score
+        self._dirty.add(anime_id)
+        self._removed.discard(anime_id)
+        self._bump(anime_id, score)
+
+    def _bump(self, anime_id: int, score: float):
+        top = self.top
+        for i, (_, aid) in enumerate(top):
+            if aid == anime_id:
+                del top[i]
+                break
+        else:
+            if len(top) >= self.top_n and score <= top[-1][0]:
+                return
+        # top_n kichik (20): chiziqli joylash
+        i = 0
+        while i < len(top) and top[i][0] >= score:
+            i += 1
+        top.insert(i, (score, anime_id))
+        del top[self.top_n:]
+        if anime_id not in self.names:
+            self._names_stale = True
+
+    def _rebase(self, now: float):
+        factor = 2.0 ** (-(now - self.landmark) / self.half_life)
+        self.landmark = now
+        self.scores = {aid: s * factor for aid, s in self.scores.items()}
+        self.top = [(s * factor, aid) for s, aid in self.top]
+        self._dirty.update(self.scores)
+
+    def current(self, score: float, now: float = None) -> float:
+        """Forward ball -> hozirgi (so'ngan) qiymat."""
+        return score * 2.0 ** (-((now or time.time()) - self.landmark) / self.half_life)
+
+    def items(self, limit: int = None) -> list:
+        """[(anime_id, nom)] - nomi hali yuklanmaganlari tushib qoladi. Bazaga murojaat yo'q."""
+        out = [(aid, self.names[aid]) for _, aid in self.top if aid in self.names]
+        return out[:limit] if limit else out
+
+    async def load(self, pool):
+        rows = await database.load_trending(pool)
+        for anime_id, score, landmark in rows:
+            self.scores[anime_id] = self.scores.get(anime_id, 0.0) + \
+                score * 2.0 ** ((landmark - self.landmark) / self.half_life)
+        self.top = sorted(((s, aid) for aid, s in self.scores.items()), reverse=True)[:self.top_n]
+        await self.refresh_names(pool)
+        logger.info("trending: %d scores loaded", len(rows))
+
+    async def refresh_names(self, pool):
+        self._names_stale = False
+        self.names = await database.anime_names(pool, [aid for _, aid in self.top])
+
+    async def checkpoint(self, pool) -> int:
+        now = time.time()
+        for aid, score in list(self.scores.items()):
+            if self.current(score, now) < PRUNE_BELOW:
+                del self.scores[aid]
+                self._dirty.discard(aid)
+                self._removed.add(aid)
+        self.top = [(s, aid) for s, aid in self.top if aid in self.scores]
+        dirty, removed = self._dirty, self._removed
+        self._dirty, self._removed = set(), set()
+        try:
+            await database.save_trending(pool, [(aid, self.scores[aid], self.landmark) for aid in dirty
+                                                if aid in self.scores], list(removed))
+        except Exception:
+            self._dirty |= dirty
+            self._removed |= removed
+            raise
+        if self._names_stale:
+            await self.refresh_names(pool)
+        return len(dirty)
+
+    async def run(self, pool):
+        try:
+            while True:
+                await asyncio.sleep(TRENDING_CHECKPOINT)
+                try:
+                    await self.checkpoint(pool)
+                except Exception as e:
+                    logger.exception("trending checkpoint failed: %s", e)
+        except asyncio.CancelledError:
+            await self.checkpoint(pool)
+            raise
+
+    def stats(self) -> dict:
+        return {"scores": len(self.scores), "recorded": self.recorded, "deduped": self.deduped,
+                "dirty": len(self._dirty), "half_life_h": round(self.half_life / 3600, 1)}
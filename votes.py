@@ -0,0 +1,121 @@
+"""
+Anime kartasidagi 👍/👎 ovozlari.
+
+Handler faqat xotiraga yozadi: (user, anime) -> oxirgi ovoz (takroriy bosishlar
+bitta yozuvga aylanadi). Fon vazifasi paketni votes ga upsert qiladi va
+animelar."like"/deslike hisoblagichlariga sof farqni bitta UPDATE bilan qo'shadi.
+"""
+import asyncio
+import logging
+from typing import Dict, Tuple
+
+import database
+
+logger = logging.getLogger(__name__)
+
+LIKE, DISLIKE = 1, -1
+
+Key = Tuple[int, int]  # (user_id, anime_id)
+
+STAGE_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS votes_stage (
+    user_id BIGINT NOT NULL,
+    anime_id INTEGER NOT NULL,
+    value SMALLINT NOT NULL
+)
+"""
+
+# farq upsertdan oldin hisoblanadi: eski ovoz hali votes da turibdi
+APPLY_DELTAS = """
+UPDATE animelar SET "like" = "like" + d.likes, deslike = deslike + d.dislikes
+FROM (
+    SELECT s.anime_id,
+           SUM(CASE WHEN s.value = 1 THEN 1 ELSE 0 END) - SUM(CASE WHEN v.value = 1 THEN 1 ELSE 0 END) AS likes,
+           SUM(CASE WHEN s.value = -1 THEN 1 ELSE 0 END) - SUM(CASE WHEN v.value = -1 THEN 1 ELSE 0 END) AS dislikes
+    FROM votes_stage s
+    LEFT JOIN votes v ON v.user_id = s.user_id AND v.anime_id = s.anime_id
+    GROUP BY s.anime_id
+) d
+WHERE animelar.id = d.anime_id AND (d.likes <> 0 OR d.dislikes <> 0)
+"""
+
+# WHERE true: SQLite da INSERT ... SELECT ... ON CONFLICT uchun talab qilinadi
+UPSERT_VOTES = """
+INSERT INTO votes (user_id, anime_id, value)
+SELECT user_id, anime_id, value FROM votes_stage WHERE true
+ON CONFLICT (user_id, anime_id) DO UPDATE SET value = excluded.value, voted_at = now()
+"""
+
+
+class VoteBuffer:
+    """JoinRequestBuffer kabi: add() bazaga murojaat qilmaydi, run() paketlab yozadi."""
+
+    def __init__(self, max_batch: int = 5000, interval: float = 2.0, max_pending: int = 200_000):
+        self.max_batch = max_batch
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: Dict[Key, int] = {}  # dict tartibi saqlanadi - eng eskisi birinchi
+        self._wakeup = asyncio.Event()
+        self.received = 0
+        self.written = 0
+        self.dropped = 0
+
+    def add(self, user_id: int, anime_id: int, value: int):
+        self.received += 1
+        key = (int(user_id), int(anime_id))
+        # fikrini o'zgartirgan foydalanuvchi: faqat oxirgi ovoz yoziladi
+        self._pending.pop(key, None)
+        self._pending[key] = LIKE if value > 0 else DISLIKE
+        if len(self._pending) > self.max_pending:
+            del self._pending[next(iter(self._pending))]
+            self.dropped += 1
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    async def flush(self, pool) -> int:
+        total = 0
+        while self._pending:
+            keys = list(self._pending)[:self.max_batch]
+            batch = [(u, a, self._pending.pop((u, a))) for u, a in keys]
+            try:
+                await self._write(pool, batch)
+            except Exception as e:
+                logger.exception("votes flush failed: %s", e)
+                # keyingi urinishda qayta yozamiz; shu orada kelgan yangi ovoz ustun
+                for u, a, value in batch:
+                    self._pending.setdefault((u, a), value)
+                break
+            total += len(batch)
+        self.written += total
+        return total
+
+    @staticmethod
+    async def _write(pool, batch):
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                if not database.is_sqlite(pool):
+                    # parallel flush (bir nechta jarayon) eski ovozni ikki marta hisoblamasin
+                    await conn.execute("LOCK TABLE votes IN SHARE ROW EXCLUSIVE MODE")
+                await conn.execute(STAGE_DDL)
+                await conn.execute("DELETE FROM votes_stage")
+                await conn.copy_records_to_table('votes_stage', records=batch,
+                                                 columns=['user_id', 'anime_id', 'value'])
+                await conn.execute(APPLY_DELTAS)
+                await conn.execute(UPSERT_VOTES)
+
+    async def run(self, pool):
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush(pool)
+        except asyncio.CancelledError:
+            await self.flush(pool)
+            raise
+
+    def stats(self) -> dict:
+        return {"received": self.received, "written": self.written,
+                "pending": len(self._pending), "dropped": self.dropped}
@@ -0,0 +1,55 @@
+"""
+Startup isitish bosqichi.
+
+Majburiy yuklashlar (sozlamalar, adminlar, kanallar) va ixtiyoriy isitish (pool
+ulanishlari va issiq so'rovlar, mashhur animelar) bir vaqtda ishlaydi. Bot update
+qabul qilishni majburiylar tugagach, ixtiyoriylar tugaguncha yoki WARMUP_DEADLINE
+o'tguncha kutadi; ulgurmagan isitish fonda davom etadi.
+"""
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+WARMUP_DEADLINE = float(os.getenv("WARMUP_DEADLINE", "10"))  # soniya
+WARMUP_TOP_ANIME = int(os.getenv("WARMUP_TOP_ANIME", "200"))  # kartalari va qismlari oldindan o'qiladi
+
+
+async def timed(timings: dict, name: str, aw):
+    started = time.perf_counter()
+    try:
+        return await aw
+    finally:
+        timings[name] = time.perf_counter() - started
+
+
+async def _optional(timings: dict, name: str, aw):
+    try:
+        return await timed(timings, name, aw)
+    except Exception as e:
+        logger.warning("warm-up %s failed: %s", name, e)
+
+
+async def warm_up(timings: dict, required: dict, optional: dict, deadline: float = WARMUP_DEADLINE) -> bool:
+    """
+    required - xato bo'lsa startup to'xtaydi, muddatsiz kutiladi;
+    optional - xatosi faqat logga yoziladi, deadline gacha kutiladi.
+    Hammasi muddatda tugasa True.
+    """
+    started = time.perf_counter()
+    rest = asyncio.ensure_future(asyncio.gather(*(_optional(timings, n, aw) for n, aw in optional.items())))
+    await asyncio.gather(*(timed(timings, n, aw) for n, aw in required.items()))
+    left = deadline - (time.perf_counter() - started)
+    try:
+        await asyncio.wait_for(asyncio.shield(rest), timeout=max(left, 0))
+        return True
+    except asyncio.TimeoutError:
+        logger.warning("warm-up deadline %.1fs passed, still running in background: %s",
+                       deadline, ", ".join(n for n in optional if n not in timings))
+        return False
+
+
+def summary(timings: dict) -> str:
+    return ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in timings.items())